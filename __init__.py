@@ -1,26 +1,20 @@
-"""This script initializes the plugin, making it known to QGIS."""
+"""This script initializes the plugin, making it known to QGIS.
+
+QGIS is only imported when the plugin is loaded, so that the command
+line interface (see '__main__.py') can run without it."""
 from __future__ import annotations
 
 import sys
 import site
 
-from qgis.core import Qgis
-
-from .src.modules import MODULES_INSTALL_FOLDER
-from .src.modules import (
-    get_reqs,
-    get_modules,
-    check_if_missing,
-    MissingModulesDialog,
-    State
-)
-
 
 MissingModules = list[str]
 
 
 def pip_missing() -> bool:
     """Returns true if pip is not installed."""
+    from .src.modules import get_modules
+
     modules = get_modules()
     if not any(module.name == 'pip' for module in modules):
         return True
@@ -28,6 +22,12 @@ def pip_missing() -> bool:
 
 
 def handle_missing_modules() -> None | MissingModules:
+    from .src.modules import (
+        get_reqs,
+        check_if_missing,
+        MissingModulesDialog,
+        State
+    )
 
     def get_module_states():
         reqs = get_reqs()
@@ -52,6 +52,9 @@ def classFactory(iface):
     :param iface: A QGIS interface instance.
     :type iface: QgsInterface
     """
+    from qgis.core import Qgis
+    from .src.modules import MODULES_INSTALL_FOLDER
+
     if MODULES_INSTALL_FOLDER.as_posix() not in sys.path:
         # sys.path.insert(-1, MODULES_INSTALL_FOLDER.as_posix())
         site.addsitedir(MODULES_INSTALL_FOLDER.as_posix())
@@ -0,0 +1,17 @@
+"""Runs the command line interface, see 'src/cli.py'."""
+from pathlib import Path
+import site
+import sys
+
+
+# The packages installed by the plugin, such as 'eurostat', which are
+# imported by the command line interface. The same folder as in
+# 'src/modules.py', which can not be imported without QGIS.
+MODULES_INSTALL_FOLDER = Path(__file__).parent / 'extlibs'
+if MODULES_INSTALL_FOLDER.exists():
+    site.addsitedir(MODULES_INSTALL_FOLDER.as_posix())
+
+from .src.cli import main  # noqa: E402
+
+
+sys.exit(main())
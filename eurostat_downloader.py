@@ -2,11 +2,17 @@
 from qgis.PyQt.QtCore import QSettings, QTranslator, QCoreApplication
 from qgis.PyQt.QtGui import QIcon
 from qgis.PyQt.QtWidgets import QAction
+from qgis.core import QgsApplication
 
 # Initialize Qt resources from file resources.py
 from .resources import *
 # Import the code for the dialog
 from .src.eurostat_downloader import Dialog
+from .src.network import SESSION_MANAGER
+from .src.settings import GLOBAL_SETTINGS
+from .src.qgis_settings import apply_qgis_settings
+from .src.processing import EurostatProvider
+from .src.tasks import SCHEDULER
 import os.path
 
 
@@ -23,6 +29,8 @@ class EurostatDownloader:
         """
         # Save reference to the QGIS interface
         self.iface = iface
+        # The proxy and the cache directory are taken from QGIS
+        apply_qgis_settings(GLOBAL_SETTINGS)
         # initialize plugin directory
         self.plugin_dir = os.path.dirname(__file__)
         # initialize locale
@@ -44,6 +52,7 @@ class EurostatDownloader:
         # Check if plugin was started the first time in current QGIS session
         # Must be set in initGui() to survive plugin reloads
         self.first_start = None
+        self.provider = None
 
     # noinspection PyMethodMayBeStatic
     def tr(self, message):
@@ -135,8 +144,14 @@ class EurostatDownloader:
 
         return action
 
+    def initProcessing(self):
+        """Adds the algorithms of the plugin to the Processing toolbox."""
+        self.provider = EurostatProvider()
+        QgsApplication.processingRegistry().addProvider(self.provider)
+
     def initGui(self):
         """Create the menu entries and toolbar icons inside the QGIS GUI."""
+        self.initProcessing()
 
         icon_path = ':/plugins/eurostat_downloader/assets/icon.png'
         self.add_action(
@@ -156,6 +171,12 @@ class EurostatDownloader:
                 self.tr(u'&Eurostat Downloader'),
                 action)
             self.iface.removeToolBarIcon(action)
+        if self.provider is not None:
+            QgsApplication.processingRegistry().removeProvider(self.provider)
+            self.provider = None
+        # The jobs still running must not outlive the plugin.
+        SCHEDULER.shutdown()
+        SESSION_MANAGER.close()
 
 
     def run(self):
@@ -2,9 +2,12 @@ from __future__ import annotations
 
 from typing import Any
 import importlib
+import threading
 
-from .settings import GLOBAL_SETTINGS
-from .modules import MODULES_INSTALL_FOLDER
+from .network import (
+    SessionRequests,
+    get_raw_response
+)
 
 
 __all__ = ['eurostat']
@@ -13,54 +16,28 @@ __all__ = ['eurostat']
 class _EurostatLoader:
     """A wrapper for the 'eurostat' package.
 
-    This wrapper allows to call 'set_eurostat_args'
-    every time an objectfrom the eurostat module is
-    accessed. This way, the latest global settings
-    (e.g. SSL verification setting from the GUI settings dialog)
-    are used. It also loads 'eurostat' lazly.
+    It loads 'eurostat' lazly, and makes it send its requests through
+    the shared session of the plugin, which is the only one to retry
+    them. The proxy and the SSL verification
+    are taken from the settings snapshot of each request (see
+    'SessionRequests'), so the global request arguments of 'eurostat'
+    are never set.
     """
 
     def __init__(self):
         self._mod = None
-
-    def _set_eurostat_proxy(self) -> None:
-        assert self._mod is not None
-        if GLOBAL_SETTINGS.proxy is None:
-            return None
-        if GLOBAL_SETTINGS.proxy.host and GLOBAL_SETTINGS.proxy.port:
-            # Create a dictionary with the proxy information
-            proxy = (
-                f'http://{GLOBAL_SETTINGS.proxy.host}:{GLOBAL_SETTINGS.proxy.port}'  # noqa
-            )
-            proxy_info = {
-                'https': [
-                    GLOBAL_SETTINGS.proxy.user,
-                    GLOBAL_SETTINGS.proxy.password,
-                    proxy
-                ]
-            }
-            # Set the proxy for the eurostat library
-            self._mod.setproxy(proxy_info)  # type: ignore
-        else:
-            # if not host and port, we have to remove the existing
-            # proxy settings. this is the best way I could think of.
-            args = self._mod.get_requests_args()
-            try:
-                args.pop('proxies')
-            except KeyError:
-                return None
-
-    def _set_eurostat_args(self) -> None:
-        assert self._mod is not None
-        self._set_eurostat_proxy()
-        self._mod.set_requests_args(  # type: ignore
-            verify=GLOBAL_SETTINGS.verify_ssl
-        )
+        self._lock = threading.Lock()
 
     def __getattr__(self, name: str) -> Any:
         if self._mod is None:
-            self._mod = importlib.import_module('eurostat')
-        self._set_eurostat_args()
+            with self._lock:
+                if self._mod is None:
+                    mod = importlib.import_module('eurostat')
+                    # 'eurostat' calls 'requests.get' from this module.
+                    module = importlib.import_module('eurostat.eurostat')
+                    module.requests = SessionRequests()
+                    setattr(module, '__get_raw_resp__', get_raw_response)
+                    self._mod = mod
         return getattr(self._mod, name)
 
 
@@ -0,0 +1,324 @@
+"""On-disk caches used to avoid downloading the same data twice."""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+from dataclasses import (
+    dataclass,
+    field
+)
+from datetime import (
+    datetime,
+    timedelta
+)
+from pathlib import Path
+import hashlib
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .enums import (
+    Language,
+    Agency
+)
+from .search import TocIndex
+from .store import TidyStore
+
+
+class CacheEntry(NamedTuple):
+    data: pd.DataFrame
+    fetched_at: datetime
+
+
+class DatasetEntry(NamedTuple):
+    data: TidyStore
+    params: list[str]
+    # The 'last update of data' value of the table of contents.
+    last_update: str
+    digest: str
+
+
+CodeList = list[tuple[str, str]]
+
+
+class CodeListEntry(NamedTuple):
+    data: CodeList
+    fetched_at: datetime
+
+
+def get_digest(store: TidyStore) -> str:
+    """Hashes the content of the store, including the names of the
+    dimensions and of the periods."""
+    digest = hashlib.sha256()
+    for names in (store.keys.columns, store.periods):
+        digest.update('\0'.join(map(str, names)).encode() + b'\1')
+    digest.update(
+        pd.util.hash_pandas_object(store.keys, index=False).to_numpy()
+    )
+    for array in (store.series, store.values, store.bounds):
+        digest.update(np.ascontiguousarray(array))
+    return digest.hexdigest()
+
+
+def write_pickle(obj, path: Path) -> None:
+    """Writes the object to a temporary file first and then moves it,
+    so that concurrent readers never see a partially written file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    os.close(fd)
+    try:
+        pd.to_pickle(obj, temp)
+        os.replace(temp, path)
+    except BaseException:
+        Path(temp).unlink(missing_ok=True)
+        raise
+
+
+def evict(
+    directory: Path,
+    max_entries: int | None = None,
+    max_bytes: int | None = None
+):
+    """Removes the least recently used pickle files of the directory
+    until at most 'max_entries' are left, which take at most 'max_bytes'.
+
+    The files are used in the order of their modification time, which
+    the caches update when an entry is read."""
+    stats = {}
+    for path in directory.glob('*.pickle'):
+        try:
+            stats[path] = path.stat()
+        except FileNotFoundError:
+            continue
+    count = len(stats)
+    size = sum(stat.st_size for stat in stats.values())
+    for path in sorted(stats, key=lambda path: stats[path].st_mtime):
+        if (
+            (max_entries is None or count <= max_entries)
+            and (max_bytes is None or size <= max_bytes)
+        ):
+            break
+        path.unlink(missing_ok=True)
+        count -= 1
+        size -= stats[path].st_size
+
+
+@dataclass
+class TocCache:
+    """Stores the table of contents of each (Agency, Language) pair.
+
+    The time of the download is the modification time of the file.
+    Entries older than 'ttl' are considered stale, but they are still
+    returned, so that the caller can decide to use them while a fresh
+    copy is downloaded.
+    """
+    directory: Path
+    ttl: timedelta = timedelta(days=1)
+
+    def _path(self, agency: Agency, lang: Language) -> Path:
+        return self.directory / f'toc_{agency.value}_{lang.value}.pickle'
+
+    def get(self, agency: Agency, lang: Language) -> CacheEntry | None:
+        path = self._path(agency, lang)
+        try:
+            fetched_at = datetime.fromtimestamp(path.stat().st_mtime)
+            data = pd.read_pickle(path)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # A corrupted cache file is the same as a missing one.
+            path.unlink(missing_ok=True)
+            return None
+        return CacheEntry(data, fetched_at)
+
+    def set(self, agency: Agency, lang: Language, data: pd.DataFrame):
+        write_pickle(data, self._path(agency, lang))
+
+    def _index_path(self, lang: Language) -> Path:
+        return self.directory / f'index_{lang.value}.pickle'
+
+    def get_index(self, lang: Language) -> TocIndex | None:
+        """Returns the search index stored for the language, if any.
+
+        The caller has to check the signature of the index against
+        the current table of contents."""
+        path = self._index_path(lang)
+        try:
+            index = pd.read_pickle(path)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            path.unlink(missing_ok=True)
+            return None
+        return index if isinstance(index, TocIndex) else None
+
+    def set_index(self, lang: Language, index: TocIndex):
+        write_pickle(index, self._index_path(lang))
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return datetime.now() - entry.fetched_at < self.ttl
+
+    def clear(self):
+        for pattern in ('toc_*.pickle', 'index_*.pickle'):
+            for path in self.directory.glob(pattern):
+                path.unlink(missing_ok=True)
+
+
+@dataclass
+class DatasetCache:
+    """Stores the downloaded datasets, keyed by their code.
+
+    The datasets are stored in long format, so that they are written
+    and read without building the wide table. An entry is only returned
+    while the table of contents reports the same last update as when
+    the dataset was downloaded. The content is hashed when written and
+    checked when read, so that a damaged file is downloaded again
+    instead of being shown. At most 'max_entries' files, of at most
+    'max_bytes' in total, are kept, the least recently used ones being
+    removed first.
+    """
+    directory: Path
+    max_entries: int = 100
+    max_bytes: int = 2 * 2**30
+
+    def _path(self, code: str) -> Path:
+        return self.directory / 'datasets' / f'{code.lower()}.pickle'
+
+    def get(self, code: str, last_update: str | None) -> DatasetEntry | None:
+        if last_update is None:
+            return None
+        path = self._path(code)
+        try:
+            entry = pd.read_pickle(path)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            path.unlink(missing_ok=True)
+            return None
+        if (
+            not isinstance(entry, DatasetEntry)
+            # Written by a version which stored the wide frame.
+            or not isinstance(entry.data, TidyStore)
+        ):
+            path.unlink(missing_ok=True)
+            return None
+        if entry.last_update != last_update:
+            return None
+        if entry.digest != get_digest(entry.data):
+            path.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def contains(self, code: str) -> bool:
+        """Whether an entry was stored, without reading or checking it."""
+        return self._path(code).exists()
+
+    def set(
+        self,
+        code: str,
+        data: TidyStore,
+        params: list[str],
+        last_update: str | None
+    ):
+        if last_update is None:
+            # Without it, the entry could never be found fresh.
+            return
+        entry = DatasetEntry(
+            data=data,
+            params=list(params),
+            last_update=last_update,
+            digest=get_digest(data)
+        )
+        write_pickle(entry, self._path(code))
+        evict(
+            self.directory / 'datasets',
+            max_entries=self.max_entries,
+            max_bytes=self.max_bytes
+        )
+
+    def clear(self):
+        for path in (self.directory / 'datasets').glob('*.pickle'):
+            path.unlink(missing_ok=True)
+
+
+@dataclass
+class CodeListCache:
+    """Stores the code lists (the labels of the values of a dimension,
+    such as 'geo' or 'unit'), keyed by (agency, dimension, language).
+
+    The agencies may use the same dimension with different values. The
+    code lists are shared by the datasets of an agency, so they are downloaded
+    once and kept in memory and on disk. Entries older than 'ttl' are
+    downloaded again. At most 'max_entries' files are kept, the least
+    recently used ones being removed first.
+    """
+    directory: Path
+    ttl: timedelta = timedelta(days=7)
+    max_entries: int = 500
+    _memory: dict[tuple[Agency, str, Language], CodeListEntry] = field(
+        init=False, default_factory=dict, repr=False
+    )
+    _lock: threading.Lock = field(
+        init=False, default_factory=threading.Lock, repr=False
+    )
+
+    def _path(self, agency: Agency, dimension: str, lang: Language) -> Path:
+        return (
+            self.directory
+            / 'codelists'
+            / f'{agency.value.lower()}_{dimension.lower()}_{lang.value}.pickle'
+        )
+
+    def _is_fresh(self, entry: CodeListEntry) -> bool:
+        return datetime.now() - entry.fetched_at < self.ttl
+
+    def get(
+        self,
+        agency: Agency,
+        dimension: str,
+        lang: Language
+    ) -> CodeList | None:
+        key = (agency, dimension.lower(), lang)
+        with self._lock:
+            entry = self._memory.get(key, None)
+        if entry is not None and self._is_fresh(entry):
+            return entry.data
+        path = self._path(agency, dimension, lang)
+        try:
+            entry = pd.read_pickle(path)
+            # The modification time is used to find the least
+            # recently used entries.
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            path.unlink(missing_ok=True)
+            return None
+        if not isinstance(entry, CodeListEntry) or not self._is_fresh(entry):
+            return None
+        with self._lock:
+            self._memory[key] = entry
+        return entry.data
+
+    def set(
+        self,
+        agency: Agency,
+        dimension: str,
+        lang: Language,
+        data: CodeList
+    ):
+        entry = CodeListEntry(data=list(data), fetched_at=datetime.now())
+        with self._lock:
+            self._memory[(agency, dimension.lower(), lang)] = entry
+        write_pickle(entry, self._path(agency, dimension, lang))
+        evict(self.directory / 'codelists', max_entries=self.max_entries)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        for path in (self.directory / 'codelists').glob('*.pickle'):
+            path.unlink(missing_ok=True)
@@ -0,0 +1,259 @@
+"""Downloads datasets from the command line, without QGIS.
+
+Run from the folder which contains the plugin:
+
+    python -m eurostat_downloader fetch --codes tps00001,nama_10_gdp \\
+        --filter geo=RO,BG --since 2015 --out indicators.gpkg
+"""
+
+from __future__ import annotations
+
+from typing import (
+    Callable,
+    Iterable,
+    NamedTuple,
+    Sequence
+)
+from pathlib import Path
+import argparse
+import concurrent.futures
+import sys
+import time
+
+import pandas as pd
+
+from .core import (
+    GLOBAL_SETTINGS,
+    CancelToken,
+    Database,
+    JobCancelled,
+    create_database,
+    fetch_dataset,
+    parse_filters
+)
+from .export import (
+    write_csv,
+    write_geopackage,
+    write_parquet
+)
+
+
+DEFAULT_WORKERS = 4
+OUTPUT_FORMATS = ('gpkg', 'parquet', 'csv')
+
+
+class FetchResult(NamedTuple):
+    code: str
+    status: str
+    rows: int = 0
+    columns: int = 0
+    download_time: float = 0.
+    filter_time: float = 0.
+    write_time: float = 0.
+    error: str = ''
+
+
+def parse_codes(codes: Iterable[str]) -> list[str]:
+    """Accepts codes separated by spaces or commas, without duplicates."""
+    parsed = []
+    for arg in codes:
+        for code in arg.split(','):
+            if (code := code.strip()) and code not in parsed:
+                parsed.append(code)
+    return parsed
+
+
+def get_output_path(out: Path, fmt: str, code: str) -> Path:
+    if fmt == 'gpkg':
+        return out
+    return out / f'{code}.{fmt}'
+
+
+def write_dataset(out: Path, fmt: str, code: str, df: pd.DataFrame):
+    path = get_output_path(out, fmt, code)
+    if fmt == 'gpkg':
+        write_geopackage(path, table=code, df=df)
+    elif fmt == 'parquet':
+        write_parquet(path, df)
+    else:
+        write_csv(path, df)
+
+
+def fetch(
+    database: Database,
+    codes: Sequence[str],
+    filters: dict[str, list[str]],
+    since: str | None,
+    until: str | None,
+    out: Path,
+    fmt: str,
+    workers: int = DEFAULT_WORKERS,
+    report: Callable[[str], None] = print
+) -> list[FetchResult]:
+    """Downloads the datasets, at most 'workers' at a time, and writes
+    each of them as soon as it is ready.
+
+    The files are written by the calling thread only, one at a time."""
+    token = CancelToken()
+    results: dict[str, FetchResult] = {}
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    futures = {
+        executor.submit(
+            fetch_dataset, database, code, filters, since, until, token
+        ): code
+        for code in codes
+    }
+    try:
+        for future in concurrent.futures.as_completed(futures):
+            code = futures[future]
+            try:
+                df, download_time, filter_time = future.result()
+                start = time.perf_counter()
+                write_dataset(out, fmt, code, df)
+                result = FetchResult(
+                    code=code,
+                    status='ok',
+                    rows=df.shape[0],
+                    columns=df.shape[1],
+                    download_time=download_time,
+                    filter_time=filter_time,
+                    write_time=time.perf_counter() - start
+                )
+            except JobCancelled:
+                result = FetchResult(code=code, status='cancelled')
+            except Exception as e:
+                result = FetchResult(code=code, status='error', error=str(e))
+            results[code] = result
+            report(format_result(result))
+    except KeyboardInterrupt:
+        token.cancel()
+        for code in codes:
+            results.setdefault(code, FetchResult(code, 'cancelled'))
+        raise
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return [results[code] for code in codes]
+
+
+def format_result(result: FetchResult) -> str:
+    if result.status != 'ok':
+        return f'{result.code:<24} {result.status:<9} {result.error}'
+    total = result.download_time + result.filter_time + result.write_time
+    return (
+        f'{result.code:<24} {result.status:<9} '
+        f'{result.rows:>9,} rows {result.columns:>5} columns  '
+        f'download {result.download_time:7.2f}s  '
+        f'filter {result.filter_time:6.2f}s  '
+        f'write {result.write_time:6.2f}s  '
+        f'total {total:7.2f}s'
+    )
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m eurostat_downloader',
+        description='Downloads Eurostat datasets without QGIS.'
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+    fetch_parser = commands.add_parser(
+        'fetch',
+        help='download datasets and write them to files'
+    )
+    fetch_parser.add_argument(
+        '--codes', nargs='+', required=True,
+        help='the dataset codes, separated by spaces or commas'
+    )
+    fetch_parser.add_argument(
+        '--filter', action='append', default=[], dest='filters',
+        metavar='DIMENSION=VALUE,...',
+        help='keep the rows with these values, can be repeated'
+    )
+    fetch_parser.add_argument(
+        '--since', help='the first time period, such as 2015 or 2015-01'
+    )
+    fetch_parser.add_argument(
+        '--until', help='the last time period, such as 2020 or 2020-12'
+    )
+    fetch_parser.add_argument(
+        '--out', type=Path, required=True,
+        help=(
+            'a .gpkg file, which gets one table per dataset, or a '
+            'directory which gets one file per dataset'
+        )
+    )
+    fetch_parser.add_argument(
+        '--format', choices=OUTPUT_FORMATS, dest='fmt',
+        help=(
+            'the format of the files, by default gpkg for a .gpkg output '
+            'and parquet otherwise'
+        )
+    )
+    fetch_parser.add_argument(
+        '--workers', type=int, default=DEFAULT_WORKERS,
+        help='the number of datasets downloaded at the same time'
+    )
+    fetch_parser.add_argument(
+        '--server-side-filtering', action='store_true',
+        help='let the server apply the filters, see the plugin settings'
+    )
+    fetch_parser.add_argument(
+        '--cache-dir', type=Path,
+        help=f'defaults to {GLOBAL_SETTINGS.cache_dir}'
+    )
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    try:
+        filters = parse_filters(args.filters)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    fmt = args.fmt or ('gpkg' if args.out.suffix == '.gpkg' else 'parquet')
+    if fmt == 'gpkg' and args.out.suffix != '.gpkg':
+        parser.error('the gpkg format needs an --out file ending in .gpkg')
+    if fmt != 'gpkg' and args.out.suffix == '.gpkg':
+        parser.error(f'the {fmt} format needs an --out directory')
+
+    if args.cache_dir is not None:
+        GLOBAL_SETTINGS.cache_dir = args.cache_dir
+    GLOBAL_SETTINGS.server_side_filtering = args.server_side_filtering
+    # A scheduled run should see the latest updates of the datasets.
+    GLOBAL_SETTINGS.toc_background_revalidation = False
+
+    database = create_database()
+    start = time.perf_counter()
+    try:
+        database.initialize_toc()
+    except Exception as e:
+        print(f'the table of contents could not be loaded: {e}',
+              file=sys.stderr)
+        return 1
+    print(
+        f'table of contents ready in {time.perf_counter() - start:.2f}s',
+        file=sys.stderr
+    )
+    try:
+        results = fetch(
+            database,
+            parse_codes(args.codes),
+            filters,
+            args.since,
+            args.until,
+            args.out,
+            fmt,
+            workers=args.workers
+        )
+    except KeyboardInterrupt:
+        print('cancelled', file=sys.stderr)
+        return 130
+    failed = [result for result in results if result.status != 'ok']
+    print(
+        f'{len(results) - len(failed)} of {len(results)} datasets written '
+        f'in {time.perf_counter() - start:.2f}s',
+        file=sys.stderr
+    )
+    return 1 if failed else 0
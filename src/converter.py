@@ -0,0 +1,203 @@
+"""Converts the datasets to QGIS layers and features.
+
+Used by the dialog and by the Processing algorithms, so it does not
+depend on the dialog."""
+
+from __future__ import annotations
+
+from typing import (
+    Any,
+    Iterator
+)
+from pathlib import Path
+import shutil
+import tempfile
+
+import pandas as pd
+from qgis.PyQt import QtCore
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsFeature,
+    QgsFeatureSink,
+    QgsFeedback,
+    QgsField,
+    QgsFields,
+    QgsProject,
+    QgsVectorFileWriter,
+    QgsVectorLayer,
+    QgsWkbTypes
+)
+
+from .enums import LayerStorage
+from .jobs import JobCancelled
+from .settings import GLOBAL_SETTINGS
+
+
+# Number of features added to a layer at once.
+FEATURE_CHUNK_SIZE = 10_000
+
+
+def get_layers_dir() -> Path:
+    """The directory of the files read by the table layers, see
+    'QgsConverter.from_dataframe_to_file'."""
+    return GLOBAL_SETTINGS.cache_dir / 'layers'
+
+
+def remove_unused_layer_files() -> int:
+    """Removes the files written for the table layers which no layer
+    of the open project reads, and returns how many were removed.
+
+    The files are kept when the plugin is unloaded, since the saved
+    projects may still use them."""
+    directory = get_layers_dir()
+    if not directory.exists():
+        return 0
+    used = set()
+    for layer in QgsProject.instance().mapLayers().values():  # type: ignore
+        source = Path(layer.source().split('|')[0])
+        used.update(source.parents)
+    removed = 0
+    for layer_dir in directory.iterdir():
+        if layer_dir.is_dir() and layer_dir not in used:
+            shutil.rmtree(layer_dir, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+class QgsConverter:
+    """Converts dataframes to table layers, or to the features of an
+    existing sink."""
+
+    @staticmethod
+    def dtype_mapper(series: pd.Series):
+        dtype = series.dtype
+        if pd.api.types.is_integer_dtype(dtype):
+            return QtCore.QVariant.Type.Int
+        elif pd.api.types.is_float_dtype(dtype):
+            return QtCore.QVariant.Type.Double
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            return QtCore.QVariant.Type.DateTime
+        elif pd.api.types.is_bool_dtype(dtype):
+            return QtCore.QVariant.Type.Bool
+        else:
+            return QtCore.QVariant.Type.String
+
+    @classmethod
+    def get_fields(cls, df: pd.DataFrame) -> QgsFields:
+        fields = QgsFields()
+        for head in df.columns:
+            fields.append(QgsField(head, cls.dtype_mapper(series=df[head])))
+        return fields
+
+    @staticmethod
+    def iter_attributes(
+        df: pd.DataFrame,
+        chunk_size: int = FEATURE_CHUNK_SIZE
+    ) -> Iterator[list[list[Any]]]:
+        """Yields the rows of the dataframe as attribute lists, one chunk
+        at a time. Missing values are converted to None (NULL) column-wise,
+        so only a single chunk is ever copied."""
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            columns = []
+            for _, series in chunk.items():
+                values = series.to_numpy(dtype=object, copy=True)
+                values[series.isna().to_numpy()] = None
+                columns.append(values.tolist())
+            yield [list(row) for row in zip(*columns)]
+
+    @classmethod
+    def write_features(
+        cls,
+        df: pd.DataFrame,
+        sink: QgsFeatureSink,
+        fields: QgsFields,
+        feedback: QgsFeedback | None = None
+    ):
+        """Adds the rows of the dataframe to the sink in chunks.
+
+        Raises JobCancelled if 'feedback' is cancelled, leaving the sink
+        partially written."""
+        written = 0
+        for rows in cls.iter_attributes(df):
+            if feedback is not None and feedback.isCanceled():
+                raise JobCancelled
+            features = []
+            for attributes in rows:
+                feature = QgsFeature(fields)
+                feature.setAttributes(attributes)
+                features.append(feature)
+            if not sink.addFeatures(features, QgsFeatureSink.FastInsert):
+                raise RuntimeError('Could not add the features to the layer.')
+            written += len(features)
+            if feedback is not None:
+                feedback.setProgress(100 * written / len(df))
+
+    @classmethod
+    def from_dataframe(
+        cls,
+        df: pd.DataFrame,
+        name: str,
+        feedback: QgsFeedback | None = None,
+        storage: LayerStorage = LayerStorage.MEMORY
+    ) -> QgsVectorLayer:
+        """Method to convert a pandas dataframe to a qgis table layer."""
+        if storage is not LayerStorage.MEMORY:
+            return cls.from_dataframe_to_file(df, name, feedback, storage)
+        fields = cls.get_fields(df)
+        temp = QgsVectorLayer('none', name, 'memory')
+        temp_data = temp.dataProvider()
+        temp_data.addAttributes(fields.toList())  # type: ignore
+        temp.updateFields()
+        cls.write_features(df, temp_data, temp.fields(), feedback)
+        return temp
+
+    @classmethod
+    def from_dataframe_to_file(
+        cls,
+        df: pd.DataFrame,
+        name: str,
+        feedback: QgsFeedback | None = None,
+        storage: LayerStorage = LayerStorage.GEOPACKAGE
+    ) -> QgsVectorLayer:
+        """Writes the dataframe to a GeoPackage or a CSV file and returns
+        the layer which reads from it.
+
+        The features are streamed to the file, so the table is never
+        held in memory twice."""
+        directory = get_layers_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        extension = 'gpkg' if storage is LayerStorage.GEOPACKAGE else 'csv'
+        layer_dir = Path(tempfile.mkdtemp(dir=directory))
+        path = layer_dir / f'{name}.{extension}'
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = storage.value
+        options.layerName = name
+        if storage is LayerStorage.CSV:
+            # Stores the field types next to the file.
+            options.layerOptions = ['CREATE_CSVT=YES']
+        fields = cls.get_fields(df)
+        writer = QgsVectorFileWriter.create(
+            path.as_posix(),
+            fields,
+            QgsWkbTypes.NoGeometry,
+            QgsCoordinateReferenceSystem(),
+            QgsProject.instance().transformContext(),  # type: ignore
+            options
+        )
+        if writer.hasError() != QgsVectorFileWriter.NoError:
+            shutil.rmtree(layer_dir, ignore_errors=True)
+            raise RuntimeError(writer.errorMessage())
+        written = False
+        try:
+            cls.write_features(df, writer, fields, feedback)
+            written = True
+        finally:
+            # Deleting the writer flushes the features to the file.
+            del writer
+            if not written:
+                shutil.rmtree(layer_dir, ignore_errors=True)
+        uri = path.as_posix()
+        if storage is LayerStorage.GEOPACKAGE:
+            uri = f'{uri}|layername={name}'
+        return QgsVectorLayer(uri, name, 'ogr')
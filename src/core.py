@@ -0,0 +1,91 @@
+"""The data path of the plugin, which does not depend on QGIS or Qt.
+
+The table of contents, the download, caching, filtering and reshaping
+of the datasets can be imported from here, to be used from worker
+processes, scheduled jobs and benchmarks. The dialog is one client of
+this module.
+"""
+
+from __future__ import annotations
+
+from .settings import (
+    GLOBAL_SETTINGS,
+    GlobalSettings,
+    ProxySettings
+)
+from .enums import (
+    Agency,
+    JobPriority,
+    Language,
+    TableOfContentsColumn
+)
+from .jobs import (
+    WORKER_POOL,
+    CancelToken,
+    JobCancelled,
+    WorkerPool
+)
+from .cache import (
+    TocCache,
+    DatasetCache,
+    CodeListCache
+)
+from .store import TidyStore
+from .data import (
+    Database,
+    Dataset,
+    DataQuery,
+    compact_frame
+)
+from .filtering import (
+    DataFilterer,
+    fetch_dataset,
+    parse_filters
+)
+
+
+__all__ = [
+    'GLOBAL_SETTINGS',
+    'GlobalSettings',
+    'ProxySettings',
+    'Agency',
+    'JobPriority',
+    'Language',
+    'TableOfContentsColumn',
+    'WORKER_POOL',
+    'CancelToken',
+    'JobCancelled',
+    'WorkerPool',
+    'TocCache',
+    'DatasetCache',
+    'CodeListCache',
+    'TidyStore',
+    'Database',
+    'Dataset',
+    'DataQuery',
+    'compact_frame',
+    'DataFilterer',
+    'fetch_dataset',
+    'parse_filters',
+    'create_database',
+]
+
+
+def create_database(settings: GlobalSettings = GLOBAL_SETTINGS) -> Database:
+    """Creates a database which uses the caches configured in 'settings'."""
+    return Database(
+        toc_cache=TocCache(
+            directory=settings.cache_dir,
+            ttl=settings.toc_ttl
+        ),
+        dataset_cache=DatasetCache(
+            directory=settings.cache_dir,
+            max_entries=settings.dataset_cache_max_entries,
+            max_bytes=settings.dataset_cache_max_bytes
+        ),
+        code_list_cache=CodeListCache(
+            directory=settings.cache_dir,
+            ttl=settings.codelist_ttl,
+            max_entries=settings.codelist_max_entries
+        )
+    )
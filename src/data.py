@@ -1,24 +1,181 @@
 from __future__ import annotations
 
+from typing import (
+    Callable,
+    Iterable,
+    NamedTuple
+)
 from dataclasses import (
     dataclass,
     field
 )
 from itertools import product
+from functools import partial
 import concurrent.futures
+import re
+import sys
+import threading
 
+import numpy as np
 import pandas as pd
 
 from . import eurostat
 from .settings import GLOBAL_SETTINGS
+from .cache import (
+    TocCache,
+    DatasetCache,
+    CodeListCache,
+    CodeList
+)
+from .store import TidyStore
+from .jobs import (
+    WORKER_POOL,
+    CancelToken,
+    JobCancelled
+)
+from .stream import (
+    DatasetTooLargeError,
+    NotStreamableError,
+    download_dataset,
+    get_data_url,
+    stream_dataset
+)
+from .search import (
+    TocIndex,
+    get_signature
+)
 from .enums import (
     Language,
     Agency,
     ConnectionStatus,
+    JobPriority,
     TableOfContentsColumn
 )
 
 
+# The formats of the time periods, such as '2020', '2020-S1', '2020-Q1',
+# '2020-01' and '2020-01-01'.
+PERIOD_PATTERNS = {
+    'year': re.compile(r'^\d{4}$'),
+    'semester': re.compile(r'^\d{4}-S[1-2]$'),
+    'quarter': re.compile(r'^\d{4}-Q[1-4]$'),
+    'month': re.compile(r'^\d{4}-\d{2}$'),
+    'day': re.compile(r'^\d{4}-\d{2}-\d{2}$'),
+}
+
+
+def get_periods(start: str, end: str) -> list[str] | None:
+    """Returns the time periods from 'start' to 'end', formatted like
+    the columns of the datasets, or None if the format is unknown."""
+    for name, pattern in PERIOD_PATTERNS.items():
+        if pattern.match(start) and pattern.match(end):
+            break
+    else:
+        return None
+    if name == 'year':
+        return [str(year) for year in range(int(start), int(end) + 1)]
+    if name in ('semester', 'quarter'):
+        per_year = 2 if name == 'semester' else 4
+        letter = start[5]
+        first = int(start[:4]) * per_year + int(start[6]) - 1
+        last = int(end[:4]) * per_year + int(end[6]) - 1
+        return [
+            f'{period // per_year}-{letter}{period % per_year + 1}'
+            for period in range(first, last + 1)
+        ]
+    if name == 'month':
+        periods = pd.period_range(start, end, freq='M')
+        return periods.strftime('%Y-%m').tolist()
+    return pd.date_range(start, end, freq='D').strftime('%Y-%m-%d').tolist()
+
+
+@dataclass(frozen=True)
+class DataQuery:
+    """Selects a slice of a dataset, which is filtered by the server.
+
+    'filters' holds the selected values of each dimension, the other
+    dimensions are not filtered."""
+    filters: tuple[tuple[str, tuple[str, ...]], ...] = ()
+    start_period: str | None = None
+    end_period: str | None = None
+
+    def get_key(self, params: list[str]) -> str:
+        """The SDMX key, such as 'A.NR+PC..RO', of the dimensions."""
+        filters = dict(self.filters)
+        return '.'.join('+'.join(filters.get(param, ())) for param in params)
+
+    def get_filter_pars(self) -> dict[str, list[str] | str]:
+        """The filters in the format used by 'eurostat.get_data_df'."""
+        filter_pars: dict[str, list[str] | str] = {
+            param: list(values) for param, values in self.filters
+        }
+        if self.start_period is not None:
+            filter_pars['startPeriod'] = self.start_period
+        if self.end_period is not None:
+            filter_pars['endPeriod'] = self.end_period
+        return filter_pars
+
+
+class MemoryUsage(NamedTuple):
+    """The size of a dataset in bytes, before and after it was compacted
+    with 'compact_frame'."""
+    before: int
+    after: int
+
+
+def compact_frame(df: pd.DataFrame, dims: Iterable[str]) -> pd.DataFrame:
+    """Converts the dimension columns 'dims' to categoricals, and the
+    other columns (the time periods) to float32 when no value loses
+    precision.
+
+    A time period without observations may be read as an object column,
+    which is converted to floats too, so it stays a value column."""
+    dims = set(dims)
+    columns = {}
+    for col, series in df.items():
+        if col in dims:
+            columns[col] = series.astype('category')
+            continue
+        if not pd.api.types.is_float_dtype(series.dtype):
+            series = pd.to_numeric(series, errors='coerce').astype(
+                np.float64
+            )
+        if series.dtype == np.float64:
+            values = series.to_numpy()
+            compact = values.astype(np.float32)
+            if np.array_equal(compact, values, equal_nan=True):
+                series = pd.Series(compact, index=series.index, name=col)
+        columns[col] = series
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def get_uncompacted_size(df: pd.DataFrame) -> int:
+    """Returns the size the frame would have with object dimensions and
+    float64 values, without converting it."""
+    size = int(df.index.memory_usage(deep=True))
+    for _, series in df.items():
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            present = codes[codes >= 0]
+            counts = np.bincount(present, minlength=len(series.cat.categories))
+            sizes = np.fromiter(
+                (sys.getsizeof(value) for value in series.cat.categories),
+                dtype=np.int64,
+                count=len(series.cat.categories)
+            )
+            missing = len(codes) - len(present)
+            size += (
+                8 * len(codes)
+                + int(sizes @ counts)
+                + missing * sys.getsizeof(np.nan)
+            )
+        elif series.dtype == np.float32:
+            size += 8 * len(series)
+        else:
+            size += int(series.memory_usage(index=False, deep=True))
+    return size
+
+
 TableOfContents = dict[Agency, dict[Language, pd.DataFrame]]
 AgencyStatus = dict[Agency, ConnectionStatus]
 
@@ -26,47 +183,176 @@ AgencyStatus = dict[Agency, ConnectionStatus]
 @dataclass
 class Database:
     lang: Language = field(default=Language.ENGLISH)
+    toc_cache: TocCache | None = field(default=None)
+    dataset_cache: DatasetCache | None = field(default=None)
+    code_list_cache: CodeListCache | None = field(default=None)
     _toc: TableOfContents = field(init=False, default_factory=dict)
     _agency_status: AgencyStatus = field(init=False, default_factory=dict)
+    _stale: list[tuple[Language, Agency]] = field(
+        init=False, default_factory=list
+    )
+    # The concatenated table of contents of each language.
+    _toc_frames: dict[Language, pd.DataFrame] = field(
+        init=False, default_factory=dict
+    )
+    _toc_indexes: dict[Language, TocIndex] = field(
+        init=False, default_factory=dict
+    )
+    # The dimensions of the datasets, for the current session.
+    _pars: dict[str, list[str]] = field(init=False, default_factory=dict)
+    _lock: threading.Lock = field(
+        init=False, default_factory=threading.Lock, repr=False
+    )
 
     def set_language(self, lang: Language):
         self.lang = lang
 
-    def initialize_toc(self):
-        """Used to initialize the table of contents."""
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            results = executor.map(
-                self._set_toc, product(Language, GLOBAL_SETTINGS.agencies)
-            )
-        for result in results:
-            if result is not None:
-                result.exception()
+    def initialize_toc(self, token: CancelToken | None = None):
+        """Used to initialize the table of contents.
+
+        Entries are read from the cache when possible. Stale entries
+        are also used, and are either refreshed right away or left for
+        'revalidate_toc', depending on the global settings.
+
+        If 'token' is cancelled, the entries which were downloaded are
+        kept and JobCancelled is raised.
+        """
+        self._stale.clear()
+        missing = [
+            params for params in product(Language, GLOBAL_SETTINGS.agencies)
+            if not self._load_cached_toc(params)
+        ]
+        if not GLOBAL_SETTINGS.toc_background_revalidation:
+            missing.extend(self._stale)
+            self._stale.clear()
+        self._fetch_toc(missing, token)
+        self._build_indexes()
+
+    def revalidate_toc(self) -> bool:
+        """Downloads the stale entries of the table of contents.
+
+        Returns True if any entry was updated."""
+        stale, self._stale = self._stale, []
+        updated = self._fetch_toc(stale, priority=JobPriority.BACKGROUND)
+        if updated:
+            self._build_indexes()
+        return updated
+
+    @property
+    def has_stale_toc(self) -> bool:
+        return bool(self._stale)
+
+    def _fetch_toc(
+        self,
+        params: list[tuple[Language, Agency]],
+        token: CancelToken | None = None,
+        priority: JobPriority = JobPriority.FOREGROUND
+    ) -> bool:
+        if not params:
+            return False
+        results = WORKER_POOL.map(
+            partial(self._set_toc, token=token), params, priority=priority
+        )
+        return any(results)
+
+    def _load_cached_toc(self, params: tuple[Language, Agency]) -> bool:
+        """Returns True if the entry was found in the cache."""
+        if self.toc_cache is None:
+            return False
+        lang, agency = params
+        entry = self.toc_cache.get(agency=agency, lang=lang)
+        if entry is None:
+            return False
+        self._update_toc(agency, lang, entry.data)
+        if not self.toc_cache.is_fresh(entry):
+            self._stale.append(params)
+        return True
 
     def _set_toc(
         self,
-        params: tuple[Language, Agency]
-    ):
+        params: tuple[Language, Agency],
+        token: CancelToken | None = None
+    ) -> bool:
+        if token is not None:
+            token.raise_if_cancelled()
         lang, agency = params
         self._toc.setdefault(agency, {})
         # If status was for this agency was already unavailable, return
         status = self._agency_status.get(agency, None)
         if status is not None:
             if status == ConnectionStatus.UNAVAILABLE:
-                return None
+                return False
         try:
-            self._toc[agency][lang] = (
-                eurostat.get_toc_df(agency=agency.value, lang=lang.value)
-            )
+            toc = eurostat.get_toc_df(agency=agency.value, lang=lang.value)
+            self._update_toc(agency, lang, toc)
             self._agency_status[agency] = ConnectionStatus.AVAILABLE
         except ConnectionError:
             self._agency_status[agency] = ConnectionStatus.UNAVAILABLE
+            return False
+        if self.toc_cache is not None:
+            self.toc_cache.set(agency=agency, lang=lang, data=toc)
+        return True
+
+    def _update_toc(self, agency: Agency, lang: Language, toc: pd.DataFrame):
+        with self._lock:
+            self._toc.setdefault(agency, {})[lang] = toc
+            self._toc_frames.pop(lang, None)
+            self._toc_indexes.pop(lang, None)
 
     def _get_toc(self, lang: Language) -> pd.DataFrame:
-        toc = pd.DataFrame()
-        for data in self._toc.values():
-            if (df := data.get(lang, None)) is not None:
-                toc = pd.concat([toc, df], ignore_index=True)
-        return toc
+        """Returns the table of contents of all agencies, indexed by code.
+
+        The frame is only built again after an entry of this language
+        was changed."""
+        with self._lock:
+            if (toc := self._toc_frames.get(lang, None)) is not None:
+                return toc
+            frames = [
+                df for data in self._toc.values()
+                if (df := data.get(lang, None)) is not None
+            ]
+            if not frames:
+                return pd.DataFrame()
+            toc = pd.concat(frames, ignore_index=True)
+            toc.index = pd.Index(toc[TableOfContentsColumn.CODE.value])
+            toc.index.name = None
+            self._toc_frames[lang] = toc
+            return toc
+
+    def _build_indexes(self):
+        for lang in Language:
+            if not self._get_toc(lang).empty:
+                self.get_index(lang)
+
+    def get_index(self, lang: Language | None = None) -> TocIndex:
+        """Returns the search index of the table of contents."""
+        if lang is None:
+            lang = self.lang
+        toc = self._get_toc(lang)
+        with self._lock:
+            if (index := self._toc_indexes.get(lang, None)) is not None:
+                return index
+        index = self._load_index(lang, toc)
+        with self._lock:
+            # The table of contents could have changed in the meantime.
+            if self._toc_frames.get(lang, None) is toc:
+                self._toc_indexes[lang] = index
+        return index
+
+    def _load_index(self, lang: Language, toc: pd.DataFrame) -> TocIndex:
+        codes = toc[TableOfContentsColumn.CODE.value]
+        titles = toc[TableOfContentsColumn.TITLE.value]
+        if self.toc_cache is not None:
+            index = self.toc_cache.get_index(lang)
+            if (
+                index is not None
+                and index.signature == get_signature(codes, titles)
+            ):
+                return index
+        index = TocIndex.build(codes, titles)
+        if self.toc_cache is not None:
+            self.toc_cache.set_index(lang, index)
+        return index
 
     @property
     def toc(self) -> pd.DataFrame:
@@ -80,20 +366,116 @@ class Database:
     def toc_size(self):
         return self.toc.shape[0]
 
+    def _get_toc_value(self, code: str, column: TableOfContentsColumn):
+        value = self.toc.loc[code, column.value]
+        if isinstance(value, pd.Series):
+            # The same code can be found in more than one agency.
+            value = value.iloc[0]
+        return value
+
+    def get_title(self, code: str) -> str:
+        return self._get_toc_value(code, TableOfContentsColumn.TITLE)
+
+    def get_last_update(self, code: str) -> str | None:
+        """Returns when the data of the dataset was last updated, if the
+        table of contents knows about it."""
+        toc = self.toc
+        if (
+            code not in toc.index
+            or TableOfContentsColumn.LAST_UPDATE.value not in toc.columns
+        ):
+            return None
+        value = self._get_toc_value(code, TableOfContentsColumn.LAST_UPDATE)
+        return None if pd.isna(value) else str(value)
+
     def get_subset(self, keyword: str):
-        """Creates a subset of the toc."""
-        if not keyword.strip():
-            return self.toc
-        # Concat the code and the title.
-        concatenated: pd.Series[str] = (
-            self.toc[TableOfContentsColumn.CODE.value]
-            + ' '
-            + self.toc[TableOfContentsColumn.TITLE.value]
+        """Creates a subset of the toc, ranked by relevance.
+
+        Every word of the keyword has to be the start of a word
+        from the code or from the title of a dataset."""
+        toc = self.toc
+        if toc.empty or not keyword.strip():
+            return toc
+        return toc.iloc[self.search(keyword)]
+
+    def search(
+        self,
+        keyword: str,
+        within: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Returns the ranked positions of the toc rows that match.
+
+        If 'within' is given, only those positions are searched. This
+        is used to narrow down the result of a previous search."""
+        return self.get_index().search(keyword, within=within)
+
+    def get_time_range(self, code: str) -> tuple[str, str] | None:
+        """Returns the first and the last time period of the dataset."""
+        toc = self.toc
+        columns = (
+            TableOfContentsColumn.DATA_START,
+            TableOfContentsColumn.DATA_END
+        )
+        if code not in toc.index or any(
+            column.value not in toc.columns for column in columns
+        ):
+            return None
+        start, end = (
+            self._get_toc_value(code, column) for column in columns
+        )
+        if pd.isna(start) or pd.isna(end):
+            return None
+        return str(start), str(end)
+
+    def get_pars(self, code: str) -> list[str]:
+        """Returns the dimensions of a dataset, which are only
+        downloaded once per session."""
+        with self._lock:
+            pars = self._pars.get(code, None)
+        if pars is None:
+            pars = list(eurostat.get_pars(code))
+            with self._lock:
+                self._pars[code] = pars
+        return list(pars)
+
+    def get_agency(self, code: str) -> Agency | None:
+        """Returns the agency whose table of contents lists the dataset."""
+        with self._lock:
+            tocs = [
+                (agency, data.get(self.lang, None))
+                for agency, data in self._toc.items()
+            ]
+        for agency, toc in tocs:
+            if (
+                toc is not None
+                and (toc[TableOfContentsColumn.CODE.value] == code).any()
+            ):
+                return agency
+        return None
+
+    def get_code_list(
+        self,
+        code: str,
+        param: str,
+        lang: Language
+    ) -> CodeList:
+        """Returns the labels of all the values of a dimension.
+
+        The code lists are cached for the agency of the dataset, and the
+        dataset code is only used to find the code list when it is not
+        cached yet."""
+        cache = self.code_list_cache
+        agency = self.get_agency(code) if cache is not None else None
+        if cache is not None and agency is not None:
+            code_list = cache.get(agency, param, lang)
+            if code_list is not None:
+                return code_list
+        code_list = eurostat.get_dic(
+            code=code, par=param, full=True, lang=lang.value
         )
-        # Check if keyword is in series.
-        mask = concatenated.str.contains(pat=keyword, case=False, regex=False)
-        # Concat the dataframes and drop duplicates.
-        return self.toc[mask]
+        if cache is not None and agency is not None:
+            cache.set(agency, param, lang, code_list)
+        return code_list
 
     def get_titles(self, subset: pd.DataFrame | None = None) -> pd.Series[str]:
         if subset is None:
@@ -109,7 +491,7 @@ class Database:
         return subset[TableOfContentsColumn.CODE.value]
 
 
-ParamsInfo = dict[Language, dict[str, list[tuple[str, str]]]]
+ParamsInfo = dict[Language, dict[str, CodeList]]
 
 
 @dataclass
@@ -119,38 +501,330 @@ class Dataset:
     code: str
     lang: Language | None = field(default=None)
     _param_info: ParamsInfo = field(init=False, default_factory=dict)
-    _df: pd.DataFrame = field(init=False)
+    _store: TidyStore = field(init=False)
     _params: list[str] = field(init=False, default_factory=list)
+    # All the time periods, when only a preview of them was downloaded.
+    _periods: list[str] | None = field(init=False, default=None)
+    # The labels are loaded in the background, after the data.
+    _label_futures: dict[tuple[str, Language], concurrent.futures.Future] = (
+        field(init=False, default_factory=dict, repr=False)
+    )
+    _label_lock: threading.Lock = field(
+        init=False, default_factory=threading.Lock, repr=False
+    )
 
     def set_language(self, lang: Language | None):
         self.lang = lang
 
     def _set_pars(self):
-        self._params.extend(eurostat.get_pars(self.code))
+        self._params.extend(self.db.get_pars(self.code))
 
     def _set_param_info(self, data: tuple[str, Language]):
         param, lang = data[0], data[1]
-        dic = eurostat.get_dic(
-            code=self.code, par=param, full=False, lang=lang.value
+        code_list = self.db.get_code_list(self.code, param, lang)
+        self._param_info.setdefault(lang, {})[param] = code_list
+
+    def download(
+        self,
+        query: DataQuery | None = None,
+        on_chunk: Callable[[pd.DataFrame], None] | None = None,
+        token: CancelToken | None = None
+    ) -> pd.DataFrame:
+        """Downloads the dataset, or only the slice selected by 'query'.
+
+        The rows are passed to 'on_chunk' while they are received when
+        the dataset can be streamed. A streamed download stops as soon
+        as 'token' is cancelled, the other one only after it is done."""
+        if query is None:
+            query = DataQuery()
+        url = self._get_data_url(query)
+        if url is not None:
+            try:
+                return download_dataset(url, on_chunk=on_chunk, token=token)
+            except NotStreamableError:
+                # Large datasets are prepared asynchronously by the
+                # server, which the 'eurostat' package handles.
+                pass
+        return self._get_data_df(query, token)
+
+    def _get_data_url(self, query: DataQuery) -> str | None:
+        agency = self.db.get_agency(self.code)
+        if agency is None:
+            return None
+        return get_data_url(
+            agency,
+            self.code,
+            key=query.get_key(self.params) if query.filters else '',
+            start_period=query.start_period,
+            end_period=query.end_period
         )
-        self._param_info.setdefault(lang, {})[param] = dic
 
-    def _set_df(self):
-        data_df = eurostat.get_data_df(code=self.code)
+    def _get_data_df(
+        self,
+        query: DataQuery,
+        token: CancelToken | None
+    ) -> pd.DataFrame:
+        if token is not None:
+            token.raise_if_cancelled()
+        data_df = eurostat.get_data_df(
+            code=self.code, filter_pars=query.get_filter_pars()
+        )
+        if token is not None:
+            token.raise_if_cancelled()
         assert data_df is not None
         self.remove_time_period_str(data_df)
-        self._df = data_df
+        return data_df
 
-    def initialize_df(self):
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            executor.submit(self._set_df)
-            params = executor.submit(self._set_pars)
-            concurrent.futures.wait([params])
-            executor.map(self._set_param_info, product(self._params, Language))
+    def download_store(
+        self,
+        query: DataQuery | None = None,
+        on_chunk: Callable[[pd.DataFrame], None] | None = None,
+        token: CancelToken | None = None,
+        get_params: Callable[[], list[str]] | None = None
+    ) -> TidyStore:
+        """Downloads the dataset like 'download', but only keeps the long
+        form of each chunk, so the whole dataset is never held in memory
+        as a wide frame. Each chunk is dropped once it was passed to
+        'on_chunk'.
+
+        'get_params' returns the dimensions of the dataset, and defaults
+        to 'params'."""
+        if query is None:
+            query = DataQuery()
+        if get_params is None:
+            get_params = self._get_params
+        url = self._get_data_url(query)
+        if url is not None:
+            stores = []
+            try:
+                for chunk in stream_dataset(url, token=token):
+                    if on_chunk is not None:
+                        on_chunk(chunk)
+                    stores.append(self._to_store(chunk, get_params()))
+            except NotStreamableError:
+                pass
+            if stores:
+                return TidyStore.concat(stores)
+        df = self._get_data_df(query, token)
+        return self._to_store(df, get_params())
+
+    def _get_params(self) -> list[str]:
+        return self.params
+
+    @staticmethod
+    def _to_store(df: pd.DataFrame, params: list[str]) -> TidyStore:
+        if GLOBAL_SETTINGS.compact_datasets:
+            df = compact_frame(df, params)
+        return TidyStore.from_wide(df, n_dims=len(params))
+
+    def _download_store(
+        self,
+        on_chunk: Callable[[pd.DataFrame], None] | None,
+        preview: DataQuery | None,
+        token: CancelToken | None,
+        get_params: Callable[[], list[str]]
+    ) -> TidyStore:
+        if preview is not None:
+            store = self.download_store(preview, on_chunk, token, get_params)
+            if len(store) > 0:
+                return store
+            # Nothing to preview, download everything instead.
+            self._periods = None
+        return self.download_store(None, on_chunk, token, get_params)
+
+    def _get_preview_query(self) -> DataQuery | None:
+        """With server side filtering, only the last time period is
+        downloaded when the dataset is opened."""
+        if not GLOBAL_SETTINGS.server_side_filtering:
+            return None
+        time_range = self.db.get_time_range(self.code)
+        if time_range is None:
+            return None
+        periods = get_periods(*time_range)
+        if not periods:
+            return None
+        self._periods = periods
+        return DataQuery(start_period=periods[-1], end_period=periods[-1])
+
+    def _load_cached_df(self, last_update: str | None) -> bool:
+        """Returns True if an up to date copy was found in the cache."""
+        cache = self.db.dataset_cache
+        if cache is None:
+            return False
+        entry = cache.get(self.code, last_update)
+        if entry is None:
+            return False
+        self._store = entry.data
+        self._params.extend(entry.params)
+        return True
+
+    def prefetch(self, token: CancelToken | None = None):
+        """Loads what opening the dataset needs, before it is opened.
+
+        The dimensions and the labels of their values in the selected
+        language are cached for the session. With the 'prefetch_datasets'
+        setting, the data is downloaded to the dataset cache too, unless
+        it is larger than 'prefetch_max_bytes'. If 'token' is cancelled,
+        JobCancelled is raised and the data is not cached."""
+        if token is None:
+            token = CancelToken()
+        params = self.db.get_pars(self.code)
+        for param in params:
+            token.raise_if_cancelled()
+            self.db.get_code_list(
+                self.code, param, self.lang or self.db.lang
+            )
+        cache = self.db.dataset_cache
+        agency = self.db.get_agency(self.code)
+        last_update = self.db.get_last_update(self.code)
+        if (
+            not GLOBAL_SETTINGS.prefetch_datasets
+            or cache is None
+            or agency is None
+            or last_update is None
+            # Possibly outdated, but reading it only to check is slow.
+            or cache.contains(self.code)
+        ):
+            return None
+        try:
+            df = download_dataset(
+                get_data_url(agency, self.code),
+                token=token,
+                max_bytes=GLOBAL_SETTINGS.prefetch_max_bytes,
+                bytes_per_second=GLOBAL_SETTINGS.prefetch_bytes_per_second
+            )
+        except (NotStreamableError, DatasetTooLargeError):
+            # Left for when the dataset is opened.
+            return None
+        token.raise_if_cancelled()
+        cache.set(
+            code=self.code,
+            data=self._to_store(df, params),
+            params=params,
+            last_update=last_update
+        )
+
+    def _cache_store(self, store: TidyStore, last_update: str | None):
+        cache = self.db.dataset_cache
+        if cache is None or not self._params:
+            return
+        cache.set(
+            code=self.code,
+            data=store,
+            params=self._params,
+            last_update=last_update
+        )
+
+    def initialize_df(
+        self,
+        on_chunk: Callable[[pd.DataFrame], None] | None = None,
+        token: CancelToken | None = None,
+        labels: bool = True
+    ):
+        """Loads the data and the parameters of the dataset.
+
+        If given, 'on_chunk' receives the rows while they are downloaded.
+        The labels of the parameters are not waited for. The ones of the
+        selected language are queued first, followed by the others.
+        Set 'labels' to False when they will not be shown.
+
+        If 'token' is cancelled, the download is aborted, nothing is
+        written to the cache and JobCancelled is raised."""
+        last_update = self.db.get_last_update(self.code)
+        cached = self._load_cached_df(last_update)
+        if not cached:
+            try:
+                self._initialize_df(on_chunk, last_update, token)
+            except JobCancelled:
+                self._params.clear()
+                self._periods = None
+                raise
+        if labels:
+            self._prefetch_labels()
+
+    def _initialize_df(
+        self,
+        on_chunk: Callable[[pd.DataFrame], None] | None,
+        last_update: str | None,
+        token: CancelToken | None
+    ):
+        preview = self._get_preview_query()
+        pars = WORKER_POOL.submit(self._set_pars)
+
+        def get_params() -> list[str]:
+            # The chunks received before the dimensions wait for them.
+            WORKER_POOL.result(pars)
+            return self.params
+
+        download = WORKER_POOL.submit(
+            self._download_store, on_chunk, preview, token, get_params
+        )
+        store = WORKER_POOL.result(download)
+        WORKER_POOL.result(pars)
+        if token is not None:
+            token.raise_if_cancelled()
+        if not self.is_partial:
+            self._cache_store(store, last_update)
+        self._store = store
+
+    def _prefetch_labels(self):
+        languages = sorted(Language, key=lambda lang: lang is not self.lang)
+        with self._label_lock:
+            for lang, param in product(languages, self._params):
+                if (param, lang) not in self._label_futures:
+                    self._label_futures[(param, lang)] = WORKER_POOL.submit(
+                        self._set_param_info,
+                        (param, lang),
+                        priority=JobPriority.BACKGROUND
+                    )
+
+    def _wait_param_info(self, param: str, lang: Language):
+        """Waits for the labels of a single parameter.
+
+        If their download has not started yet, it is done right away in
+        the calling thread instead of waiting for its turn in the queue.
+        """
+        with self._label_lock:
+            future = self._label_futures.get((param, lang), None)
+            if future is None or future.cancelled():
+                future = WORKER_POOL.submit(
+                    self._set_param_info, (param, lang)
+                )
+                self._label_futures[(param, lang)] = future
+        WORKER_POOL.result(future)
+
+    def close(self):
+        """Cancels the labels which were not downloaded yet."""
+        with self._label_lock:
+            for future in self._label_futures.values():
+                future.cancel()
+
+    @property
+    def store(self) -> TidyStore:
+        return self._store
+
+    @property
+    def keys(self) -> pd.DataFrame:
+        """The dimensions of each series (row) of the dataset."""
+        return self._store.keys
 
     @property
     def df(self) -> pd.DataFrame:
-        return self._df
+        """The whole dataset in wide format. It is built on each access,
+        'store.to_wide' should be used to build only a part of it."""
+        return self._store.to_wide()
+
+    def memory_usage(self) -> MemoryUsage:
+        """Returns the size of the data in memory, and the size of the
+        same data as a wide frame without 'compact_frame'."""
+        store = self._store
+        return MemoryUsage(
+            before=(
+                get_uncompacted_size(store.keys)
+                + 8 * len(store) * len(store.periods)
+            ),
+            after=store.memory_usage()
+        )
 
     @staticmethod
     def remove_time_period_str(df: pd.DataFrame):
@@ -160,16 +834,13 @@ class Dataset:
 
     @property
     def title(self) -> str:
-        return self.db.toc.loc[
-            self.db.toc[TableOfContentsColumn.CODE.value]
-            == self.code, TableOfContentsColumn.TITLE.value
-        ].iloc[0]
+        return self.db.get_title(self.code)
 
     @property
     def frequency(self) -> str:
         """Assumes that the first column contains the frequency,
         and that all the values inside the column are all unique."""
-        return self.df.iloc[0].values[0]
+        return self.keys.iloc[0, 0]
 
     @property
     def data_start(self):
@@ -180,8 +851,22 @@ class Dataset:
         return self.date_columns[-1]
 
     @property
-    def date_columns(self):
-        return self.df.columns[len(self.params):]
+    def date_columns(self) -> pd.Index:
+        if self._periods is not None:
+            return pd.Index(self._periods)
+        return self._store.periods
+
+    @property
+    def columns(self) -> list[str]:
+        """The parameters followed by all the time periods, including
+        the ones which were not downloaded for a preview."""
+        return self.params + self.date_columns.to_list()
+
+    @property
+    def is_partial(self) -> bool:
+        """True if only a preview of the data was downloaded. The data
+        has to be downloaded with 'download' in this case."""
+        return self._periods is not None
 
     @property
     def params(self) -> list[str]:
@@ -189,4 +874,28 @@ class Dataset:
 
     @property
     def params_info(self) -> ParamsInfo:
+        """The full code lists of the parameters, which can contain
+        values that are not found in this dataset.
+
+        The code lists are loaded in the background, so this only
+        contains the ones which were downloaded so far."""
         return self._param_info
+
+    def get_param_labels(self, param: str, lang: Language) -> CodeList:
+        """Returns the labels of the parameter values found in the
+        dataset, in the order of the code list.
+
+        The values missing from the code list, such as the ones added
+        after it was cached, are labelled with the value itself."""
+        self._wait_param_info(param, lang)
+        values = self.keys[param].dropna().unique().tolist()
+        found = set(values)
+        labels = [
+            (value, label) for value, label in self._param_info[lang][param]
+            if value in found
+        ]
+        labelled = {value for value, _ in labels}
+        labels.extend(
+            (value, value) for value in values if value not in labelled
+        )
+        return labels
@@ -8,6 +8,9 @@ class TableOfContentsColumn(Enum):
     """Enumerates the table of contents column names."""
     TITLE = 'title'
     CODE = 'code'
+    LAST_UPDATE = 'last update of data'
+    DATA_START = 'data start'
+    DATA_END = 'data end'
 
 
 class Language(Enum):
@@ -45,3 +48,21 @@ class FrequencyType(Enum):
     QUARTERLY = 'q'
     MONTHLY = 'm'
     DAILY = 'd'
+
+
+class LayerStorage(Enum):
+    """Enumerates where the table layers created by the plugin are stored."""
+    MEMORY = 'memory'
+    GEOPACKAGE = 'GPKG'
+    CSV = 'CSV'
+
+
+class JobPriority(Enum):
+    """Enumerates the priorities of the background jobs, the most urgent
+    first."""
+    # The user waits for the result, such as a dataset being opened.
+    FOREGROUND = 0
+    # Refreshes and prefetching, which only run when nothing else waits.
+    BACKGROUND = 1
+    # Guesses of what the user opens next, see 'Dataset.prefetch'.
+    SPECULATIVE = 2
@@ -1,16 +1,20 @@
 from __future__ import annotations
 
-import time
 from typing import (
+    Callable,
     Iterable,
-    Any,
+    Hashable,
     Literal,
+    NamedTuple,
 )
 from dataclasses import (
     dataclass,
     field
 )
+import bisect
 import itertools
+from collections import OrderedDict
+from concurrent.futures import Future
 from functools import partial
 
 import pandas as pd
@@ -22,8 +26,8 @@ from qgis.PyQt import (
 )
 from qgis.core import (
     QgsVectorLayer,
-    QgsField,
-    QgsFeature,
+    QgsFeatureRequest,
+    QgsFeedback,
     QgsProject,
     QgsVectorLayerJoinInfo,
     QgsMapLayer,
@@ -35,9 +39,21 @@ from .ui import (
     UITimePeriodDialog,
     UiSettingsDialog
 )
-from .data import (
-    Database,
+from .core import (
+    WORKER_POOL,
     Dataset,
+    DataFilterer,
+    CancelToken,
+    JobCancelled,
+    create_database
+)
+from .converter import (
+    QgsConverter,
+    remove_unused_layer_files
+)
+from .tasks import (
+    SCHEDULER,
+    Job
 )
 from .utils import (
     CheckableComboBox,
@@ -52,10 +68,32 @@ from .enums import (
     ConnectionStatus,
     Agency,
     GeoSectionName,
-    FrequencyType
+    FrequencyType,
+    TableOfContentsColumn,
+    LayerStorage,
+    JobPriority
 )
 
 
+# Time to wait after the last keystroke before searching the toc.
+SEARCH_DELAY_MS = 150
+# The rows received while a dataset is streamed are added to the table
+# at most this often.
+ROWS_BATCH_MS = 100
+# At most this many rows are shown while a dataset is streamed, so that
+# the table does not keep the rows of a large dataset alive.
+PREVIEW_MAX_ROWS = 100_000
+# Time the mouse or the keyboard cursor has to stay on a dataset before
+# it is prefetched, if enabled in the settings.
+PREFETCH_DWELL_MS = 400
+# How often the label of a loading dialog changes.
+LOADING_LABEL_MS = 500
+# Used to infer the layer join field from a sample of the features.
+JOIN_FIELD_SAMPLE_SIZE = 1_000
+JOIN_FIELD_MIN_SAMPLE = 50
+JOIN_FIELD_MATCH_RATIO = 0.8
+
+
 class Dialog(QtWidgets.QDialog):
 
     def __init__(self):
@@ -67,13 +105,36 @@ class Dialog(QtWidgets.QDialog):
         self.set_layer_join_fields()
 
         # Instantiate objects
-        self.database = Database()
+        self.database = create_database()
         self.join_handler = JoinHandler(base=self)
         self.exporter = Exporter(base=self)
-        self.converter = QgsConverter(base=self)
+        self.converter = DatasetConverter(base=self)
         self.dataset: Dataset | None = None
-        self.subset: pd.DataFrame | None = None
+        # The job which loads 'dataset'.
+        self.dataset_job: DatasetInitializer | None = None
         self.filterer: DataFilterer | None = None
+        # Shows the rows of a dataset which is still being downloaded,
+        # and the rows which were received but not shown yet.
+        self.preview: PandasModel | None = None
+        self.pending_rows: list[pd.DataFrame] = []
+        self.rows_timer = QtCore.QTimer(self)
+        self.rows_timer.setSingleShot(True)
+        self.rows_timer.setInterval(ROWS_BATCH_MS)
+        self.toc_model = TableOfContentsModel(self)
+        self.ui.listDatabase.setModel(self.toc_model)
+        self.last_search: TocSearch | None = None
+        self.search_timer = QtCore.QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        # The dataset which is about to be prefetched, and the token of
+        # the one being prefetched.
+        self.prefetch_code: str | None = None
+        self.prefetch_token: CancelToken | None = None
+        self.prefetched: set[str] = set()
+        self.prefetch_timer = QtCore.QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(PREFETCH_DWELL_MS)
+        self.ui.listDatabase.setMouseTracking(True)
 
         # Signals
         self.ui.pushButtonInitializeTOC.clicked.connect(
@@ -83,10 +144,17 @@ class Dialog(QtWidgets.QDialog):
         self.ui.qgsComboLayer.layerChanged.connect(
             self.set_layer_join_field_default
         )
-        self.ui.lineSearch.textChanged.connect(self.filter_toc)
-        self.ui.listDatabase.itemPressed.connect(
+        self.ui.lineSearch.textChanged.connect(self.schedule_filter_toc)
+        self.search_timer.timeout.connect(self.filter_toc)
+        self.rows_timer.timeout.connect(self.flush_dataset_rows)
+        self.ui.listDatabase.pressed.connect(
             self.set_dataset_table
         )
+        self.ui.listDatabase.entered.connect(self.schedule_prefetch)
+        self.ui.listDatabase.selectionModel().currentChanged.connect(
+            self.schedule_prefetch
+        )
+        self.prefetch_timer.timeout.connect(self.prefetch_dataset)
         self.ui.tableDataset.horizontalHeader().sectionClicked.connect(
             self.open_section_ui
         )
@@ -120,59 +188,141 @@ class Dialog(QtWidgets.QDialog):
             return
         self.ui.qgsComboLayerJoinField.setLayer(layer=layer)
 
-    def set_gui_state(self, state: bool):
+    def set_gui_state(
+        self,
+        state: bool,
+        exclude: Iterable[QtWidgets.QWidget] = ()
+    ):
+        # The loading dialogs stay enabled, so that the jobs can be
+        # cancelled.
+        exclude = set(exclude)
         for obj in self.children():
-            if isinstance(obj, QtWidgets.QWidget):
+            if (
+                isinstance(obj, QtWidgets.QWidget)
+                and not isinstance(obj, LoadingDialog)
+                and obj not in exclude
+            ):
                 obj.setEnabled(state)
 
     def initialize_database(self):
-        self.ui.listDatabase.clear()
+        self.toc_model.clear()
+        self.last_search = None
         initializer = DatabaseInitializer(self)
         dialog = LoadingDialog(self)
         loading_label = LoadingLabel(
             'initializing table of contents', self
         )
-        initializer.started.connect(
+        initializer.begun.connect(
             partial(self.set_gui_state, False)
         )
-        initializer.started.connect(
+        initializer.begun.connect(
             dialog.show
         )
         loading_label.update_label.connect(dialog.update_loading_label)
-        initializer.started.connect(
+        dialog.cancel_requested.connect(initializer.cancel)
+        initializer.begun.connect(
             loading_label.start
         )
-        initializer.finished.connect(
+        initializer.done.connect(
             partial(self.set_gui_state, True)
         )
-        initializer.finished.connect(
-            loading_label.requestInterruption
+        initializer.done.connect(
+            loading_label.stop
         )
-        initializer.finished.connect(
+        initializer.done.connect(
             dialog.close
         )
         initializer.error_ocurred.connect(self.handle_error_ocurred)
-        initializer.start()
 
-        initializer.finished.connect(self.set_agency_status_tooltip)
+        # The entries downloaded before a cancellation are shown too.
+        initializer.done.connect(self.filter_toc)
+        initializer.done.connect(self.set_agency_status_tooltip)
+        initializer.succeeded.connect(self.revalidate_database)
+        SCHEDULER.start(initializer)
+
+    def revalidate_database(self):
+        """Refreshes the stale table of contents entries without
+        blocking the GUI."""
+        if not self.database.has_stale_toc:
+            return None
+        revalidator = TocRevalidator(self)
+        revalidator.toc_updated.connect(self.filter_toc)
+        revalidator.toc_updated.connect(self.set_agency_status_tooltip)
+        revalidator.error_ocurred.connect(
+            partial(self.handle_error_ocurred, action='print')
+        )
+        SCHEDULER.start(revalidator)
+
+    def schedule_filter_toc(self):
+        # Restarting the timer on every keystroke makes sure that
+        # the search only runs after the user stops typing.
+        self.search_timer.start()
 
     def filter_toc(self):
-        if self.database.toc.empty:
+        self.search_timer.stop()
+        toc = self.database.toc
+        if toc.empty:
             return None
-        self.ui.listDatabase.clear()
-        self.subset = self.database.get_subset(
-            self.ui.lineSearch.text()
+        query = self.ui.lineSearch.text()
+        within = None
+        if (
+            self.last_search is not None
+            and self.last_search.toc is toc
+            and query.startswith(self.last_search.query)
+        ):
+            # The new query can only match a subset of the previous one.
+            within = self.last_search.rows
+        rows = self.database.search(query, within=within)
+        self.last_search = TocSearch(toc=toc, query=query, rows=rows)
+        self.toc_model.set_rows(toc=toc, rows=rows)
+
+    def schedule_prefetch(self, index: QtCore.QModelIndex):
+        """Prefetches the dataset under the mouse or the keyboard cursor
+        once the cursor stays on it for a moment."""
+        if not GLOBAL_SETTINGS.prefetch or not index.isValid():
+            return
+        self.prefetch_code = self.toc_model.get_code(index.row())
+        self.prefetch_timer.start()
+
+    def prefetch_dataset(self):
+        code = self.prefetch_code
+        if (
+            code is None
+            or code in self.prefetched
+            or (self.dataset is not None and self.dataset.code == code)
+        ):
+            return
+        # Only the last guess is downloaded.
+        self.cancel_prefetch()
+        self.prefetch_token = CancelToken()
+        dataset = Dataset(
+            db=self.database, code=code, lang=self.get_selected_language()
+        )
+        future = WORKER_POOL.submit(
+            dataset.prefetch,
+            self.prefetch_token,
+            priority=JobPriority.SPECULATIVE
         )
-        titles = self.database.get_titles(subset=self.subset)
-        codes = self.database.get_codes(subset=self.subset)
-        items = '[' + codes + '] ' + titles
-        self.ui.listDatabase.addItems(items)
+        future.add_done_callback(partial(self.prefetch_done, code))
+
+    def prefetch_done(self, code: str, future: Future):
+        # Called from the worker thread. The datasets which failed or
+        # were too large are not tried again in this session.
+        if (
+            not future.cancelled()
+            and not isinstance(future.exception(), JobCancelled)
+        ):
+            self.prefetched.add(code)
+
+    def cancel_prefetch(self):
+        self.prefetch_timer.stop()
+        if self.prefetch_token is not None:
+            self.prefetch_token.cancel()
+            self.prefetch_token = None
 
     def get_selected_dataset_code(self):
-        row = self.ui.listDatabase.currentRow()
-        if self.subset is None:
-            self.subset = self.database.toc
-        return self.database.get_codes(subset=self.subset).iloc[row]
+        row = self.ui.listDatabase.currentIndex().row()
+        return self.toc_model.get_code(row)
 
     def get_current_table_join_field(self):
         return self.ui.comboTableJoinField.currentText()
@@ -211,62 +361,193 @@ class Dialog(QtWidgets.QDialog):
             if item in GeoSectionName._value2member_map_:
                 self.ui.comboTableJoinField.setCurrentIndex(idx)
 
-    def infer_join_field_idx_from_layer(self, layer: QgsMapLayer):
+    def infer_join_field_idx_from_layer(
+        self,
+        layer: QgsMapLayer
+    ) -> int | None:
+        """Returns the index of the layer field which best matches
+        the values of the table join field.
+
+        Only the string fields of a sample of features are read,
+        without geometries, and the search stops as soon as a field
+        matches well enough. The values are read from the dimensions
+        of the dataset, so nothing is downloaded."""
         assert isinstance(layer, QgsVectorLayer)
-        if layer.featureCount() > 100_000:
-            # Don't infer join field if there are more than 100k features.
-            # NOTE: This is arbitrary, can be changed in the future.
+        if self.filterer is None:
+            # The dataset is still being loaded.
             return None
-        df = self.converter.to_dataframe(layer=layer)
+        keys = self.filterer.dataset.keys
         geo = self.ui.comboTableJoinField.currentText()
-        unique_values = self.model.pandas._data[geo].unique()
-        columns = df.columns[df.isin(unique_values).any()]
-        if not columns.empty:
-            idx = df.columns.to_list().index(columns[-1])
-            return idx
+        if geo not in keys:
+            return None
+        unique_values = set(keys[geo].dropna().unique())
+        fields = layer.fields()
+        string_fields = [
+            idx for idx, field in enumerate(fields)
+            if field.type() == QtCore.QVariant.Type.String
+        ]
+        if not string_fields or not unique_values:
+            return None
+        request = (
+            QgsFeatureRequest()
+            .setFlags(QgsFeatureRequest.NoGeometry)
+            .setSubsetOfAttributes(string_fields)
+            .setLimit(JOIN_FIELD_SAMPLE_SIZE)
+        )
+        matches = dict.fromkeys(string_fields, 0)
+        sampled = 0
+        for feat in layer.getFeatures(request):  # type: ignore
+            sampled += 1
+            for idx in string_fields:
+                if feat.attribute(idx) in unique_values:
+                    matches[idx] += 1
+            if sampled >= JOIN_FIELD_MIN_SAMPLE:
+                for idx in reversed(string_fields):
+                    if matches[idx] / sampled >= JOIN_FIELD_MATCH_RATIO:
+                        return idx
+        if not sampled:
+            return None
+        # Prefer the last field, as the previous implementation did.
+        best = max(reversed(string_fields), key=lambda idx: matches[idx])
+        return best if matches[best] else None
 
     def set_layer_join_field_default(self):
-        if not hasattr(self, 'model'):
+        if self.filterer is None:
             return
         if layer := self.ui.qgsComboLayer.currentLayer():
-            if idx := self.infer_join_field_idx_from_layer(layer=layer):
+            idx = self.infer_join_field_idx_from_layer(layer=layer)
+            if idx is not None:
                 self.ui.qgsComboLayerJoinField.setCurrentIndex(idx)
 
     def set_dataset_table(self):
+        # Selecting another dataset aborts the one being loaded, and
+        # leaves the bandwidth to it.
+        self.abandon_dataset_job()
+        self.cancel_prefetch()
+        if self.dataset is not None:
+            self.dataset.close()
         self.dataset = Dataset(
             db=self.database,
             code=self.get_selected_dataset_code(),
             lang=self.get_selected_language()
         )
-        initializer = DatasetInitializer(self)
+        self.filterer = None
+        self.clear_dataset_rows()
+        initializer = DatasetInitializer(self, self.dataset)
+        self.dataset_job = initializer
         dialog = LoadingDialog(self)
         loading_label = LoadingLabel(
             f'initializing dataset "{self.dataset.code}"', self
         )
-        initializer.started.connect(
-            partial(self.set_gui_state, False)
-        )
-        initializer.started.connect(
+        initializer.rows_loaded.connect(self.show_dataset_rows)
+        initializer.rows_loaded.connect(dialog.close)
+        initializer.begun.connect(self.start_dataset_job)
+        initializer.begun.connect(
             dialog.show
         )
         loading_label.update_label.connect(dialog.update_loading_label)
-        initializer.started.connect(
+        dialog.cancel_requested.connect(initializer.cancel)
+        initializer.begun.connect(
             loading_label.start
         )
-        initializer.finished.connect(
-            partial(self.set_gui_state, True)
-        )
-        initializer.finished.connect(
-            loading_label.requestInterruption
+        initializer.done.connect(
+            loading_label.stop
         )
-        initializer.finished.connect(
+        initializer.done.connect(
             dialog.close
         )
-        initializer.start()
-        initializer.finished.connect(self.set_table_join_fields)
-        initializer.finished.connect(self.set_table_join_field_default)
-        initializer.finished.connect(self.set_layer_join_field_default)
-        initializer.finished.connect(self.set_join_columns)
+        initializer.error_ocurred.connect(self.handle_error_ocurred)
+        initializer.cancelled.connect(self.clear_dataset)
+        initializer.succeeded.connect(self.dataset_loaded)
+        initializer.done.connect(self.finish_dataset_job)
+        SCHEDULER.start(initializer)
+
+    def abandon_dataset_job(self):
+        """Cancels the job which loads the dataset, and ignores the
+        signals it still emits."""
+        if self.dataset_job is not None:
+            self.dataset_job.cancel()
+            self.dataset_job = None
+
+    def is_current_job(self) -> bool:
+        """Whether the signal being handled was sent by the job which
+        loads the current dataset."""
+        sender = self.sender()
+        return sender is not None and sender is self.dataset_job
+
+    def start_dataset_job(self):
+        if not self.is_current_job():
+            return
+        # Another dataset can be selected while this one is loaded.
+        self.set_gui_state(False, (self.ui.listDatabase, self.ui.lineSearch))
+
+    def clear_dataset(self):
+        """Drops the dataset whose loading was cancelled."""
+        if not self.is_current_job():
+            return
+        if self.dataset is not None:
+            self.dataset.close()
+        self.dataset = None
+        self.filterer = None
+        self.clear_dataset_rows()
+        self.ui.tableDataset.setModel(None)
+
+    def dataset_loaded(self, dataset: Dataset):
+        """Shows the dataset produced by the job, in the GUI thread."""
+        if not self.is_current_job() or dataset is not self.dataset:
+            return
+        self.clear_dataset_rows()
+        self.filterer = DataFilterer(dataset=dataset)
+        self.update_model()
+        self.set_table_join_fields()
+        self.set_table_join_field_default()
+        self.set_layer_join_field_default()
+        self.set_join_columns()
+
+    def finish_dataset_job(self):
+        if not self.is_current_job():
+            # Another dataset is being loaded.
+            return
+        self.dataset_job = None
+        self.set_gui_state(True)
+
+    def show_dataset_rows(self, rows: pd.DataFrame):
+        """Shows the rows of the dataset while it is being downloaded.
+
+        The first rows are shown right away, the next ones are added
+        in batches."""
+        if not self.is_current_job() or self.filterer is not None:
+            # The whole dataset is already shown.
+            return
+        shown = sum(map(len, self.pending_rows))
+        if self.preview is not None:
+            shown += self.preview.rowCount()
+        if shown >= PREVIEW_MAX_ROWS:
+            return
+        self.pending_rows.append(rows.iloc[:PREVIEW_MAX_ROWS - shown])
+        if self.preview is None:
+            self.flush_dataset_rows()
+        elif not self.rows_timer.isActive():
+            self.rows_timer.start()
+
+    def flush_dataset_rows(self):
+        self.rows_timer.stop()
+        if not self.pending_rows:
+            return
+        # The chunks are added one by one, instead of being copied
+        # into a single frame.
+        pending, self.pending_rows = self.pending_rows, []
+        if self.preview is None:
+            self.preview = PandasModel(pending.pop(0))
+            self.ui.tableDataset.setModel(self.preview)
+            self.ui.tableDataset.setEnabled(True)
+        for rows in pending:
+            self.preview.append_rows(rows)
+
+    def clear_dataset_rows(self):
+        self.rows_timer.stop()
+        self.pending_rows = []
+        self.preview = None
 
     def set_join_columns(self):
         checkable = CheckableComboBox()
@@ -284,14 +565,62 @@ class Dialog(QtWidgets.QDialog):
     def update_model(self):
         assert self.dataset is not None
         assert self.filterer is not None
-        self.model = DatasetModel(
-            estat_dataset=self.dataset, filterer=self.filterer
+        if (
+            not hasattr(self, 'model')
+            or self.model.filterer is not self.filterer
+        ):
+            self.model = DatasetModel(
+                estat_dataset=self.dataset, filterer=self.filterer
+            )
+        pandas = self.model.pandas
+        if self.ui.tableDataset.model() is not pandas:
+            self.ui.tableDataset.setModel(pandas)
+
+    def with_frame(self, callback: Callable[[], None]):
+        """Calls 'callback' once the filtered data is available.
+
+        If only a preview of the dataset was downloaded, the filtered
+        data is downloaded first by a job, which can be cancelled, in
+        which case 'callback' is not called."""
+        if not self.model.needs_slice:
+            callback()
+            return
+        downloader = SliceDownloader(self, self.model)
+        dialog = LoadingDialog(self)
+        loading_label = LoadingLabel(
+            f'downloading dataset "{self.model.estat_dataset.code}"', self
+        )
+        loading_label.update_label.connect(dialog.update_loading_label)
+        dialog.cancel_requested.connect(downloader.cancel)
+        downloader.begun.connect(partial(self.set_gui_state, False))
+        downloader.begun.connect(dialog.show)
+        downloader.begun.connect(loading_label.start)
+        downloader.done.connect(loading_label.stop)
+        downloader.done.connect(dialog.close)
+        downloader.done.connect(partial(self.set_gui_state, True))
+        downloader.error_ocurred.connect(self.handle_error_ocurred)
+        downloader.succeeded.connect(
+            partial(self.slice_downloaded, downloader, callback)
         )
-        self.ui.tableDataset.setModel(self.model.pandas)
+        SCHEDULER.start(downloader)
+
+    def slice_downloaded(
+        self,
+        downloader: SliceDownloader,
+        callback: Callable[[], None],
+        df: pd.DataFrame
+    ):
+        downloader.model.set_slice(downloader.state, df)
+        # Another dataset could have been selected in the meantime.
+        if downloader.model is self.model and not self.model.needs_slice:
+            callback()
 
     def open_section_ui(self, idx: int):
+        if self.filterer is None:
+            # The dataset is still being downloaded.
+            return
         assert self.dataset is not None
-        section_name = self.dataset.df.columns[idx]
+        section_name = self.filterer.column[idx]
         if section_name in self.dataset.params:
             ParameterSectionDialog(base=self, name=section_name)
         elif section_name in self.dataset.date_columns:
@@ -320,59 +649,90 @@ class Dialog(QtWidgets.QDialog):
             raise exception
 
 
-class DatabaseInitializer(QtCore.QThread):
-    error_ocurred = QtCore.pyqtSignal(Exception, name="errorOcurred")
+class DatabaseInitializer(Job):
 
     def __init__(self, base: Dialog):
-        self.base = base
-        super().__init__(self.base)
+        super().__init__(base, 'Loading the Eurostat table of contents')
+
+    def work(self):
+        self.base.database.initialize_toc(token=self.token)
+
+
+class TocRevalidator(Job):
+    toc_updated = QtCore.pyqtSignal()
+    priority = JobPriority.BACKGROUND
 
-    def run(self):
-        try:
-            self.base.ui.listDatabase.clear()
-            self.base.database.initialize_toc()
-            if self.base.database.toc.empty:
-                return None
-            titles = self.base.database.get_titles()
-            codes = self.base.database.get_codes()
-            items = '[' + codes + '] ' + titles
-            self.base.ui.listDatabase.addItems(items)
-        except Exception as e:
-            self.error_ocurred.emit(e)
-
-
-class DatasetInitializer(QtCore.QThread):
     def __init__(self, base: Dialog):
-        self.base = base
-        super().__init__(self.base)
+        super().__init__(base, 'Refreshing the Eurostat table of contents')
+
+    def work(self):
+        if self.base.database.revalidate_toc():
+            self.toc_updated.emit()
 
-    def run(self):
-        assert self.base.dataset is not None
-        self.base.dataset.initialize_df()
-        self.base.filterer = DataFilterer(dataset=self.base.dataset)
-        self.base.update_model()
 
+class DatasetInitializer(Job):
+    rows_loaded = QtCore.pyqtSignal(pd.DataFrame)
 
-class LoadingLabel(QtCore.QThread):
+    def __init__(self, base: Dialog, dataset: Dataset):
+        super().__init__(base, f'Loading the Eurostat dataset {dataset.code}')
+        self.dataset = dataset
+
+    def work(self) -> Dataset:
+        self.dataset.initialize_df(
+            on_chunk=self.rows_loaded.emit, token=self.token
+        )
+        return self.dataset
+
+
+class SliceDownloader(Job):
+    """Downloads the filtered data of a dataset of which only a preview
+    was downloaded, with the filters applied by the server."""
+
+    def __init__(self, base: Dialog, model: DatasetModel):
+        super().__init__(
+            base,
+            f'Downloading the Eurostat dataset {model.estat_dataset.code}'
+        )
+        self.model = model
+        # The filters are read in the GUI thread, where they change.
+        self.state = model.filterer.state
+        self.query = model.filterer.query
+        self.column = model.filterer.column
+
+    def work(self) -> pd.DataFrame:
+        return self.model.estat_dataset.download(
+            self.query, token=self.token
+        ).reindex(columns=self.column)
+
+
+class LoadingLabel(QtCore.QObject):
+    """Animates the label of a loading dialog, from the GUI thread."""
     update_label = QtCore.pyqtSignal(str)
 
     def __init__(self, label: str, base=None):
         self.base = base
         super().__init__(self.base)
         self.label = label
+        self.chars = itertools.cycle('🌏🌍🌎')
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(LOADING_LABEL_MS)
+        self.timer.timeout.connect(self.spin)
 
     def spin(self):
-        for char in itertools.cycle('🌏🌍🌎'):
-            self.update_label.emit(f'{self.label}\n{char}  ')
-            time.sleep(0.5)
-            if self.isInterruptionRequested():
-                break
+        self.update_label.emit(f'{self.label}\n{next(self.chars)}  ')
 
-    def run(self):
+    def start(self):
         self.spin()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.deleteLater()
 
 
 class LoadingDialog(QtWidgets.QDialog):
+    cancel_requested = QtCore.pyqtSignal()
+
     def __init__(self, base=None):
         self.base = base
         super().__init__(base)
@@ -384,6 +744,13 @@ class LoadingDialog(QtWidgets.QDialog):
         self.qlabel.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
         self.qlabel.setFont(QtGui.QFont(self.qlabel.font().family(), 15))
         self.layout().addWidget(self.qlabel)
+        self.buttonCancel = QtWidgets.QPushButton('Cancel', self)
+        self.buttonCancel.clicked.connect(self.cancel)
+        self.layout().addWidget(self.buttonCancel)
+
+    def cancel(self):
+        self.buttonCancel.setEnabled(False)
+        self.cancel_requested.emit()
 
     def update_loading_label(self, text: str):
         self.qlabel.setText(text)
@@ -414,15 +781,12 @@ class ParameterSectionDialog(QtWidgets.QDialog):
     def filter_toc(self):
         assert self.base.dataset is not None
         if self.base.dataset.lang is not None:
-            names = (
-                self.base.dataset.params_info
-                [self.base.dataset.lang]
-                [self.name]
+            names = self.base.dataset.get_param_labels(
+                self.name, self.base.dataset.lang
             )
-            assert names is not None
             items = [f'{abbrev} [{name}]' for abbrev, name in names]
         else:
-            items = self.base.dataset.df[self.name].unique()
+            items = self.base.dataset.keys[self.name].unique().tolist()
         self.ui.listItems.addItems(items)
 
     def get_listitem_text_abbrev(self, item: QtWidgets.QListWidgetItem):
@@ -595,18 +959,16 @@ class TimeSectionDialog(QtWidgets.QDialog):
 
     def add_time_filters(self):
         assert self.base.dataset is not None
-        cols = self.base.dataset.date_columns.to_list()
+        cols = self.base.dataset.date_columns
         try:
-            start = cols.index(self.get_start_time_combobox())
-        except ValueError:
+            start = cols.get_loc(self.get_start_time_combobox())
+        except KeyError:
             start = 0
         try:
-            end = cols.index(self.get_end_time_combobox())
-        except ValueError:
+            end = cols.get_loc(self.get_end_time_combobox())
+        except KeyError:
             end = len(cols) - 1
-        cols_filtered = cols[start:end+1]
-        cols = self.base.dataset.params + cols_filtered
-        self.base.filterer.set_column_filters(filters=cols)
+        self.base.filterer.set_time_range(start, end)
         self.base.update_model()
 
     def set_default_start_combobox(self):
@@ -691,8 +1053,17 @@ class SettingsDialog(QtWidgets.QDialog):
         assert all(
             agency in self._agencies_checkboxes for agency in Agency
         ), 'Update the agency global settings combobox dict'
+        for storage, text in (
+            (LayerStorage.MEMORY, 'Memory'),
+            (LayerStorage.GEOPACKAGE, 'GeoPackage file'),
+            (LayerStorage.CSV, 'CSV file'),
+        ):
+            self.ui.comboBoxLayerStorage.addItem(text, storage.value)
 
         self.restore_global_settings()
+        self.ui.pushButtonClearLayerFiles.clicked.connect(
+            self.clear_layer_files
+        )
         ok_btn = self.ui.buttonBox.button(QtWidgets.QDialogButtonBox.Ok)
         ok_btn.clicked.connect(self.update_global_settings)
         self.exec_()
@@ -703,6 +1074,13 @@ class SettingsDialog(QtWidgets.QDialog):
         GLOBAL_SETTINGS.verify_ssl = (
             self.ui.checkBoxVerifySSL.isChecked()
         )
+        GLOBAL_SETTINGS.server_side_filtering = (
+            self.ui.checkBoxServerSideFiltering.isChecked()
+        )
+        GLOBAL_SETTINGS.prefetch = self.ui.checkBoxPrefetch.isChecked()
+        GLOBAL_SETTINGS.layer_storage = LayerStorage(
+            self.ui.comboBoxLayerStorage.currentData()
+        )
 
         # Agencies
         agencies_checkboxes_bool: dict[Agency, bool] = {
@@ -737,6 +1115,15 @@ class SettingsDialog(QtWidgets.QDialog):
 
         # Restore SLL setting
         self.ui.checkBoxVerifySSL.setChecked(GLOBAL_SETTINGS.verify_ssl)
+        self.ui.checkBoxServerSideFiltering.setChecked(
+            GLOBAL_SETTINGS.server_side_filtering
+        )
+        self.ui.checkBoxPrefetch.setChecked(GLOBAL_SETTINGS.prefetch)
+        self.ui.comboBoxLayerStorage.setCurrentIndex(
+            self.ui.comboBoxLayerStorage.findData(
+                GLOBAL_SETTINGS.layer_storage.value
+            )
+        )
 
         # Restore proxy settings
         if GLOBAL_SETTINGS.proxy is not None:
@@ -747,102 +1134,187 @@ class SettingsDialog(QtWidgets.QDialog):
                 GLOBAL_SETTINGS.proxy.password
             )
 
+    def clear_layer_files(self):
+        removed = remove_unused_layer_files()
+        QtWidgets.QMessageBox.information(
+            self,
+            'Eurostat Downloader',
+            f'{removed} unused table layer files were removed.'
+        )
 
 
 @dataclass
-class DataFilterer:
-    dataset: Dataset
-    row: dict[str, list[Any]] = field(init=False, default_factory=dict)
-    column: list[str] = field(init=False, default_factory=list)
+class DatasetModel:
+    """Holds the filtered dataset and its Qt model.
 
-    def __post_init__(self):
-        self.column = self.dataset.df.columns.to_list()
+    Both are built again only if the state of the filterer changed
+    since the last access."""
+    estat_dataset: Dataset
+    filterer: DataFilterer
+    _state: Hashable = field(init=False, default=None)
+    _pandas: PandasModel | None = field(init=False, default=None)
+    # The slice downloaded for a partial dataset, and its state.
+    _slice_state: Hashable = field(init=False, default=None)
+    _slice: pd.DataFrame | None = field(init=False, default=None)
 
     @property
-    def df(self):
-        return self.dataset.df
+    def pandas(self) -> PandasModel:
+        state = self.filterer.state
+        if self._pandas is None or state != self._state:
+            self._pandas = PandasModel(data=self.filterer.apply_filters())
+            self._state = state
+        return self._pandas
 
     @property
-    def date_columns(self) -> list[str] | list:
-        return np.setdiff1d(self.column, self.dataset.params).tolist()
-
-    def apply_filters(self):
-        ind = [True] * len(self.df)
-        for col, vals in self.row.items():
-            if not vals:
-                continue
-            # TODO: Fix the following line of code. A Pandas FutureWarning.
-            ind = ind & (self.df[col].isin(vals))
-        return self.df.loc[ind, self.column]
-
-    def add_row_filters(self, filters: dict[str, Iterable[Any]]):
-        # This is only for the row axis
-        for col, values in filters.items():
-            for value in values:
-                self.row.setdefault(col, []).append(value)
-
-    def set_column_filters(
-        self,
-        filters: None | str | Iterable[str] = None
-    ):
-        if filters is None:
-            filters = self.dataset.df.columns.to_list()
-        elif isinstance(filters, str):
-            filters = [filters]
-        self.column = list(filters)
-
-    def remove_row_filters(
-        self,
-        filters: None | str | dict[str, Iterable] | Iterable[str] = None
-    ):
-        if filters is None:
-            self.row = {}
-        elif isinstance(filters, str):
-            self.row[filters].clear()
-        elif isinstance(filters, dict):
-            for col, values in filters.items():
-                for value in values:
-                    self.row[col].remove(value)
-                if not self.row[col]:
-                    self.row[col].clear()
-        elif isinstance(filters, Iterable):
-            for filter_ in filters:
-                self.row[filter_].clear()
-
-    def remove_column_filters(self, filters: str | Iterable[str]):
-        if isinstance(filters, str):
-            self.column.remove(filters)
-        elif isinstance(filters, Iterable):
-            for filter_ in filters:
-                self.column.remove(filter_)
+    def needs_slice(self) -> bool:
+        """Whether only a preview of the dataset was downloaded, and the
+        filtered data was not downloaded yet (see 'SliceDownloader')."""
+        return self.estat_dataset.is_partial and (
+            self._slice is None or self.filterer.state != self._slice_state
+        )
 
-
-@dataclass
-class DatasetModel:
-    estat_dataset: Dataset
-    filterer: DataFilterer
+    def set_slice(self, state: Hashable, df: pd.DataFrame):
+        self._slice = df
+        self._slice_state = state
 
     @property
-    def pandas(self) -> PandasModel:
-        return PandasModel(data=self.filterer.apply_filters())
+    def frame(self) -> pd.DataFrame:
+        """The filtered data. If only a preview of the dataset was
+        downloaded, the slice set by 'set_slice' for the current
+        filters."""
+        if not self.estat_dataset.is_partial:
+            return self.pandas._data
+        assert self._slice is not None and not self.needs_slice
+        return self._slice
+
+
+class TocSearch(NamedTuple):
+    """The result of the last table of contents search."""
+    toc: pd.DataFrame
+    query: str
+    rows: np.ndarray
+
+
+class TableOfContentsModel(QtCore.QAbstractListModel):
+    """List model which shows a subset of the table of contents.
+
+    The items are formatted only when they are painted."""
+    def __init__(self, parent=None):
+        QtCore.QAbstractListModel.__init__(self, parent)
+        self._codes = np.array([], dtype=object)
+        self._titles = np.array([], dtype=object)
+        self._rows = np.array([], dtype=np.int64)
+
+    def set_rows(self, toc: pd.DataFrame, rows: np.ndarray):
+        self.beginResetModel()
+        self._codes = toc[TableOfContentsColumn.CODE.value].to_numpy()
+        self._titles = toc[TableOfContentsColumn.TITLE.value].to_numpy()
+        self._rows = rows
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = np.array([], dtype=np.int64)
+        self.endResetModel()
+
+    def get_code(self, row: int) -> str:
+        return self._codes[self._rows[row]]
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if index.isValid():
+            if role == QtCore.Qt.ItemDataRole.DisplayRole:
+                row = self._rows[index.row()]
+                return f'[{self._codes[row]}] {self._titles[row]}'
+        return None
 
 
 class PandasModel(QtCore.QAbstractTableModel):
-    """Class to turn a pandas dataframe into a QAbstractTableModel."""
+    """Class to turn a pandas dataframe into a QAbstractTableModel.
+
+    The columns of the frames are referenced, not copied. The cells are
+    converted to strings one block of rows at a time, and only the most
+    recently painted blocks are kept in memory.
+    """
+    BLOCK_SIZE = 256
+    MAX_BLOCKS = 512
+
     def __init__(self, data: pd.DataFrame, parent=None):
         QtCore.QAbstractTableModel.__init__(self, parent)
         self._data = data
+        self._headers = data.columns.to_list()
+        # The columns of each chunk of rows, and the first row of
+        # each chunk. Rows can be appended while a dataset is streamed.
+        self._chunks: list[list[pd.Series]] = []
+        self._offsets: list[int] = []
+        self._rows = 0
+        self._blocks: OrderedDict[tuple[int, int], list[str]] = OrderedDict()
+        self._add_chunk(data)
+
+    def _add_chunk(self, data: pd.DataFrame):
+        if data.empty:
+            return
+        self._chunks.append([
+            data.iloc[:, col] for col in range(data.shape[1])
+        ])
+        self._offsets.append(self._rows)
+        self._rows += data.shape[0]
+
+    def append_rows(self, data: pd.DataFrame):
+        """Adds rows at the end of the table."""
+        if data.empty:
+            return
+        self.beginInsertRows(
+            QtCore.QModelIndex(), self._rows, self._rows + len(data) - 1
+        )
+        # The last block could have been rendered before it was full.
+        last_block = self._rows // self.BLOCK_SIZE
+        for col in range(len(self._headers)):
+            self._blocks.pop((last_block, col), None)
+        self._add_chunk(data)
+        self.endInsertRows()
+
+    def _get_values(self, col: int, start: int, stop: int) -> np.ndarray:
+        chunk = bisect.bisect_right(self._offsets, start) - 1
+        parts = []
+        while start < stop and chunk < len(self._chunks):
+            offset = self._offsets[chunk]
+            values = self._chunks[chunk][col]
+            parts.append(
+                values.iloc[start - offset:stop - offset].to_numpy()
+            )
+            start = offset + len(values)
+            chunk += 1
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def _get_block(self, block: int, col: int) -> list[str]:
+        key = (block, col)
+        if (rendered := self._blocks.get(key, None)) is not None:
+            self._blocks.move_to_end(key)
+            return rendered
+        start = block * self.BLOCK_SIZE
+        values = self._get_values(col, start, start + self.BLOCK_SIZE)
+        rendered = values.astype(str).tolist()
+        self._blocks[key] = rendered
+        if len(self._blocks) > self.MAX_BLOCKS:
+            self._blocks.popitem(last=False)
+        return rendered
 
     def rowCount(self, parent=None):
-        return self._data.shape[0]
+        return self._rows
 
     def columnCount(self, parent=None):
-        return self._data.shape[1]
+        return len(self._headers)
 
     def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
         if index.isValid():
             if role == QtCore.Qt.ItemDataRole.DisplayRole:
-                return str(self._data.iloc[index.row(), index.column()])
+                block, offset = divmod(index.row(), self.BLOCK_SIZE)
+                return self._get_block(block, index.column())[offset]
         return None
 
     def headerData(self, col, orientation, role):
@@ -850,7 +1322,7 @@ class PandasModel(QtCore.QAbstractTableModel):
             orientation == QtCore.Qt.Orientation.Horizontal
             and role == QtCore.Qt.ItemDataRole.DisplayRole
         ):
-            return self._data.columns[col]
+            return self._headers[col]
         return None
 
 
@@ -865,9 +1337,15 @@ class Exporter:
         self.base = base
 
     def add_table(self):
-        if self.base.dataset is None:
+        if self.base.filterer is None:
+            return None
+        self.base.with_frame(self.add_table_to_project)
+
+    def add_table_to_project(self):
+        try:
+            table = self.base.converter.table
+        except JobCancelled:
             return None
-        table = self.base.converter.table
         table.setName(self.base.dataset.code)
         QgsProject.instance().addMapLayer(table)  # type: ignore
 
@@ -882,8 +1360,13 @@ class JoinHandler:
     def join_info(self):
         return self.get_join_info()
 
-    def get_join_info(self):
-        table = self.base.converter.table
+    def get_join_info(self) -> QgsVectorLayerJoinInfo | None:
+        """Adds the table to the project, or returns None if the user
+        cancelled it."""
+        try:
+            table = self.base.converter.table
+        except JobCancelled:
+            return None
         QgsProject.instance().addMapLayer(table)  # type: ignore
         join_info = QgsVectorLayerJoinInfo()
         join_info.setJoinFieldName(
@@ -907,67 +1390,44 @@ class JoinHandler:
     def join_table_to_layer(self):
         current_layer = self.base.ui.qgsComboLayer.currentLayer()
         if (
-            self.base.dataset is None
+            self.base.filterer is None
             or current_layer is None
         ):
             return None
-        current_layer.addJoin(self.join_info)
+        self.base.with_frame(partial(self.join_to_layer, current_layer))
 
+    def join_to_layer(self, layer: QgsMapLayer):
+        join_info = self.join_info
+        if join_info is not None:
+            layer.addJoin(join_info)
 
-class QgsConverter:
+
+class DatasetConverter:
+    """Creates the table layer of the filtered dataset."""
     base: Dialog
 
     def __init__(self, base: Dialog):
         self.base = base
 
     @property
-    def table(self):
-        return self.from_dataframe(self.base.model.pandas._data)
-
-    @staticmethod
-    def dtype_mapper(series: pd.Series):
-        dtype = series.dtype
-        if pd.api.types.is_integer_dtype(dtype):
-            return QtCore.QVariant.Type.Int
-        elif pd.api.types.is_float_dtype(dtype):
-            return QtCore.QVariant.Type.Double
-        elif pd.api.types.is_datetime64_any_dtype(dtype):
-            return QtCore.QVariant.Type.DateTime
-        elif pd.api.types.is_bool_dtype(dtype):
-            return QtCore.QVariant.Type.Bool
-        else:
-            return QtCore.QVariant.Type.String
-
-    @staticmethod
-    def to_dataframe(layer: QgsVectorLayer):
-        # Source code: https://stackoverflow.com/a/76153082
-        return (
-            pd.DataFrame(
-                [
-                    feat.attributes()
-                    for feat in layer.getFeatures()  # type: ignore
-                ],
-                columns=[field.name() for field in layer.fields()]
-            )
+    def table(self) -> QgsVectorLayer:
+        """Raises JobCancelled if the user cancels the progress dialog."""
+        progress = QtWidgets.QProgressDialog(
+            'Creating the table layer...', 'Cancel', 0, 100, self.base
         )
-
-    def from_dataframe(self, df: pd.DataFrame) -> QgsVectorLayer:
-        """Method to convert a pandas dataframe to a qgis table layer."""
-        temp = QgsVectorLayer('none', self.base.dataset.code, 'memory')
-        temp_data = temp.dataProvider()
-        temp.startEditing()
-        attributes = []
-        for head in df.columns:
-            attributes.append(
-                QgsField(head, self.dtype_mapper(series=df[head]))
+        progress.setWindowModality(QtCore.Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(500)
+        feedback = QgsFeedback()
+        feedback.progressChanged.connect(
+            lambda value: progress.setValue(int(value))
+        )
+        progress.canceled.connect(feedback.cancel)
+        try:
+            return QgsConverter.from_dataframe(
+                self.base.model.frame,
+                self.base.dataset.code,
+                feedback=feedback,
+                storage=GLOBAL_SETTINGS.layer_storage
             )
-        temp_data.addAttributes(attributes)  # type: ignore
-        temp.updateFields()
-        rows = []
-        for row in df.itertuples():
-            f = QgsFeature()
-            f.setAttributes([row[idx] for idx in range(1, len(row))])
-            rows.append(f)
-        temp_data.addFeatures(rows)  # type: ignore
-        temp.commitChanges()
-        return temp
+        finally:
+            progress.close()
@@ -0,0 +1,160 @@
+"""Writes the datasets to files, without QGIS.
+
+The GeoPackage files only hold attribute tables, which QGIS can join
+with vector layers. They are written with 'sqlite3', following the
+GeoPackage 1.3 specification, so that GDAL is not needed."""
+
+from __future__ import annotations
+
+from datetime import (
+    datetime,
+    timezone
+)
+from pathlib import Path
+import sqlite3
+
+import pandas as pd
+
+
+GPKG_APPLICATION_ID = 0x47504B47  # 'GPKG'
+GPKG_USER_VERSION = 10300
+# The spatial reference systems required by the specification.
+GPKG_SPATIAL_REF_SYS = [
+    (
+        'WGS 84 geodetic', 4326, 'EPSG', 4326,
+        'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,'
+        '298.257223563,AUTHORITY["EPSG","7030"]],AUTHORITY["EPSG","6326"]],'
+        'PRIMEM["Greenwich",0,AUTHORITY["EPSG","8901"]],UNIT["degree",'
+        '0.0174532925199433,AUTHORITY["EPSG","9122"]],AUTHORITY["EPSG",'
+        '"4326"]]',
+        'longitude/latitude coordinates in decimal degrees on the WGS 84 '
+        'spheroid'
+    ),
+    (
+        'Undefined cartesian SRS', -1, 'NONE', -1, 'undefined',
+        'undefined cartesian coordinate reference system'
+    ),
+    (
+        'Undefined geographic SRS', 0, 'NONE', 0, 'undefined',
+        'undefined geographic coordinate reference system'
+    ),
+]
+# Rows inserted at once.
+INSERT_CHUNK_SIZE = 10_000
+
+
+def _quote(name: str) -> str:
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def _get_sql_type(series: pd.Series) -> str:
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(series.dtype):
+        return 'DOUBLE'
+    return 'TEXT'
+
+
+def _init_geopackage(connection: sqlite3.Connection):
+    connection.execute(f'PRAGMA application_id = {GPKG_APPLICATION_ID}')
+    connection.execute(f'PRAGMA user_version = {GPKG_USER_VERSION}')
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS gpkg_spatial_ref_sys ('
+        'srs_name TEXT NOT NULL, '
+        'srs_id INTEGER NOT NULL PRIMARY KEY, '
+        'organization TEXT NOT NULL, '
+        'organization_coordsys_id INTEGER NOT NULL, '
+        'definition TEXT NOT NULL, '
+        'description TEXT)'
+    )
+    connection.executemany(
+        'INSERT OR IGNORE INTO gpkg_spatial_ref_sys VALUES (?, ?, ?, ?, ?, ?)',
+        GPKG_SPATIAL_REF_SYS
+    )
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS gpkg_contents ('
+        'table_name TEXT NOT NULL PRIMARY KEY, '
+        'data_type TEXT NOT NULL, '
+        'identifier TEXT UNIQUE, '
+        "description TEXT DEFAULT '', "
+        'last_change DATETIME NOT NULL '
+        "DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')), "
+        'min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE, '
+        'srs_id INTEGER, '
+        'CONSTRAINT fk_gc_r_srs_id FOREIGN KEY (srs_id) '
+        'REFERENCES gpkg_spatial_ref_sys(srs_id))'
+    )
+
+
+def write_geopackage(
+    path: Path,
+    table: str,
+    df: pd.DataFrame,
+    description: str = ''
+):
+    """Writes 'df' to the attribute table 'table' of a GeoPackage.
+
+    The file is created if needed, and an existing table with the same
+    name is replaced."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    columns = [str(col) for col in df.columns]
+    definitions = ', '.join(
+        f'{_quote(name)} {_get_sql_type(df[col])}'
+        for name, col in zip(columns, df.columns)
+    )
+    placeholders = ', '.join('?' * len(columns))
+    insert = (
+        f'INSERT INTO {_quote(table)} '
+        f'({", ".join(map(_quote, columns))}) VALUES ({placeholders})'
+    )
+    last_change = (
+        datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]
+        + 'Z'
+    )
+    connection = sqlite3.connect(path)
+    try:
+        with connection:
+            _init_geopackage(connection)
+            connection.execute(f'DROP TABLE IF EXISTS {_quote(table)}')
+            connection.execute(
+                'DELETE FROM gpkg_contents WHERE table_name = ?', (table,)
+            )
+            connection.execute(
+                f'CREATE TABLE {_quote(table)} ('
+                'fid INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL, '
+                f'{definitions})'
+            )
+            for start in range(0, len(df), INSERT_CHUNK_SIZE):
+                chunk = df.iloc[start:start + INSERT_CHUNK_SIZE]
+                connection.executemany(insert, _iter_rows(chunk))
+            connection.execute(
+                'INSERT INTO gpkg_contents '
+                '(table_name, data_type, identifier, description, '
+                'last_change) VALUES (?, ?, ?, ?, ?)',
+                (table, 'attributes', table, description, last_change)
+            )
+    finally:
+        connection.close()
+
+
+def _iter_rows(df: pd.DataFrame):
+    # NumPy scalars become Python objects, and the missing values NULL.
+    columns = []
+    for _, series in df.items():
+        values = series.to_numpy(dtype=object, copy=True)
+        values[pd.isna(values)] = None
+        columns.append(values)
+    return zip(*columns)
+
+
+def write_parquet(path: Path, df: pd.DataFrame):
+    """Requires 'pyarrow' or 'fastparquet'."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df = df.copy()
+    df.columns = [str(col) for col in df.columns]
+    df.to_parquet(path, index=False)
+
+
+def write_csv(path: Path, df: pd.DataFrame):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path, index=False)
@@ -0,0 +1,297 @@
+"""Filters the rows and the columns of a dataset without copying it."""
+
+from __future__ import annotations
+
+from typing import (
+    Any,
+    Hashable,
+    Iterable
+)
+from dataclasses import (
+    dataclass,
+    field
+)
+import time
+
+import numpy as np
+import pandas as pd
+
+from .data import (
+    Database,
+    Dataset,
+    DataQuery
+)
+from .jobs import CancelToken
+
+
+@dataclass
+class DimensionIndex:
+    """Stores the row positions of each value of a dimension column.
+
+    The rows are sorted by the categorical code of their value, so the
+    rows of a value are a slice of 'order'."""
+    codes: dict[Any, int]
+    order: np.ndarray
+    bounds: np.ndarray
+
+    @classmethod
+    def build(cls, series: pd.Series) -> DimensionIndex:
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            uniques = series.cat.categories
+        else:
+            codes, uniques = pd.factorize(series)
+        # Small integer codes let NumPy use a radix sort.
+        codes = codes.astype(np.min_scalar_type(-len(uniques)))
+        order = np.argsort(codes, kind='stable')
+        # Missing values have the code -1, so they are not in any slice.
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        return cls(
+            codes={value: code for code, value in enumerate(uniques)},
+            order=order,
+            bounds=bounds
+        )
+
+    def rows(self, value: Any) -> np.ndarray:
+        if (code := self.codes.get(value, None)) is None:
+            return self.order[:0]
+        return self.order[self.bounds[code]:self.bounds[code + 1]]
+
+
+@dataclass
+class DataFilterer:
+    dataset: Dataset
+    row: dict[str, list[Any]] = field(init=False, default_factory=dict)
+    # The dimension columns which are shown, and the positions of the
+    # shown time periods in 'dataset.date_columns'.
+    dims: list[str] = field(init=False, default_factory=list)
+    time: slice = field(
+        init=False, default_factory=lambda: slice(None)
+    )
+    _indexes: dict[str, DimensionIndex] = field(
+        init=False, default_factory=dict, repr=False
+    )
+    # The row mask of each filtered dimension and the values it selects.
+    _masks: dict[str, np.ndarray] = field(
+        init=False, default_factory=dict, repr=False
+    )
+    _mask_values: dict[str, set[Any]] = field(
+        init=False, default_factory=dict, repr=False
+    )
+
+    def __post_init__(self):
+        self.dims = list(self.dataset.params)
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """The dimensions of the series, which are filtered by row."""
+        return self.dataset.keys
+
+    @property
+    def date_columns(self) -> list[str]:
+        return self.dataset.date_columns[self.time].to_list()
+
+    @property
+    def column(self) -> list[str]:
+        return self.dims + self.date_columns
+
+    @property
+    def state(self) -> Hashable:
+        """A hashable snapshot of the filters. Two equal states
+        produce the same filtered dataframe."""
+        return (
+            tuple(
+                (col, tuple(vals)) for col, vals in self.row.items() if vals
+            ),
+            tuple(self.dims),
+            self.time.indices(len(self.dataset.date_columns))
+        )
+
+    def _get_index(self, col: str) -> DimensionIndex:
+        if (index := self._indexes.get(col, None)) is None:
+            index = DimensionIndex.build(self.df[col])
+            self._indexes[col] = index
+        return index
+
+    def _get_mask(self, col: str, vals: Iterable[Any]) -> np.ndarray:
+        """Returns the row mask of the dimension.
+
+        Only the rows of the values which were added or removed since
+        the last call are updated."""
+        index = self._get_index(col)
+        if (mask := self._masks.get(col, None)) is None:
+            mask = self._masks[col] = np.zeros(len(self.df), dtype=bool)
+        current = self._mask_values.setdefault(col, set())
+        wanted = set(vals)
+        for value in current - wanted:
+            mask[index.rows(value)] = False
+        for value in wanted - current:
+            mask[index.rows(value)] = True
+        self._mask_values[col] = wanted
+        return mask
+
+    def _get_rows(self) -> np.ndarray | None:
+        ind: np.ndarray | None = None
+        for col, vals in self.row.items():
+            if not vals:
+                continue
+            mask = self._get_mask(col, vals)
+            if ind is None:
+                ind = mask.copy()
+            else:
+                np.logical_and(ind, mask, out=ind)
+        return ind
+
+    def apply_filters(self) -> pd.DataFrame:
+        """Builds the wide frame of the selected rows and periods.
+
+        The periods are sliced from the long store of the dataset, and
+        only the downloaded ones are included for a partial dataset."""
+        dates = self.date_columns
+        store = self.dataset.store
+        periods = (
+            store.time_slice(dates[0], dates[-1]) if dates else slice(0, 0)
+        )
+        return store.to_wide(
+            rows=self._get_rows(), periods=periods, dims=self.dims
+        )
+
+    @property
+    def query(self) -> DataQuery:
+        """The filters, in the form used to download the data."""
+        dates = self.date_columns
+        return DataQuery(
+            filters=tuple(
+                (col, tuple(vals)) for col, vals in self.row.items() if vals
+            ),
+            start_period=dates[0] if dates else None,
+            end_period=dates[-1] if dates else None
+        )
+
+    def set_time_range(self, start: int = 0, end: int | None = None):
+        """Shows the periods from the position 'start' to 'end'."""
+        self.time = slice(start, None if end is None else end + 1)
+
+    def set_period_range(
+        self,
+        start: str | None = None,
+        end: str | None = None
+    ):
+        """Shows the periods from 'start' to 'end', which do not have
+        to be periods of the dataset. For monthly data, '2015' starts
+        with '2015-01' and ends with '2015-12'."""
+        dates = self.dataset.date_columns
+        first = 0 if start is None else int(dates.searchsorted(start))
+        # '~' sorts after the digits and the letters of the periods.
+        last = (
+            len(dates) if end is None
+            else int(dates.searchsorted(f'{end}~', side='right'))
+        )
+        self.time = slice(first, max(first, last))
+
+    def add_row_filters(self, filters: dict[str, Iterable[Any]]):
+        # This is only for the row axis
+        for col, values in filters.items():
+            for value in values:
+                self.row.setdefault(col, []).append(value)
+
+    def set_column_filters(
+        self,
+        filters: None | str | Iterable[str] = None
+    ):
+        """Shows the given dimensions and the range of periods which
+        spans the given periods."""
+        if filters is None:
+            self.dims = list(self.dataset.params)
+            self.time = slice(None)
+            return
+        if isinstance(filters, str):
+            filters = [filters]
+        filters = list(filters)
+        self.dims = [col for col in self.dataset.params if col in filters]
+        dates = self.dataset.date_columns
+        positions = np.flatnonzero(dates.isin(filters))
+        if len(positions):
+            self.set_time_range(positions[0], positions[-1])
+        else:
+            self.time = slice(0, 0)
+
+    def remove_row_filters(
+        self,
+        filters: None | str | dict[str, Iterable] | Iterable[str] = None
+    ):
+        if filters is None:
+            self.row = {}
+        elif isinstance(filters, str):
+            self.row[filters].clear()
+        elif isinstance(filters, dict):
+            for col, values in filters.items():
+                for value in values:
+                    self.row[col].remove(value)
+                if not self.row[col]:
+                    self.row[col].clear()
+        elif isinstance(filters, Iterable):
+            for filter_ in filters:
+                self.row[filter_].clear()
+
+    def remove_column_filters(self, filters: str | Iterable[str]):
+        if isinstance(filters, str):
+            filters = [filters]
+        removed = set(filters)
+        self.set_column_filters(
+            [col for col in self.column if col not in removed]
+        )
+
+
+def parse_filters(filters: Iterable[str]) -> dict[str, list[str]]:
+    """Parses filters such as 'geo=RO,BG' into {'geo': ['RO', 'BG']}.
+
+    Raises ValueError for a filter without a dimension or values."""
+    parsed: dict[str, list[str]] = {}
+    for filter_ in filters:
+        dim, sep, values = filter_.partition('=')
+        if not sep or not dim.strip() or not values.strip():
+            raise ValueError(
+                f'invalid filter {filter_!r}, expected DIMENSION=VALUE,...'
+            )
+        parsed.setdefault(dim.strip(), []).extend(
+            value.strip() for value in values.split(',') if value.strip()
+        )
+    return parsed
+
+
+def fetch_dataset(
+    database: Database,
+    code: str,
+    filters: dict[str, list[str]],
+    since: str | None,
+    until: str | None,
+    token: CancelToken
+) -> tuple[pd.DataFrame, float, float]:
+    """Downloads a dataset and applies the filters.
+
+    Returns the data and the time spent downloading and filtering."""
+    start = time.perf_counter()
+    dataset = Dataset(db=database, code=code)
+    try:
+        dataset.initialize_df(token=token, labels=False)
+        downloaded = time.perf_counter()
+        missing = [dim for dim in filters if dim not in dataset.params]
+        if missing:
+            raise ValueError(
+                f'{code} has no dimension {", ".join(missing)}, '
+                f'only {", ".join(dataset.params)}'
+            )
+        filterer = DataFilterer(dataset=dataset)
+        filterer.add_row_filters(filters)
+        filterer.set_period_range(since, until)
+        if dataset.is_partial:
+            # Only a preview was downloaded, see 'server_side_filtering'.
+            df = dataset.download(filterer.query, token=token).reindex(
+                columns=filterer.column
+            )
+        else:
+            df = filterer.apply_filters()
+    finally:
+        dataset.close()
+    return df, downloaded - start, time.perf_counter() - downloaded
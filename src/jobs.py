@@ -0,0 +1,220 @@
+"""Cooperative cancellation of the work done in the background, and
+the pool of threads which does it."""
+
+from __future__ import annotations
+
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator
+)
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import (
+    dataclass,
+    field
+)
+from functools import partial
+import heapq
+import itertools
+import logging
+import threading
+
+from .enums import JobPriority
+from .settings import GLOBAL_SETTINGS
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job after it was cancelled."""
+
+
+class CancelToken:
+    """Shared between a job and whoever is allowed to cancel it.
+
+    The job checks the token between its steps. The operations which
+    block for a long time, such as reading the body of a response,
+    register a callback which aborts them as soon as the job is
+    cancelled."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                # The job is stopped either way.
+                logger.exception('A cancel callback failed')
+
+    def wait(self, timeout: float) -> bool:
+        """Sleeps for 'timeout' seconds, unless the job is cancelled
+        before. Returns True if it was."""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise JobCancelled
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], None]) -> Iterator[None]:
+        """Calls 'callback' if the job is cancelled inside the block."""
+        with self._lock:
+            cancelled = self._event.is_set()
+            if not cancelled:
+                self._callbacks.append(callback)
+        if cancelled:
+            callback()
+            raise JobCancelled
+        try:
+            yield
+        finally:
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+
+
+@dataclass(order=True)
+class _Task:
+    priority: int
+    order: int
+    fn: Callable[[], Any] = field(compare=False)
+    future: Future = field(compare=False)
+
+
+class WorkerPool:
+    """A long-lived pool of threads shared by all the jobs of the plugin.
+
+    The queued jobs are started by priority, then in the order in which
+    they were submitted, and at most 'max_workers' of them run at the
+    same time. Waiting for a job with 'result' runs it in the calling
+    thread if no worker has started it yet, so that jobs can wait for
+    each other without exhausting the pool."""
+
+    def __init__(self, max_workers: int | None = None):
+        self._max_workers = max_workers
+        self._queue: list[_Task] = []
+        # The queued tasks which were not claimed by a thread yet.
+        self._pending: dict[Future, _Task] = {}
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._workers = 0
+        self._idle = 0
+        self._generation = 0
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers or GLOBAL_SETTINGS.max_workers
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args,
+        priority: JobPriority = JobPriority.FOREGROUND,
+        **kwargs
+    ) -> Future:
+        task = _Task(
+            priority=priority.value,
+            order=next(self._order),
+            fn=partial(fn, *args, **kwargs),
+            future=Future()
+        )
+        with self._condition:
+            heapq.heappush(self._queue, task)
+            self._pending[task.future] = task
+            if (
+                self._idle < len(self._pending)
+                and self._workers < self.max_workers
+            ):
+                self._workers += 1
+                threading.Thread(
+                    target=self._work,
+                    args=(self._generation,),
+                    name=f'eurostat-worker-{self._workers}',
+                    daemon=True
+                ).start()
+            else:
+                self._condition.notify()
+        return task.future
+
+    def result(self, future: Future) -> Any:
+        """Waits for the result of a job submitted to this pool."""
+        with self._condition:
+            task = self._pending.pop(future, None)
+        if task is not None:
+            self._run(task)
+        return future.result()
+
+    def map(
+        self,
+        fn: Callable[[Any], Any],
+        items: Iterable[Any],
+        priority: JobPriority = JobPriority.FOREGROUND
+    ) -> list[Any]:
+        """Calls 'fn' on each item, in parallel. All the calls are done
+        before the first exception, if any, is raised."""
+        futures = [self.submit(fn, item, priority=priority) for item in items]
+        for future in futures:
+            try:
+                self.result(future)
+            except Exception:
+                pass
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        """Cancels the queued jobs. The threads exit once their current
+        job is done, and new ones are started if the pool is used
+        again."""
+        with self._condition:
+            pending = list(self._pending)
+            self._pending.clear()
+            self._queue.clear()
+            self._generation += 1
+            self._condition.notify_all()
+        for future in pending:
+            future.cancel()
+
+    def _work(self, generation: int):
+        while True:
+            with self._condition:
+                while not self._queue and generation == self._generation:
+                    self._idle += 1
+                    self._condition.wait()
+                    self._idle -= 1
+                if generation != self._generation:
+                    self._workers -= 1
+                    return
+                task = heapq.heappop(self._queue)
+                if self._pending.pop(task.future, None) is None:
+                    # Already run by a thread which waited for it.
+                    continue
+            self._run(task)
+
+    @staticmethod
+    def _run(task: _Task):
+        if not task.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = task.fn()
+        except Exception as e:
+            task.future.set_exception(e)
+        else:
+            task.future.set_result(result)
+
+
+WORKER_POOL = WorkerPool()
@@ -243,6 +243,15 @@ class MissingModulesDialog(QtWidgets.QDialog):
                 .setBackground(QtGui.QColor(*color.value))
             )
 
+    def append_logs(self, text: str):
+        new_text = ''.join([
+            self.ui.labelLogs.text().strip(),
+            f'\n{text}'
+        ])
+        self.ui.labelLogs.setText(new_text)
+        vbar = self.ui.scrollAreaLogs.verticalScrollBar()
+        vbar.setValue(vbar.maximum())
+
     def install_missing_modules(self):
         if not MODULES_INSTALL_FOLDER.exists():
             MODULES_INSTALL_FOLDER.mkdir()
@@ -254,6 +263,7 @@ class MissingModulesDialog(QtWidgets.QDialog):
             lambda: self.ui.tabWidgetMain.setCurrentWidget(self.ui.tabLogs)
         )
         installer.subprocess_result.connect(self.handle_completed_modules)
+        installer.log_written.connect(self.append_logs)
         installer.finished.connect(
             lambda: self.ui.labelProcessFinished.setText(
                 ('Process finished. You can close the window now.')
@@ -265,6 +275,8 @@ class MissingModulesDialog(QtWidgets.QDialog):
 class MissingModulesInstaller(QtCore.QThread):
 
     subprocess_result = QtCore.pyqtSignal(int, int)
+    # The logs are written by the dialog, in the GUI thread.
+    log_written = QtCore.pyqtSignal(str)
 
     def __init__(
         self,
@@ -273,7 +285,6 @@ class MissingModulesInstaller(QtCore.QThread):
     ):
         self.base = base
         super().__init__(self.base)
-        self.ui = self.base.ui
         self.module_states = module_states
 
     def run(self):
@@ -315,13 +326,7 @@ class MissingModulesInstaller(QtCore.QThread):
                 line = completed_process.stdout.readline()
                 line_str = line.decode(encoding='utf-8').strip()
                 if line_str:
-                    new_text = ''.join([
-                        self.ui.labelLogs.text().strip(),
-                        f'\n{line_str}'
-                    ])
-                    self.ui.labelLogs.setText(new_text)
-                    vbar = self.ui.scrollAreaLogs.verticalScrollBar()
-                    vbar.setValue(vbar.maximum())
+                    self.log_written.emit(line_str)
                 if (return_code := completed_process.poll()) is not None:
                     # if the return code is not 0, then append the standard
                     # error to the logs
@@ -333,10 +338,6 @@ class MissingModulesInstaller(QtCore.QThread):
                             line.decode('utf-8').strip() for line
                             in completed_process.stderr.readlines()
                         ])
-                        new_text = ''.join([
-                            self.ui.labelLogs.text().strip(),
-                            f'\n{text_to_append}'
-                        ])
-                        self.ui.labelLogs.setText(new_text)
+                        self.log_written.emit(text_to_append)
                     break
             self.subprocess_result.emit(table_row, return_code)
@@ -0,0 +1,203 @@
+"""A shared HTTP session used for every request sent to the Eurostat API."""
+
+from __future__ import annotations
+
+from typing import Any
+from dataclasses import dataclass
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .settings import (
+    GLOBAL_SETTINGS,
+    GlobalSettings,
+    ProxySettings
+)
+
+
+# Responses which are worth retrying after a while.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# The page the requests are redirected to when the API is unavailable.
+UNAVAILABLE_URL = 'https://sorry.ec.europa.eu/'
+
+
+def get_proxies(proxy: ProxySettings | None) -> dict[str, str]:
+    """Converts the proxy settings to the format used by 'requests'."""
+    if proxy is None or not (proxy.host and proxy.port):
+        return {}
+    credentials = ''
+    if proxy.user:
+        password = requests.utils.quote(proxy.password or '')
+        credentials = f'{proxy.user}:{password}@'
+    return {'https': f'http://{credentials}{proxy.host}:{proxy.port}'}
+
+
+def create_session(
+    pool_size: int = 10,
+    max_retries: int = 3,
+    backoff_factor: float = 0.5,
+    verify: bool = True,
+    proxies: dict[str, str] | None = None
+) -> requests.Session:
+    """Creates a session which keeps up to 'pool_size' connections alive
+    for each host and retries the requests which failed because of
+    rate limiting or server errors, waiting longer after each attempt."""
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+        respect_retry_after_header=True,
+        # The last response is returned, the caller checks the status.
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.verify = verify
+    if proxies:
+        session.proxies.update(proxies)
+    return session
+
+
+@dataclass(frozen=True)
+class RequestConfig:
+    """An immutable snapshot of the settings used to send requests.
+
+    Workers read the snapshot once, so they never see the global
+    settings half way through a change."""
+    version: int
+    verify: bool
+    proxies: tuple[tuple[str, str], ...]
+    timeout: float
+    pool_size: int
+    max_retries: int
+    backoff_factor: float
+
+    @classmethod
+    def from_settings(cls, settings: GlobalSettings) -> RequestConfig:
+        return cls(
+            version=settings.version,
+            verify=settings.verify_ssl,
+            proxies=tuple(get_proxies(settings.proxy).items()),
+            timeout=settings.timeout,
+            pool_size=settings.pool_size,
+            max_retries=settings.max_retries,
+            backoff_factor=settings.backoff_factor,
+        )
+
+    def as_kwargs(self) -> dict[str, Any]:
+        """The keyword arguments passed to each request."""
+        return {
+            'verify': self.verify,
+            'proxies': dict(self.proxies),
+            'timeout': self.timeout,
+        }
+
+
+_config: RequestConfig | None = None
+_config_lock = threading.Lock()
+
+
+def get_request_config() -> RequestConfig:
+    """Returns the snapshot of the current settings.
+
+    A new snapshot is only created after the settings were changed."""
+    global _config
+    config = _config
+    if config is not None and config.version == GLOBAL_SETTINGS.version:
+        return config
+    with _config_lock:
+        if _config is None or _config.version != GLOBAL_SETTINGS.version:
+            _config = RequestConfig.from_settings(GLOBAL_SETTINGS)
+        return _config
+
+
+class SessionManager:
+    """Holds the session shared by all the threads of the plugin.
+
+    The session is created again when the settings of the connection
+    pool or of the retries were changed."""
+
+    def __init__(self):
+        # The session and the settings it was created with, stored
+        # together so that both can be read in a single step.
+        self._current: tuple[tuple, requests.Session] | None = None
+        self._lock = threading.Lock()
+
+    def get_session(self, config: RequestConfig) -> requests.Session:
+        key = (
+            config.pool_size,
+            config.max_retries,
+            config.backoff_factor
+        )
+        current = self._current
+        if current is not None and current[0] == key:
+            return current[1]
+        with self._lock:
+            if self._current is None or self._current[0] != key:
+                if self._current is not None:
+                    self._current[1].close()
+                self._current = (
+                    key,
+                    create_session(
+                        pool_size=config.pool_size,
+                        max_retries=config.max_retries,
+                        backoff_factor=config.backoff_factor,
+                    )
+                )
+            return self._current[1]
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """Sends a GET request using the current settings."""
+        config = get_request_config()
+        return self.get_session(config).get(
+            url, **(config.as_kwargs() | kwargs)
+        )
+
+    def close(self):
+        with self._lock:
+            if self._current is not None:
+                self._current[1].close()
+                self._current = None
+
+
+SESSION_MANAGER = SessionManager()
+
+
+class SessionRequests:
+    """Stands in for the 'requests' module inside the 'eurostat' package,
+    so that its requests go through the shared session.
+
+    The proxy and the SSL verification only come from the settings
+    snapshot, see 'RequestConfig'. The arguments passed by 'eurostat'
+    are ignored."""
+    utils = requests.utils
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return SESSION_MANAGER.get(url)
+
+
+def get_raw_response(url: str, is_raise: bool) -> requests.Response | None:
+    """Stands in for the function of the 'eurostat' package which sends
+    each request up to four times until it succeeds.
+
+    The retries are left to the shared session, which waits between
+    them, so each request is only sent once from here. Otherwise, every
+    failed attempt of 'eurostat' would be retried by the session too."""
+    try:
+        response = SESSION_MANAGER.get(url)
+    except Exception:
+        if is_raise:
+            raise
+        return None
+    if response.url == UNAVAILABLE_URL:
+        raise ConnectionError(url)
+    return response
@@ -0,0 +1,370 @@
+"""The Processing algorithms of the plugin.
+
+The algorithms run in the QGIS task manager, can be chained in the
+graphical modeler and run in batch mode. The features are written to
+the output sink in chunks, like the layers created by the dialog."""
+
+from __future__ import annotations
+
+from typing import Any
+import itertools
+import threading
+
+import pandas as pd
+from qgis.PyQt import QtGui
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsFeature,
+    QgsFeatureSink,
+    QgsField,
+    QgsFields,
+    QgsProcessing,
+    QgsProcessingAlgorithm,
+    QgsProcessingContext,
+    QgsProcessingException,
+    QgsProcessingFeedback,
+    QgsProcessingMultiStepFeedback,
+    QgsProcessingParameterFeatureSink,
+    QgsProcessingParameterFeatureSource,
+    QgsProcessingParameterField,
+    QgsProcessingParameterString,
+    QgsProcessingProvider,
+    QgsWkbTypes
+)
+
+from .core import (
+    CancelToken,
+    Database,
+    JobCancelled,
+    create_database,
+    fetch_dataset,
+    parse_filters
+)
+from .converter import (
+    FEATURE_CHUNK_SIZE,
+    QgsConverter
+)
+from .enums import GeoSectionName
+
+
+ICON_PATH = ':/plugins/eurostat_downloader/assets/icon.png'
+
+
+class EurostatProvider(QgsProcessingProvider):
+    """Groups the algorithms of the plugin in the Processing toolbox.
+
+    The table of contents is loaded once, by the first algorithm which
+    needs it, and is shared by all the algorithms, which may run in
+    parallel."""
+
+    def __init__(self, database: Database | None = None):
+        super().__init__()
+        self._database = database
+        self._database_lock = threading.Lock()
+
+    def id(self):
+        return 'eurostat'
+
+    def name(self):
+        return 'Eurostat downloader'
+
+    def icon(self):
+        return QtGui.QIcon(ICON_PATH)
+
+    def loadAlgorithms(self):
+        self.addAlgorithm(FetchDatasetAlgorithm())
+        self.addAlgorithm(JoinDatasetAlgorithm())
+
+    def get_database(self) -> Database:
+        with self._database_lock:
+            if self._database is None:
+                database = create_database()
+                database.initialize_toc()
+                # Nothing waits for a background refresh here.
+                if database.has_stale_toc:
+                    database.revalidate_toc()
+                self._database = database
+            return self._database
+
+
+class DatasetAlgorithm(QgsProcessingAlgorithm):
+    """Downloads and filters a dataset, like the 'fetch' command."""
+
+    DATASET = 'DATASET'
+    FILTERS = 'FILTERS'
+    SINCE = 'SINCE'
+    UNTIL = 'UNTIL'
+    OUTPUT = 'OUTPUT'
+
+    def group(self):
+        return 'Datasets'
+
+    def groupId(self):
+        return 'datasets'
+
+    def icon(self):
+        return QtGui.QIcon(ICON_PATH)
+
+    def createInstance(self):
+        return type(self)()
+
+    def add_dataset_parameters(self):
+        self.addParameter(
+            QgsProcessingParameterString(
+                self.DATASET, 'Dataset code'
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterString(
+                self.FILTERS,
+                'Filters, such as geo=RO,BG;unit=NR',
+                optional=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterString(
+                self.SINCE,
+                'First time period, such as 2015 or 2015-01',
+                optional=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterString(
+                self.UNTIL,
+                'Last time period, such as 2020 or 2020-12',
+                optional=True
+            )
+        )
+
+    def get_dataset(
+        self,
+        parameters: dict[str, Any],
+        context: QgsProcessingContext,
+        feedback: QgsProcessingFeedback
+    ) -> pd.DataFrame | None:
+        """Returns the filtered dataset, or None if the algorithm was
+        cancelled."""
+        code = self.parameterAsString(parameters, self.DATASET, context)
+        filters = self.parameterAsString(parameters, self.FILTERS, context)
+        since = self.parameterAsString(parameters, self.SINCE, context)
+        until = self.parameterAsString(parameters, self.UNTIL, context)
+        try:
+            parsed = parse_filters(
+                filter_ for filter_ in filters.split(';') if filter_.strip()
+            )
+        except ValueError as e:
+            raise QgsProcessingException(str(e))
+        token = CancelToken()
+        feedback.canceled.connect(token.cancel)
+        if feedback.isCanceled():
+            token.cancel()
+        try:
+            database = self.provider().get_database()
+            if database.get_agency(code.strip()) is None:
+                raise QgsProcessingException(f'Unknown dataset {code}.')
+            df, download_time, filter_time = fetch_dataset(
+                database,
+                code.strip(),
+                parsed,
+                since.strip() or None,
+                until.strip() or None,
+                token
+            )
+        except JobCancelled:
+            return None
+        except ValueError as e:
+            raise QgsProcessingException(str(e))
+        finally:
+            feedback.canceled.disconnect(token.cancel)
+        feedback.pushInfo(
+            f'{code}: {len(df):,} rows, downloaded in {download_time:.2f}s, '
+            f'filtered in {filter_time:.2f}s'
+        )
+        return df
+
+
+class FetchDatasetAlgorithm(DatasetAlgorithm):
+
+    def name(self):
+        return 'fetchdataset'
+
+    def displayName(self):
+        return 'Fetch dataset'
+
+    def shortHelpString(self):
+        return (
+            'Downloads a Eurostat dataset and writes the selected rows and '
+            'time periods to a table without geometries. The filters keep '
+            'the rows with the given values of each dimension.'
+        )
+
+    def initAlgorithm(self, config=None):
+        self.add_dataset_parameters()
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.OUTPUT, 'Dataset', QgsProcessing.TypeVector
+            )
+        )
+
+    def processAlgorithm(self, parameters, context, feedback):
+        df = self.get_dataset(parameters, context, feedback)
+        if df is None:
+            return {}
+        fields = QgsConverter.get_fields(df)
+        sink, dest_id = self.parameterAsSink(
+            parameters,
+            self.OUTPUT,
+            context,
+            fields,
+            QgsWkbTypes.NoGeometry,
+            QgsCoordinateReferenceSystem()
+        )
+        if sink is None:
+            raise QgsProcessingException(
+                self.invalidSinkError(parameters, self.OUTPUT)
+            )
+        try:
+            QgsConverter.write_features(df, sink, fields, feedback)
+        except JobCancelled:
+            return {}
+        return {self.OUTPUT: dest_id}
+
+
+class JoinDatasetAlgorithm(DatasetAlgorithm):
+
+    INPUT = 'INPUT'
+    FIELD = 'FIELD'
+    DATASET_FIELD = 'DATASET_FIELD'
+    PREFIX = 'PREFIX'
+
+    def name(self):
+        return 'joindataset'
+
+    def displayName(self):
+        return 'Join dataset to layer'
+
+    def shortHelpString(self):
+        return (
+            'Downloads a Eurostat dataset and copies the input layer, '
+            'adding the columns of the dataset row whose value of the '
+            'dataset field matches the layer field. The filters should '
+            'leave a single row for each value of the dataset field, '
+            'otherwise only the first one is joined.'
+        )
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(
+            QgsProcessingParameterFeatureSource(
+                self.INPUT, 'Input layer', [QgsProcessing.TypeVector]
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterField(
+                self.FIELD,
+                'Layer join field',
+                parentLayerParameterName=self.INPUT
+            )
+        )
+        self.add_dataset_parameters()
+        self.addParameter(
+            QgsProcessingParameterString(
+                self.DATASET_FIELD,
+                'Dataset join field',
+                defaultValue=GeoSectionName.GEO.value
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterString(
+                self.PREFIX, 'Joined fields prefix', optional=True
+            )
+        )
+        self.addParameter(
+            QgsProcessingParameterFeatureSink(
+                self.OUTPUT, 'Joined layer'
+            )
+        )
+
+    def processAlgorithm(self, parameters, context, feedback):
+        source = self.parameterAsSource(parameters, self.INPUT, context)
+        if source is None:
+            raise QgsProcessingException(
+                self.invalidSourceError(parameters, self.INPUT)
+            )
+        field = self.parameterAsString(parameters, self.FIELD, context)
+        dataset_field = self.parameterAsString(
+            parameters, self.DATASET_FIELD, context
+        )
+        prefix = self.parameterAsString(parameters, self.PREFIX, context)
+        field_idx = source.fields().lookupField(field)
+        if field_idx == -1:
+            raise QgsProcessingException(f'The layer has no field {field}.')
+
+        steps = QgsProcessingMultiStepFeedback(2, feedback)
+        df = self.get_dataset(parameters, context, steps)
+        if df is None:
+            return {}
+        if dataset_field not in df.columns:
+            raise QgsProcessingException(
+                f'The dataset has no field {dataset_field}.'
+            )
+        duplicated = df[dataset_field].duplicated()
+        if duplicated.any():
+            feedback.pushInfo(
+                f'{duplicated.sum():,} rows have the same {dataset_field} '
+                'as a previous row and are not joined.'
+            )
+            df = df.loc[~duplicated]
+        keys = df[dataset_field].astype(str).tolist()
+        df = df.drop(columns=dataset_field)
+        lookup = dict(
+            zip(keys, itertools.chain.from_iterable(
+                QgsConverter.iter_attributes(df)
+            ))
+        )
+        missing = [None] * df.shape[1]
+
+        fields = QgsFields(source.fields())
+        for joined in QgsConverter.get_fields(df):
+            fields.append(QgsField(f'{prefix}{joined.name()}', joined.type()))
+        sink, dest_id = self.parameterAsSink(
+            parameters,
+            self.OUTPUT,
+            context,
+            fields,
+            source.wkbType(),
+            source.sourceCrs()
+        )
+        if sink is None:
+            raise QgsProcessingException(
+                self.invalidSinkError(parameters, self.OUTPUT)
+            )
+
+        steps.setCurrentStep(1)
+        total = source.featureCount()
+        written = 0
+        matched = 0
+        features = source.getFeatures()
+        while not steps.isCanceled():
+            chunk = []
+            for feature in itertools.islice(features, FEATURE_CHUNK_SIZE):
+                key = feature.attribute(field_idx)
+                attributes = lookup.get(str(key))
+                if attributes is None:
+                    attributes = missing
+                else:
+                    matched += 1
+                joined = QgsFeature(fields)
+                joined.setGeometry(feature.geometry())
+                joined.setAttributes(feature.attributes() + attributes)
+                chunk.append(joined)
+            if not chunk:
+                break
+            if not sink.addFeatures(chunk, QgsFeatureSink.FastInsert):
+                raise QgsProcessingException(
+                    'Could not add the features to the layer.'
+                )
+            written += len(chunk)
+            if total > 0:
+                steps.setProgress(100 * written / total)
+        feedback.pushInfo(f'{matched:,} of {written:,} features were joined.')
+        return {self.OUTPUT: dest_id}
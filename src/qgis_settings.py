@@ -0,0 +1,62 @@
+"""Reads the settings which the plugin takes over from QGIS."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from qgis.core import (
+    QgsApplication,
+    QgsNetworkAccessManager,
+    QgsSettings
+)
+
+from .settings import (
+    GlobalSettings,
+    ProxySettings
+)
+
+
+def _get_qgis_proxy() -> None | ProxySettings:
+    # This function was taken from the QuickMapServices plugin.
+    # module https://github.com/nextgis/quickmapservices/blob/master/src/qgis_settings.py  # noqa
+    proxy_enabled = QGS_SETTINGS.value('proxy/proxyEnabled', u'', type=str)
+    proxy_type = QGS_SETTINGS.value('proxy/proxyType', u'', type=str)
+    proxy_host = QGS_SETTINGS.value('proxy/proxyHost', u'', type=str)
+    proxy_port = QGS_SETTINGS.value('proxy/proxyPort', u'', type=str)
+    proxy_user = QGS_SETTINGS.value('proxy/proxyUser', u'', type=str)
+    proxy_password = QGS_SETTINGS.value('proxy/proxyPassword', u'', type=str)
+
+    if proxy_enabled == 'true':
+        if proxy_type == 'DefaultProxy':
+            qgsNetMan = QgsNetworkAccessManager.instance()
+            proxy = qgsNetMan.proxy().applicationProxy()
+            proxy_host = proxy.hostName()
+            proxy_port = str(proxy.port())
+            proxy_user = proxy.user()
+            proxy_password = proxy.password()
+
+        if proxy_type in [
+            'DefaultProxy', 'Socks5Proxy', 'HttpProxy', 'HttpCachingProxy'
+        ]:
+            return ProxySettings(
+                proxy_host,
+                proxy_port,
+                proxy_user,
+                proxy_password
+            )
+
+    return None
+
+
+def apply_qgis_settings(settings: GlobalSettings):
+    """Uses the proxy of QGIS and a cache directory inside the QGIS
+    profile."""
+    settings.proxy = _get_qgis_proxy()
+    settings.cache_dir = (
+        Path(QgsApplication.qgisSettingsDirPath())
+        / 'eurostat_downloader'
+        / 'cache'
+    )
+
+
+QGS_SETTINGS = QgsSettings()
@@ -0,0 +1,147 @@
+"""Full-text search over the table of contents."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Iterable
+from dataclasses import (
+    dataclass,
+    field
+)
+import re
+
+import numpy as np
+import pandas as pd
+
+
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+# Scores given to the rows matched by a query term.
+EXACT_SCORE = 2
+PREFIX_SCORE = 1
+CODE_BONUS = 1
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def get_signature(codes: pd.Series, titles: pd.Series) -> int:
+    """A cheap fingerprint used to check if an index is out of date."""
+    hashed = pd.util.hash_pandas_object(
+        pd.DataFrame({'code': codes, 'title': titles}), index=False
+    )
+    return int(hashed.sum()) ^ len(hashed)
+
+
+def _to_postings(
+    postings: dict[str, set[int]],
+    tokens: list[str]
+) -> tuple[np.ndarray, np.ndarray]:
+    """Flattens the postings of the sorted tokens into a single array.
+
+    The rows of the i-th token are rows[offsets[i]:offsets[i + 1]],
+    which means that the rows of a range of tokens are contiguous."""
+    lengths = [len(postings.get(token, ())) for token in tokens]
+    offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    rows = np.fromiter(
+        (row for token in tokens for row in sorted(postings.get(token, ()))),
+        dtype=np.int32,
+        count=int(offsets[-1])
+    )
+    return rows, offsets
+
+
+@dataclass
+class TocIndex:
+    """An inverted index over the codes and the titles of the table
+    of contents.
+
+    Each query term matches every token that it is a prefix of, and
+    a row is returned only if it matches all the terms. Rows are ranked
+    by their score, so that exact token matches and code matches come
+    first.
+    """
+    size: int
+    signature: int
+    tokens: list[str]
+    code_postings: tuple[np.ndarray, np.ndarray]
+    title_postings: tuple[np.ndarray, np.ndarray]
+    _term_cache: dict[str, np.ndarray] = field(
+        init=False, default_factory=dict, repr=False
+    )
+
+    @classmethod
+    def build(cls, codes: pd.Series, titles: pd.Series) -> TocIndex:
+        code_postings: dict[str, set[int]] = {}
+        title_postings: dict[str, set[int]] = {}
+        for row, (code, title) in enumerate(zip(codes, titles)):
+            code = str(code).lower()
+            for token in (code, *tokenize(code)):
+                code_postings.setdefault(token, set()).add(row)
+            for token in tokenize(str(title)):
+                title_postings.setdefault(token, set()).add(row)
+        tokens = sorted(code_postings.keys() | title_postings.keys())
+        return cls(
+            size=len(codes),
+            signature=get_signature(codes, titles),
+            tokens=tokens,
+            code_postings=_to_postings(code_postings, tokens),
+            title_postings=_to_postings(title_postings, tokens),
+        )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_term_cache'] = {}
+        return state
+
+    def _score_term(self, term: str) -> np.ndarray:
+        """Returns the score of each row for a single query term."""
+        if (scores := self._term_cache.get(term, None)) is not None:
+            return scores
+        scores = np.zeros(self.size, dtype=np.int8)
+        lo = bisect_left(self.tokens, term)
+        hi = bisect_left(self.tokens, term + '\uffff', lo=lo)
+        exact = lo < hi and self.tokens[lo] == term
+        # Scores are assigned in increasing order, so that a row keeps
+        # the highest score it gets.
+        for (rows, offsets), bonus in (
+            (self.title_postings, 0),
+            (self.code_postings, CODE_BONUS)
+        ):
+            scores[rows[offsets[lo]:offsets[hi]]] = PREFIX_SCORE + bonus
+            if exact:
+                scores[rows[offsets[lo]:offsets[lo + 1]]] = EXACT_SCORE + bonus
+        if len(self._term_cache) > 256:
+            self._term_cache.clear()
+        self._term_cache[term] = scores
+        return scores
+
+    def search(
+        self,
+        query: str,
+        within: Iterable[int] | None = None
+    ) -> np.ndarray:
+        """Returns the ranked row positions which match the query.
+
+        If 'within' is given, only those row positions are searched.
+        Their order does not matter, so narrowing down the results of a
+        previous query ranks them like a new search would.
+        """
+        if within is not None:
+            within = np.sort(np.asarray(within, dtype=np.int64))
+        terms = tokenize(query)
+        if not terms:
+            return np.arange(self.size) if within is None else within
+        total = np.zeros(self.size, dtype=np.int16)
+        matched = np.ones(self.size, dtype=bool)
+        for term in dict.fromkeys(terms):
+            scores = self._score_term(term)
+            matched &= scores > 0
+            total += scores
+        if within is not None:
+            rows = within[matched[within]]
+        else:
+            rows = np.flatnonzero(matched)
+        order = np.argsort(-total[rows], kind='stable')
+        return rows[order]
@@ -5,14 +5,16 @@ from dataclasses import (
     dataclass,
     field
 )
+from datetime import timedelta
+from pathlib import Path
+import os
+import sys
 
-from qgis.core import (
-    QgsNetworkAccessManager,
-    QgsSettings
+from .enums import (
+    Agency,
+    LayerStorage
 )
 
-from .enums import Agency
-
 
 class ProxySettings(NamedTuple):
     host: str
@@ -21,49 +23,72 @@ class ProxySettings(NamedTuple):
     password: None | str
 
 
-def _get_qgis_proxy() -> None | ProxySettings:
-    # This function was taken from the QuickMapServices plugin.
-    # module https://github.com/nextgis/quickmapservices/blob/master/src/qgis_settings.py  # noqa
-    proxy_enabled = QGS_SETTINGS.value('proxy/proxyEnabled', u'', type=unicode)
-    proxy_type = QGS_SETTINGS.value('proxy/proxyType', u'', type=unicode)
-    proxy_host = QGS_SETTINGS.value('proxy/proxyHost', u'', type=unicode)
-    proxy_port = QGS_SETTINGS.value('proxy/proxyPort', u'', type=unicode)
-    proxy_user = QGS_SETTINGS.value('proxy/proxyUser', u'', type=unicode)
-    proxy_password = QGS_SETTINGS.value('proxy/proxyPassword', u'', type=unicode)
-
-    if proxy_enabled == 'true':
-        if proxy_type == 'DefaultProxy':
-            qgsNetMan = QgsNetworkAccessManager.instance()
-            proxy = qgsNetMan.proxy().applicationProxy()
-            proxy_host = proxy.hostName()
-            proxy_port = str(proxy.port())
-            proxy_user = proxy.user()
-            proxy_password = proxy.password()
-
-        if proxy_type in [
-            'DefaultProxy', 'Socks5Proxy', 'HttpProxy', 'HttpCachingProxy'
-        ]:
-            return ProxySettings(
-                proxy_host,
-                proxy_port,
-                proxy_user,
-                proxy_password
-            )
-
-    return None
+def get_default_cache_dir() -> Path:
+    """The cache directory used outside of QGIS, which sets its own
+    (see 'qgis_settings.apply_qgis_settings')."""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA', '')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME', '')
+    root = Path(base) if base else Path.home() / '.cache'
+    return root / 'eurostat_downloader'
 
 
 @dataclass
 class GlobalSettings:
-    qgs_settings: QgsSettings
+    """The settings of the plugin.
+
+    This module does not depend on QGIS, so that the data can also be
+    downloaded from plain Python processes."""
     proxy: ProxySettings | None = None
     agencies: list[Agency] = field(default_factory=list)
     verify_ssl: bool = True
+    cache_dir: Path = field(default_factory=get_default_cache_dir)
+    toc_ttl: timedelta = timedelta(days=1)
+    # The labels of the dimension values, shared by all the datasets.
+    codelist_ttl: timedelta = timedelta(days=7)
+    codelist_max_entries: int = 500
+    # The downloaded datasets, the least recently used are removed first.
+    dataset_cache_max_entries: int = 100
+    dataset_cache_max_bytes: int = 2 * 2**30
+    # If True, stale table of contents entries are shown right away
+    # and refreshed in the background.
+    toc_background_revalidation: bool = True
+    # The number of threads of the worker pool shared by all the jobs.
+    max_workers: int = 8
+    # HTTP connection pool and retries of the shared session.
+    pool_size: int = 10
+    max_retries: int = 3
+    backoff_factor: float = 0.5
+    # Large tables can be written to a file instead of a memory layer.
+    layer_storage: LayerStorage = LayerStorage.MEMORY
+    timeout: float = 120.
+    # If True, only a preview of the datasets is downloaded when they
+    # are opened, and the tables are downloaded with the selected
+    # filters applied by the server.
+    server_side_filtering: bool = False
+    # Store the dimensions as categoricals and the values as float32,
+    # when this loses no precision.
+    compact_datasets: bool = True
+    # If True, the metadata of the dataset under the mouse or the
+    # keyboard cursor is loaded before it is opened, and so is the data
+    # of the small datasets. The downloads are limited to
+    # 'prefetch_max_bytes' compressed bytes each, received at most at
+    # 'prefetch_bytes_per_second'.
+    prefetch: bool = False
+    prefetch_datasets: bool = True
+    prefetch_max_bytes: int = 1024 * 1024
+    prefetch_bytes_per_second: int = 256 * 1024
+    # Incremented every time a setting is changed.
+    version: int = field(init=False, default=0)
 
     def __post_init__(self):
         self.agencies = list(Agency)
-        self.proxy = _get_qgis_proxy()
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name != 'version':
+            super().__setattr__('version', getattr(self, 'version', 0) + 1)
 
 
-QGS_SETTINGS = QgsSettings()
-GLOBAL_SETTINGS = GlobalSettings(qgs_settings=QGS_SETTINGS)
+GLOBAL_SETTINGS = GlobalSettings()
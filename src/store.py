@@ -0,0 +1,203 @@
+"""The long (tidy) representation of the datasets."""
+
+from __future__ import annotations
+
+from typing import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class TidyStore:
+    """Stores a dataset as observations sorted by time period.
+
+    Each row of 'keys' holds the dimensions of a series (a row of the
+    wide table). The observations of the i-th period are found in
+    series[bounds[i]:bounds[i + 1]] and values[bounds[i]:bounds[i + 1]],
+    so selecting a range of periods is a slice. Missing observations
+    are not stored.
+
+    The wide table, with one column per period, is only built for the
+    rows and periods which are shown or exported, see 'to_wide'.
+    """
+    keys: pd.DataFrame
+    periods: pd.Index
+    series: np.ndarray
+    values: np.ndarray
+    bounds: np.ndarray
+
+    @classmethod
+    def from_wide(
+        cls,
+        df: pd.DataFrame,
+        n_dims: int | None = None
+    ) -> TidyStore:
+        """Builds the store from a wide table, whose first 'n_dims'
+        columns are the dimensions.
+
+        If not given, the dimensions are the leading non-numeric
+        columns, which also counts a time period without observations
+        read as an object column."""
+        if n_dims is None:
+            n_dims = 0
+            for _, series in df.items():
+                if pd.api.types.is_numeric_dtype(series.dtype):
+                    break
+                n_dims += 1
+        keys = df.iloc[:, :n_dims].reset_index(drop=True)
+        wide = df.iloc[:, n_dims:]
+        wide.columns = wide.columns.astype(str)
+        if not wide.columns.is_monotonic_increasing:
+            wide = wide.sort_index(axis=1)
+        dtype = (
+            np.float32
+            if all(dtype == np.float32 for dtype in wide.dtypes)
+            else np.float64
+        )
+        series_parts = []
+        value_parts = []
+        counts = []
+        for _, column in wide.items():
+            values = column.to_numpy(dtype=dtype)
+            rows = np.flatnonzero(~np.isnan(values))
+            series_parts.append(rows.astype(np.int32))
+            value_parts.append(values[rows])
+            counts.append(len(rows))
+        bounds = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=bounds[1:])
+        return cls(
+            keys=keys,
+            periods=wide.columns,
+            series=(
+                np.concatenate(series_parts) if series_parts
+                else np.empty(0, dtype=np.int32)
+            ),
+            values=(
+                np.concatenate(value_parts) if value_parts
+                else np.empty(0, dtype=dtype)
+            ),
+            bounds=bounds
+        )
+
+    @classmethod
+    def concat(cls, stores: Sequence[TidyStore]) -> TidyStore:
+        """Joins stores with the same dimensions and periods, such as the
+        chunks of a dataset built while it is downloaded. The series of
+        each store follow the ones of the previous store."""
+        if not stores:
+            raise ValueError('No stores to concatenate.')
+        first = stores[0]
+        if len(stores) == 1:
+            return first
+        for store in stores[1:]:
+            if (
+                store.dims != first.dims
+                or not store.periods.equals(first.periods)
+            ):
+                raise ValueError('The stores have different columns.')
+        offsets = np.cumsum([0] + [len(store) for store in stores[:-1]])
+        dtype = np.result_type(*(store.values.dtype for store in stores))
+        series_parts = []
+        value_parts = []
+        counts = []
+        for period in range(len(first.periods)):
+            count = 0
+            for store, offset in zip(stores, offsets):
+                lo, hi = store.bounds[period], store.bounds[period + 1]
+                series_parts.append(
+                    (store.series[lo:hi] + offset).astype(np.int32)
+                )
+                value_parts.append(store.values[lo:hi].astype(dtype))
+                count += hi - lo
+            counts.append(count)
+        bounds = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=bounds[1:])
+        return cls(
+            keys=concat_keys([store.keys for store in stores]),
+            periods=first.periods,
+            series=(
+                np.concatenate(series_parts) if series_parts
+                else np.empty(0, dtype=np.int32)
+            ),
+            values=(
+                np.concatenate(value_parts) if value_parts
+                else np.empty(0, dtype=dtype)
+            ),
+            bounds=bounds
+        )
+
+    @property
+    def dims(self) -> list[str]:
+        return self.keys.columns.to_list()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def time_slice(self, start: str | None, end: str | None) -> slice:
+        """Returns the positions of the periods from 'start' to 'end'.
+
+        The periods do not have to be stored, since those of the same
+        frequency are sorted like strings."""
+        return self.periods.slice_indexer(start, end)
+
+    def to_wide(
+        self,
+        rows: np.ndarray | None = None,
+        periods: slice = slice(None),
+        dims: list[str] | None = None
+    ) -> pd.DataFrame:
+        """Builds the wide table of the selected series and periods.
+
+        'rows' is a boolean mask of the series, and 'dims' the dimension
+        columns to include."""
+        start, stop, _ = periods.indices(len(self.periods))
+        stop = max(start, stop)
+        keys = self.keys if dims is None else self.keys.loc[:, dims]
+        lo, hi = self.bounds[start], self.bounds[stop]
+        series = self.series[lo:hi]
+        values = self.values[lo:hi]
+        columns = np.repeat(
+            np.arange(stop - start), np.diff(self.bounds[start:stop + 1])
+        )
+        if rows is not None:
+            keys = keys.loc[rows]
+            positions = np.full(len(self.keys), -1, dtype=np.int64)
+            positions[rows] = np.arange(len(keys))
+            series = positions[series]
+            found = series >= 0
+            series, columns, values = (
+                series[found], columns[found], values[found]
+            )
+        wide = np.full((len(keys), stop - start), np.nan, self.values.dtype)
+        wide[series, columns] = values
+        return pd.concat([
+            keys,
+            pd.DataFrame(
+                wide, index=keys.index, columns=self.periods[start:stop]
+            )
+        ], axis=1)
+
+    def memory_usage(self) -> int:
+        return int(
+            self.keys.memory_usage(deep=True).sum()
+            + self.series.nbytes
+            + self.values.nbytes
+            + self.bounds.nbytes
+        )
+
+
+def concat_keys(frames: Sequence[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenates the dimensions of the stores. The categoricals stay
+    categoricals, even when their categories differ."""
+    columns = {}
+    for col in frames[0].columns:
+        parts = [frame[col] for frame in frames]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            columns[col] = pd.Series(
+                pd.api.types.union_categoricals(parts), name=col
+            )
+        else:
+            columns[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
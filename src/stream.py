@@ -0,0 +1,304 @@
+"""Downloads the TSV files of the datasets and parses them while they
+are still being received."""
+
+from __future__ import annotations
+
+from typing import (
+    Callable,
+    Iterable,
+    Iterator
+)
+from functools import partial
+import io
+import re
+import socket
+import time
+import zlib
+
+import pandas as pd
+import requests
+
+from .network import SESSION_MANAGER
+from .enums import Agency
+from .jobs import (
+    CancelToken,
+    JobCancelled
+)
+
+
+# The same services as in the 'eurostat' package.
+BASE_URLS = {
+    Agency.EUROSTAT: 'https://ec.europa.eu/eurostat/api/dissemination/sdmx/2.1/',  # noqa
+    Agency.COMEXT: 'https://ec.europa.eu/eurostat/api/comext/dissemination/sdmx/2.1/',  # noqa
+    Agency.COMP: 'https://webgate.ec.europa.eu/comp/redisstat/api/dissemination/sdmx/2.1/',  # noqa
+    Agency.EMPL: 'https://webgate.ec.europa.eu/empl/redisstat/api/dissemination/sdmx/2.1/',  # noqa
+    Agency.GROW: 'https://webgate.ec.europa.eu/grow/redisstat/api/dissemination/sdmx/2.1/',  # noqa
+}
+GZIP_MAGIC = b'\x1f\x8b'
+FLAGS_PATTERN = re.compile(rb' [^\t\n]*')
+# The size of the compressed pieces read from the connection.
+READ_SIZE = 64 * 1024
+# The first chunk is small, so that the first rows are shown quickly.
+# The next ones are larger, up to MAX_CHUNK_SIZE decompressed bytes.
+FIRST_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class NotStreamableError(Exception):
+    """Raised when the response is not a compressed TSV file.
+
+    This is the case of the large datasets which are prepared
+    asynchronously by the server, and of the errors."""
+
+
+class DatasetTooLargeError(Exception):
+    """Raised when a download receives more bytes than it is allowed."""
+
+
+def get_data_url(
+    agency: Agency,
+    code: str,
+    key: str = '',
+    start_period: str | None = None,
+    end_period: str | None = None
+) -> str:
+    """Builds the URL of the TSV file of a dataset.
+
+    The key selects the values of each dimension, in the order of the
+    dimensions, such as 'A.NR+PC..RO'. An empty part selects all the
+    values of that dimension."""
+    path = f'{code}/{key}' if key.strip('.') else code
+    query = ''
+    if start_period is not None:
+        query += f'startPeriod={start_period}&'
+    if end_period is not None:
+        query += f'endPeriod={end_period}&'
+    return (
+        f'{BASE_URLS[agency]}data/{path}?{query}format=TSV&compressed=true'
+    )
+
+
+def parse_header(line: bytes) -> list[str]:
+    """Parses a header such as 'freq,unit,geo\\TIME_PERIOD\\t2020 \\t2021'.
+
+    The dimensions come before the tab, separated by commas."""
+    dims, *periods = line.decode('utf-8').rstrip('\r\n').split('\t')
+    return [
+        name.replace(r'\TIME_PERIOD', '').strip() for name in dims.split(',')
+    ] + [period.strip() for period in periods]
+
+
+def parse_rows(data: bytes, columns: list[str], n_dims: int) -> pd.DataFrame:
+    """Parses complete TSV lines into a frame.
+
+    The values are numbers optionally followed by flags ('1.5 p'),
+    while the missing ones are written as ':'. Both the flags and the
+    missing values are dropped, like 'eurostat.get_data_df' does."""
+    # The dimensions are separated by commas, which are not found
+    # anywhere else, and the flags come after a space.
+    data = FLAGS_PATTERN.sub(b'', data.replace(b'\r', b''))
+    data = data.replace(b',', b'\t')
+    values = columns[n_dims:]
+    try:
+        return pd.read_csv(
+            io.BytesIO(data),
+            sep='\t',
+            header=None,
+            names=columns,
+            dtype=dict.fromkeys(columns[:n_dims], str)
+            | dict.fromkeys(values, 'float64'),
+            na_values=dict.fromkeys(values, [':']),
+            keep_default_na=False,
+        )
+    except ValueError:
+        # Some value is not a number, which is much slower to handle.
+        df = pd.read_csv(
+            io.BytesIO(data),
+            sep='\t',
+            header=None,
+            names=columns,
+            dtype=str,
+            keep_default_na=False,
+        )
+        for column in values:
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+        return df
+
+
+def iter_decompressed(pieces: Iterable[bytes]) -> Iterator[bytes]:
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for piece in pieces:
+        if data := decompressor.decompress(piece):
+            yield data
+    if data := decompressor.flush():
+        yield data
+
+
+def iter_chunks(
+    pieces: Iterable[bytes],
+    first_chunk_size: int = FIRST_CHUNK_SIZE,
+    max_chunk_size: int = MAX_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """Parses the decompressed TSV file into frames of complete rows.
+
+    Only the rows of the current chunk are held in memory at a time,
+    not the whole file."""
+    buffer = bytearray()
+    columns: list[str] | None = None
+    n_dims = 0
+    chunk_size = first_chunk_size
+    parsed = False
+    for data in iter_decompressed(pieces):
+        buffer += data
+        if columns is None:
+            end = buffer.find(b'\n')
+            if end == -1:
+                continue
+            columns = parse_header(bytes(buffer[:end]))
+            n_dims = len(columns) - buffer[:end].count(b'\t')
+            del buffer[:end + 1]
+        if len(buffer) < chunk_size:
+            continue
+        end = buffer.rfind(b'\n')
+        if end == -1:
+            continue
+        yield parse_rows(bytes(buffer[:end + 1]), columns, n_dims)
+        parsed = True
+        del buffer[:end + 1]
+        chunk_size = min(chunk_size * 2, max_chunk_size)
+    if columns is None:
+        if not buffer.strip():
+            return
+        # A header which is not followed by any row.
+        columns = parse_header(bytes(buffer))
+        buffer.clear()
+    if buffer.strip():
+        yield parse_rows(bytes(buffer), columns, n_dims)
+    elif not parsed:
+        # A filtered request can select no rows at all.
+        yield pd.DataFrame(columns=columns)
+
+
+def abort_response(response: requests.Response):
+    """Closes a response which may be read by another thread.
+
+    Closing the response alone does not wake up a read which is blocked
+    waiting for data, shutting down the socket does."""
+    raw = response.raw
+    sock = getattr(getattr(raw, 'connection', None), 'sock', None)
+    if sock is None:
+        # The connection is not kept alive, and the socket is only
+        # referenced by the body of the response.
+        body = getattr(getattr(raw, '_fp', None), 'fp', None)
+        sock = getattr(getattr(body, 'raw', None), '_sock', None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    response.close()
+
+
+def iter_pieces(
+    pieces: Iterable[bytes],
+    token: CancelToken | None
+) -> Iterator[bytes]:
+    """Stops reading the response once the job is cancelled.
+
+    The connection is aborted by the token, which makes a blocked read
+    fail, so the failure is turned into JobCancelled."""
+    try:
+        for piece in pieces:
+            if token is not None:
+                token.raise_if_cancelled()
+            yield piece
+    except Exception:
+        if token is not None and token.cancelled:
+            raise JobCancelled from None
+        raise
+
+
+def iter_limited(
+    pieces: Iterable[bytes],
+    token: CancelToken,
+    max_bytes: int | None = None,
+    bytes_per_second: float | None = None
+) -> Iterator[bytes]:
+    """Raises DatasetTooLargeError once more than 'max_bytes' were
+    received, and waits between the pieces so that they are received
+    at most at 'bytes_per_second', on average."""
+    start = time.monotonic()
+    received = 0
+    for piece in pieces:
+        received += len(piece)
+        if max_bytes is not None and received > max_bytes:
+            raise DatasetTooLargeError(f'more than {max_bytes} bytes')
+        if bytes_per_second:
+            delay = received / bytes_per_second - (time.monotonic() - start)
+            if delay > 0 and token.wait(delay):
+                raise JobCancelled
+        yield piece
+
+
+def stream_dataset(
+    url: str,
+    token: CancelToken | None = None,
+    max_bytes: int | None = None,
+    bytes_per_second: float | None = None
+) -> Iterator[pd.DataFrame]:
+    """Downloads the dataset and yields its rows, chunk by chunk.
+
+    Raises NotStreamableError before yielding anything if the response
+    is not a compressed TSV file, such as an HTTP error, and
+    JobCancelled if 'token' was
+    cancelled, even in the middle of a read. The compressed response
+    can be limited in size and speed, see 'iter_limited'."""
+    if token is None:
+        token = CancelToken()
+    token.raise_if_cancelled()
+    with SESSION_MANAGER.get(url, stream=True) as response:
+        with token.on_cancel(partial(abort_response, response)):
+            if not response.ok:
+                # Left to the 'eurostat' package, like the other
+                # responses which cannot be streamed.
+                raise NotStreamableError(
+                    f'{url}: HTTP {response.status_code}'
+                )
+            pieces = iter_pieces(response.iter_content(READ_SIZE), token)
+            if max_bytes is not None or bytes_per_second:
+                pieces = iter_limited(
+                    pieces, token, max_bytes, bytes_per_second
+                )
+            first = next(pieces, b'')
+            if not first.startswith(GZIP_MAGIC):
+                raise NotStreamableError(url)
+
+            def all_pieces():
+                yield first
+                yield from pieces
+
+            yield from iter_chunks(all_pieces())
+
+
+def download_dataset(
+    url: str,
+    on_chunk: Callable[[pd.DataFrame], None] | None = None,
+    token: CancelToken | None = None,
+    max_bytes: int | None = None,
+    bytes_per_second: float | None = None
+) -> pd.DataFrame:
+    """Downloads the whole dataset, passing each chunk to 'on_chunk'
+    as soon as it was parsed."""
+    chunks = []
+    for chunk in stream_dataset(
+        url,
+        token=token,
+        max_bytes=max_bytes,
+        bytes_per_second=bytes_per_second
+    ):
+        chunks.append(chunk)
+        if on_chunk is not None:
+            on_chunk(chunk)
+    if not chunks:
+        raise NotStreamableError(url)
+    return pd.concat(chunks, ignore_index=True)
@@ -0,0 +1,105 @@
+"""Runs the jobs of the plugin as tasks of the QGIS task manager."""
+
+from __future__ import annotations
+
+from typing import Any
+from functools import partial
+
+from qgis.PyQt import QtCore
+from qgis.core import (
+    QgsApplication,
+    QgsTask
+)
+
+from .core import (
+    WORKER_POOL,
+    CancelToken,
+    JobCancelled,
+    JobPriority
+)
+
+
+class Job(QgsTask):
+    """A task which can be cancelled while it is running.
+
+    The work is done in 'work', which checks 'token' between its steps.
+    Exactly one of 'succeeded', 'cancelled' and 'error_ocurred' is
+    emitted, followed by 'done', in the GUI thread. 'succeeded' carries
+    the value returned by 'work'.
+
+    Jobs only produce data, and never touch the widgets. The results
+    are applied by the slots connected to their signals."""
+    succeeded = QtCore.pyqtSignal(object)
+    cancelled = QtCore.pyqtSignal()
+    error_ocurred = QtCore.pyqtSignal(Exception, name="errorOcurred")
+    done = QtCore.pyqtSignal()
+    priority = JobPriority.FOREGROUND
+
+    def __init__(self, base: Any, description: str):
+        super().__init__(description, QgsTask.CanCancel)
+        self.base = base
+        self.token = CancelToken()
+        self._result: Any = None
+        self._error: Exception | None = None
+
+    def cancel(self):
+        self.token.cancel()
+        super().cancel()
+
+    def work(self) -> Any:
+        raise NotImplementedError
+
+    def run(self) -> bool:
+        try:
+            self._result = self.work()
+            self.token.raise_if_cancelled()
+        except JobCancelled:
+            return False
+        except Exception as e:
+            self._error = e
+            return False
+        return True
+
+    def finished(self, result: bool):
+        # Called by the task manager, in the GUI thread, also when the
+        # job was cancelled before it started.
+        if result:
+            self.succeeded.emit(self._result)
+        elif self._error is not None:
+            self.error_ocurred.emit(self._error)
+        else:
+            self.cancelled.emit()
+        self.done.emit()
+
+
+class JobScheduler:
+    """Starts the jobs of the plugin, which are shown in the QGIS task
+    manager and run by its threads, the most urgent first.
+
+    The work fanned out by the jobs, such as the downloads, runs on
+    the shared WORKER_POOL, which limits how many requests are made at
+    the same time. The running jobs are referenced here, because the
+    task manager does not keep their Python objects alive."""
+
+    def __init__(self):
+        self._jobs: set[Job] = set()
+
+    @property
+    def jobs(self) -> list[Job]:
+        return list(self._jobs)
+
+    def start(self, job: Job) -> Job:
+        self._jobs.add(job)
+        job.done.connect(partial(self._jobs.discard, job))
+        QgsApplication.taskManager().addTask(job, -job.priority.value)
+        return job
+
+    def shutdown(self):
+        """Cancels the jobs and the queued work, when the plugin is
+        unloaded."""
+        for job in self.jobs:
+            job.cancel()
+        WORKER_POOL.shutdown()
+
+
+SCHEDULER = JobScheduler()
@@ -38,7 +38,8 @@ class UIDialog:
         self.lineSearch.setObjectName("lineSearch")
         self.horizontalLayout.addWidget(self.lineSearch)
         self.verticalLayout.addLayout(self.horizontalLayout)
-        self.listDatabase = QtWidgets.QListWidget(EurostatDialogBase)
+        self.listDatabase = QtWidgets.QListView(EurostatDialogBase)
+        self.listDatabase.setUniformItemSizes(True)
         self.listDatabase.setObjectName("listDatabase")
         self.verticalLayout.addWidget(self.listDatabase)
         self.frameMainWindowJoinData = QtWidgets.QFrame(EurostatDialogBase)
@@ -315,6 +316,23 @@ class UiSettingsDialog(object):
         self.checkBoxVerifySSL.setChecked(True)
         self.checkBoxVerifySSL.setObjectName("checkBoxVerifySSL")
         self.verticalLayout_3.addWidget(self.checkBoxVerifySSL)
+        self.checkBoxServerSideFiltering = QtWidgets.QCheckBox(self.frame)
+        self.checkBoxServerSideFiltering.setChecked(False)
+        self.checkBoxServerSideFiltering.setObjectName("checkBoxServerSideFiltering")
+        self.verticalLayout_3.addWidget(self.checkBoxServerSideFiltering)
+        self.checkBoxPrefetch = QtWidgets.QCheckBox(self.frame)
+        self.checkBoxPrefetch.setChecked(False)
+        self.checkBoxPrefetch.setObjectName("checkBoxPrefetch")
+        self.verticalLayout_3.addWidget(self.checkBoxPrefetch)
+        self.labelLayerStorage = QtWidgets.QLabel(self.frame)
+        self.labelLayerStorage.setObjectName("labelLayerStorage")
+        self.verticalLayout_3.addWidget(self.labelLayerStorage)
+        self.comboBoxLayerStorage = QtWidgets.QComboBox(self.frame)
+        self.comboBoxLayerStorage.setObjectName("comboBoxLayerStorage")
+        self.verticalLayout_3.addWidget(self.comboBoxLayerStorage)
+        self.pushButtonClearLayerFiles = QtWidgets.QPushButton(self.frame)
+        self.pushButtonClearLayerFiles.setObjectName("pushButtonClearLayerFiles")
+        self.verticalLayout_3.addWidget(self.pushButtonClearLayerFiles)
         self.verticalLayout_11.addLayout(self.verticalLayout_3)
         self.verticalLayout_10 = QtWidgets.QVBoxLayout()
         self.verticalLayout_10.setObjectName("verticalLayout_10")
@@ -409,6 +427,14 @@ class UiSettingsDialog(object):
         SettingsDialog.setWindowTitle(_translate("SettingsDialog", "Settings"))
         self.label_2.setText(_translate("SettingsDialog", "<html><head/><body><p><span style=\" font-size:12pt; font-weight:600;\">Connection</span></p></body></html>"))
         self.checkBoxVerifySSL.setText(_translate("SettingsDialog", "Verify SSL"))
+        self.checkBoxServerSideFiltering.setToolTip(_translate("SettingsDialog", "Only download a preview when a dataset is opened, and download the filtered tables from the server"))
+        self.checkBoxServerSideFiltering.setText(_translate("SettingsDialog", "Filter on the server"))
+        self.checkBoxPrefetch.setToolTip(_translate("SettingsDialog", "Load the dataset under the mouse or the keyboard cursor in the background, so that it opens faster. Only the datasets smaller than 1 MB are downloaded"))
+        self.checkBoxPrefetch.setText(_translate("SettingsDialog", "Prefetch datasets"))
+        self.labelLayerStorage.setText(_translate("SettingsDialog", "Store the table layers in"))
+        self.comboBoxLayerStorage.setToolTip(_translate("SettingsDialog", "Large tables use less memory when they are written to a file in the cache directory, which is kept for the saved projects"))
+        self.pushButtonClearLayerFiles.setToolTip(_translate("SettingsDialog", "Removes the files of the table layers which are not used by the open project"))
+        self.pushButtonClearLayerFiles.setText(_translate("SettingsDialog", "Remove unused layer files"))
         self.label_3.setText(_translate("SettingsDialog", "<html><head/><body><p><span style=\" font-weight:600;\">Proxy (defaults to QGIS settings)</span></p></body></html>"))
         self.labelProxyHost.setText(_translate("SettingsDialog", "Host"))
         self.labelProxyPort.setText(_translate("SettingsDialog", "Port"))
@@ -0,0 +1,161 @@
+# coding=utf-8
+"""Benchmarks of the plugin, kept out of the unit tests.
+
+Run from the root of the repository with:
+
+    PYTHONPATH=.:test python test/benchmarks.py
+
+The table model benchmark runs only if QGIS is installed.
+"""
+
+__author__ = 'cuvuliucalexandrei@gmail.com'
+__date__ = '2024-05-01'
+__copyright__ = 'Copyright 2024, Cuvuliuc Alex-Andrei'
+
+import concurrent.futures
+import threading
+import time
+import timeit
+
+import pandas as pd
+import requests
+
+from src.enums import Agency
+from src.network import create_session
+from src.search import TocIndex
+from src.store import TidyStore
+from src.stream import iter_chunks
+
+from test_data import make_database
+from test_network import StubServer
+from test_search import (
+    CODES,
+    TITLES
+)
+from test_store import make_wide
+from test_stream import (
+    make_tsv,
+    split
+)
+
+
+def toc_access():
+    """A keystroke accesses the table of contents about six times
+    (see 'Dialog.filter_toc'), which should not scale with the number
+    of agencies."""
+    database = make_database()
+    accesses = 6 * 100
+
+    def access():
+        database.toc
+
+    def rebuild():
+        database._toc_frames.clear()
+        database.toc
+
+    access_time = timeit.timeit(access, number=accesses)
+    rebuild_time = timeit.timeit(rebuild, number=accesses)
+    print(
+        f'toc: {accesses} accesses over {len(Agency)} agencies, '
+        f'{access_time:.4f}s materialized, {rebuild_time:.4f}s rebuilt'
+    )
+
+
+def search():
+    size = 10_000
+    codes = pd.Series([f'{CODES[i % 4]}_{i}' for i in range(size)])
+    titles = pd.Series([f'{TITLES[i % 4]} {i}' for i in range(size)])
+    index = TocIndex.build(codes, titles)
+    queries = ['p', 'po', 'pop', 'popu', 'population s', 'population se']
+    number = 100
+    elapsed = timeit.timeit(
+        lambda: [index.search(query) for query in queries],
+        number=number
+    )
+    per_query = elapsed / (number * len(queries))
+    print(f'search: {per_query * 1000:.3f}ms per query, {size} entries')
+
+
+def pivot():
+    """Pivot a range of periods of a large dataset."""
+    df = make_wide(rows=100_000, periods=40, missing=0.2)
+    store = TidyStore.from_wide(df, n_dims=2)
+    start = time.perf_counter()
+    wide = store.to_wide(periods=store.time_slice('2014', '2023'))
+    elapsed = time.perf_counter() - start
+    print(f'pivot: {wide.size:,} cells in {elapsed:.3f}s')
+
+
+def paint():
+    """Scroll through a dataset with more than a million cells."""
+    try:
+        # Starts the QGIS application, which the table model needs.
+        from test_pandas_model import (
+            PandasModel,
+            make_dataframe
+        )
+    except ImportError:
+        print('paint: skipped, QGIS is not installed')
+        return
+    df = make_dataframe(rows=50_000, date_columns=20)
+    model = PandasModel(df)
+    visible_rows = 40
+    start = time.perf_counter()
+    cells = 0
+    for top in range(0, model.rowCount(), visible_rows):
+        for row in range(top, min(top + visible_rows, model.rowCount())):
+            for col in range(model.columnCount()):
+                model.data(model.index(row, col))
+                cells += 1
+    elapsed = time.perf_counter() - start
+    print(f'paint: {cells:,} cells painted, {cells / elapsed:,.0f} cells/s')
+
+
+def first_chunk():
+    """The first rows are parsed long before the whole file."""
+    pieces = split(make_tsv(200_000), 64 * 1024)
+    start = time.perf_counter()
+    chunks = iter_chunks(pieces)
+    first = next(chunks)
+    first_time = time.perf_counter() - start
+    total = len(first) + sum(len(chunk) for chunk in chunks)
+    total_time = time.perf_counter() - start
+    print(
+        f'stream: first {len(first)} rows after {first_time * 1000:.1f}ms, '
+        f'{total} rows after {total_time * 1000:.1f}ms'
+    )
+
+
+def throughput():
+    """Compares the pooled session with one connection per request."""
+    server = StubServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    session = create_session(pool_size=4, backoff_factor=0)
+    number = 200
+
+    def run(get):
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            list(executor.map(get, [server.url] * number))
+        return number / (time.perf_counter() - start)
+
+    try:
+        pooled = run(session.get)
+        unpooled = run(requests.get)
+    finally:
+        session.close()
+        server.shutdown()
+        server.server_close()
+    print(
+        f'network: {pooled:,.0f} requests/s pooled, '
+        f'{unpooled:,.0f} requests/s unpooled'
+    )
+
+
+if __name__ == '__main__':
+    toc_access()
+    search()
+    pivot()
+    paint()
+    first_chunk()
+    throughput()
@@ -0,0 +1,153 @@
+# coding=utf-8
+"""Tests for the command line interface."""
+
+__author__ = 'cuvuliucalexandrei@gmail.com'
+__date__ = '2024-05-01'
+__copyright__ = 'Copyright 2024, Cuvuliuc Alex-Andrei'
+
+from pathlib import Path
+import sqlite3
+import tempfile
+import unittest
+
+import pandas as pd
+
+from src.cache import DatasetCache
+from src.cli import (
+    fetch,
+    parse_codes
+)
+from src.export import (
+    GPKG_APPLICATION_ID,
+    write_geopackage
+)
+
+from test_data import (
+    make_database,
+    make_dataset_df,
+    make_dataset_store
+)
+
+
+def read_table(path: Path, table: str) -> pd.DataFrame:
+    with sqlite3.connect(path) as connection:
+        return pd.read_sql_query(f'SELECT * FROM "{table}"', connection)
+
+
+class ParseTest(unittest.TestCase):
+    """Test the parsing of the arguments."""
+
+    def test_parse_codes(self):
+        self.assertEqual(
+            parse_codes(['tps00001,nama_10_gdp', 'tps00001', 'demo_pjan']),
+            ['tps00001', 'nama_10_gdp', 'demo_pjan']
+        )
+
+
+class GeoPackageTest(unittest.TestCase):
+    """Test the attribute tables written without GDAL."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / 'data.gpkg'
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_write(self):
+        df = make_dataset_df()
+        write_geopackage(self.path, 'first', df)
+        write_geopackage(self.path, 'second', df.iloc[:1])
+        # Replaces the existing table.
+        write_geopackage(self.path, 'first', df.iloc[1:])
+        with sqlite3.connect(self.path) as connection:
+            self.assertEqual(
+                connection.execute('PRAGMA application_id').fetchone()[0],
+                GPKG_APPLICATION_ID
+            )
+            self.assertEqual(
+                connection.execute(
+                    'SELECT table_name, data_type FROM gpkg_contents '
+                    'ORDER BY table_name'
+                ).fetchall(),
+                [('first', 'attributes'), ('second', 'attributes')]
+            )
+        table = read_table(self.path, 'first')
+        self.assertEqual(
+            table.columns.tolist(), ['fid', 'freq', 'geo', '2022', '2023']
+        )
+        self.assertEqual(table['geo'].tolist(), ['BG'])
+        self.assertTrue(table['2022'].isna().all())
+        self.assertEqual(table['2023'].tolist(), [3.5])
+
+    def test_write_object_column(self):
+        # A period without observations, as read by 'eurostat'.
+        df = make_dataset_df()
+        df['2024'] = pd.Series([None, None], dtype=object)
+        write_geopackage(self.path, 'first', df)
+        table = read_table(self.path, 'first')
+        self.assertTrue(table['2024'].isna().all())
+        self.assertEqual(table['2023'].tolist(), [2.5, 3.5])
+
+
+class FetchTest(unittest.TestCase):
+    """Fetch datasets which are read from the cache."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        directory = Path(self.directory.name)
+        self.database = make_database(size=10)
+        self.database.dataset_cache = DatasetCache(directory / 'cache')
+        self.codes = ['eurostat_1', 'eurostat_2', 'comext_3']
+        for code in self.codes:
+            self.database.dataset_cache.set(
+                code,
+                make_dataset_store(),
+                ['freq', 'geo'],
+                self.database.get_last_update(code)
+            )
+        self.out = directory / 'out.gpkg'
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_fetch(self):
+        lines = []
+        results = fetch(
+            self.database,
+            self.codes,
+            filters={'geo': ['RO']},
+            since='2023',
+            until=None,
+            out=self.out,
+            fmt='gpkg',
+            workers=2,
+            report=lines.append
+        )
+        self.assertEqual([result.code for result in results], self.codes)
+        self.assertTrue(all(result.status == 'ok' for result in results))
+        self.assertEqual(len(lines), 3)
+        for code in self.codes:
+            table = read_table(self.out, code)
+            self.assertEqual(
+                table.drop(columns='fid').values.tolist(),
+                [['A', 'RO', 2.5]]
+            )
+
+    def test_unknown_dimension(self):
+        results = fetch(
+            self.database,
+            self.codes[:1],
+            filters={'unit': ['NR']},
+            since=None,
+            until=None,
+            out=Path(self.directory.name) / 'csv',
+            fmt='csv',
+            report=lambda line: None
+        )
+        self.assertEqual(results[0].status, 'error')
+        self.assertIn('unit', results[0].error)
+
+
+if __name__ == '__main__':
+    unittest.main()
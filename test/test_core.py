@@ -0,0 +1,96 @@
+# coding=utf-8
+"""Tests for the data path, which runs without QGIS."""
+
+__author__ = 'cuvuliucalexandrei@gmail.com'
+__date__ = '2024-05-01'
+__copyright__ = 'Copyright 2024, Cuvuliuc Alex-Andrei'
+
+from pathlib import Path
+import subprocess
+import sys
+import unittest
+
+from src.core import (
+    DataFilterer,
+    Dataset,
+    parse_filters
+)
+from src.store import TidyStore
+
+from test_data import (
+    make_database,
+    make_dataset_df
+)
+
+
+PLUGIN_DIR = Path(__file__).parent.parent
+
+
+class CoreImportTest(unittest.TestCase):
+    """Test that the core does not import QGIS or Qt."""
+
+    def test_no_qt(self):
+        code = (
+            'import sys\n'
+            'import src.core\n'
+            'print(sorted(\n'
+            '    name for name in sys.modules\n'
+            "    if name.split('.')[0] in ('qgis', 'PyQt5', 'PyQt6', 'sip')\n"
+            '))\n'
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', code],
+            cwd=PLUGIN_DIR,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        self.assertEqual(result.stdout.strip(), '[]')
+
+
+class DataFiltererTest(unittest.TestCase):
+    """Test the filters applied to the long store of a dataset."""
+
+    def setUp(self):
+        self.dataset = Dataset(db=make_database(size=10), code='eurostat_1')
+        self.dataset._store = TidyStore.from_wide(make_dataset_df())
+        self.dataset._params.extend(['freq', 'geo'])
+        self.filterer = DataFilterer(dataset=self.dataset)
+
+    def test_no_filters(self):
+        self.assertEqual(self.filterer.column, ['freq', 'geo', '2022', '2023'])
+        df = self.filterer.apply_filters()
+        self.assertEqual(df.shape, (2, 4))
+
+    def test_filters(self):
+        state = self.filterer.state
+        self.filterer.add_row_filters({'geo': ['BG']})
+        self.filterer.set_time_range(1, 1)
+        self.filterer.remove_column_filters('freq')
+        self.assertNotEqual(self.filterer.state, state)
+        df = self.filterer.apply_filters()
+        self.assertEqual(df.columns.tolist(), ['geo', '2023'])
+        self.assertEqual(df.values.tolist(), [['BG', 3.5]])
+        query = self.filterer.query
+        self.assertEqual(query.filters, (('geo', ('BG',)),))
+        self.assertEqual((query.start_period, query.end_period), ('2023',) * 2)
+
+    def test_reset(self):
+        self.filterer.add_row_filters({'geo': ['BG']})
+        self.filterer.set_column_filters(['geo', '2022'])
+        self.filterer.remove_row_filters()
+        self.filterer.set_column_filters()
+        self.assertEqual(self.filterer.apply_filters().shape, (2, 4))
+
+    def test_parse_filters(self):
+        self.assertEqual(
+            parse_filters(['geo=RO,BG', 'unit=NR', 'geo=DE']),
+            {'geo': ['RO', 'BG', 'DE'], 'unit': ['NR']}
+        )
+        for invalid in ('geo', 'geo=', '=RO'):
+            with self.assertRaises(ValueError):
+                parse_filters([invalid])
+
+
+if __name__ == '__main__':
+    unittest.main()
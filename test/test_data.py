@@ -0,0 +1,557 @@
+# coding=utf-8
+"""Tests for the Eurostat data classes."""
+
+__author__ = 'cuvuliucalexandrei@gmail.com'
+__date__ = '2024-05-01'
+__copyright__ = 'Copyright 2024, Cuvuliuc Alex-Andrei'
+
+from datetime import timedelta
+from pathlib import Path
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from src.cache import (
+    DatasetCache,
+    DatasetEntry,
+    CodeListCache,
+    write_pickle
+)
+from src import data
+from src.data import (
+    Database,
+    Dataset,
+    DataQuery,
+    compact_frame,
+    get_periods,
+    get_uncompacted_size
+)
+from src.enums import (
+    Agency,
+    Language,
+    TableOfContentsColumn
+)
+from src.jobs import (
+    CancelToken,
+    JobCancelled
+)
+from src.settings import GLOBAL_SETTINGS
+from src.store import TidyStore
+from src.stream import (
+    DatasetTooLargeError,
+    NotStreamableError
+)
+
+
+def make_toc(agency: Agency, lang: Language, size: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        TableOfContentsColumn.TITLE.value: [
+            f'{lang.value} title {i} of {agency.value}' for i in range(size)
+        ],
+        TableOfContentsColumn.CODE.value: [
+            f'{agency.value.lower()}_{i}' for i in range(size)
+        ],
+        TableOfContentsColumn.LAST_UPDATE.value: [
+            '2024-04-30T23:00:00+0200'
+        ] * size,
+        TableOfContentsColumn.DATA_START.value: ['2010'] * size,
+        TableOfContentsColumn.DATA_END.value: ['2023'] * size,
+    })
+
+
+def make_database(size: int = 2_000) -> Database:
+    database = Database()
+    for agency in Agency:
+        for lang in Language:
+            database._update_toc(agency, lang, make_toc(agency, lang, size))
+    return database
+
+
+class DatabaseTest(unittest.TestCase):
+    """Test the table of contents handling."""
+
+    def test_toc_is_materialized(self):
+        database = make_database(size=10)
+        self.assertIs(database.toc, database.toc)
+        self.assertEqual(database.toc_size, 10 * len(Agency))
+
+    def test_toc_is_invalidated(self):
+        database = make_database(size=10)
+        english = database.toc
+        database.set_language(Language.FRENCH)
+        self.assertIsNot(database.toc, english)
+        database._update_toc(
+            Agency.EUROSTAT,
+            Language.FRENCH,
+            make_toc(Agency.EUROSTAT, Language.FRENCH, 20)
+        )
+        self.assertEqual(database.toc_size, 10 * (len(Agency) - 1) + 20)
+        database.set_language(Language.ENGLISH)
+        self.assertIs(database.toc, english)
+
+    def test_get_title(self):
+        database = make_database(size=10)
+        self.assertEqual(
+            database.get_title('comext_3'), 'en title 3 of COMEXT'
+        )
+
+    def test_get_subset(self):
+        database = make_database(size=10)
+        subset = database.get_subset('COMEXT title 3')
+        self.assertEqual(database.get_codes(subset).tolist(), ['comext_3'])
+        self.assertIs(database.get_subset(' '), database.toc)
+
+
+def make_dataset_df() -> pd.DataFrame:
+    return pd.DataFrame({
+        'freq': ['A', 'A'],
+        'geo': ['RO', 'BG'],
+        '2022': [1.5, None],
+        '2023': [2.5, 3.5],
+    })
+
+
+def make_dataset_store() -> TidyStore:
+    return TidyStore.from_wide(make_dataset_df(), n_dims=2)
+
+
+class DatasetCacheTest(unittest.TestCase):
+    """Test the on-disk dataset cache."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = DatasetCache(directory=Path(self.directory.name))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get(self):
+        store = make_dataset_store()
+        self.cache.set('demo_pjan', store, ['freq', 'geo'], '2024-04-30')
+        entry = self.cache.get('demo_pjan', '2024-04-30')
+        assert entry is not None
+        self.assertIsInstance(entry.data, TidyStore)
+        pd.testing.assert_frame_equal(entry.data.keys, store.keys)
+        np.testing.assert_array_equal(entry.data.values, store.values)
+        pd.testing.assert_frame_equal(
+            entry.data.to_wide(), make_dataset_df()
+        )
+        self.assertEqual(entry.params, ['freq', 'geo'])
+
+    def test_outdated(self):
+        self.cache.set('demo_pjan', make_dataset_store(), ['freq', 'geo'], '1')
+        self.assertIsNone(self.cache.get('demo_pjan', '2'))
+        self.assertIsNone(self.cache.get('demo_pjan', None))
+        self.assertIsNone(self.cache.get('nama_10_gdp', '1'))
+
+    def test_damaged(self):
+        self.cache.set('demo_pjan', make_dataset_store(), ['freq', 'geo'], '1')
+        entry = self.cache.get('demo_pjan', '1')
+        assert entry is not None
+        entry.data.values[0] = 100
+        pd.to_pickle(entry, self.cache._path('demo_pjan'))
+        self.assertIsNone(self.cache.get('demo_pjan', '1'))
+        self.assertFalse(self.cache._path('demo_pjan').exists())
+
+    def test_wide_entry(self):
+        entry = DatasetEntry(make_dataset_df(), ['freq', 'geo'], '1', '')
+        write_pickle(entry, self.cache._path('demo_pjan'))
+        self.assertIsNone(self.cache.get('demo_pjan', '1'))
+        self.assertFalse(self.cache.contains('demo_pjan'))
+
+    def test_dataset_reads_cache(self):
+        database = make_database(size=10)
+        database.dataset_cache = self.cache
+        last_update = database.get_last_update('eurostat_1')
+        self.assertEqual(last_update, '2024-04-30T23:00:00+0200')
+        self.assertIsNone(database.get_last_update('unknown'))
+        self.cache.set(
+            'eurostat_1', make_dataset_store(), ['freq', 'geo'], last_update
+        )
+        dataset = Dataset(db=database, code='eurostat_1')
+        self.assertTrue(dataset._load_cached_df(last_update))
+        self.assertEqual(dataset.params, ['freq', 'geo'])
+        self.assertEqual(dataset.date_columns.tolist(), ['2022', '2023'])
+
+    def test_eviction(self):
+        self.cache.max_entries = 2
+        for mtime, code in enumerate(('demo_pjan', 'nama_10_gdp')):
+            self.cache.set(code, make_dataset_store(), ['freq', 'geo'], '1')
+            os.utime(self.cache._path(code), (mtime, mtime))
+        # Reading an entry makes it the most recently used.
+        self.assertIsNotNone(self.cache.get('demo_pjan', '1'))
+        self.cache.set('tps00001', make_dataset_store(), ['freq', 'geo'], '1')
+        self.assertTrue(self.cache.contains('demo_pjan'))
+        self.assertFalse(self.cache.contains('nama_10_gdp'))
+        self.assertTrue(self.cache.contains('tps00001'))
+
+    def test_eviction_by_size(self):
+        self.cache.set('demo_pjan', make_dataset_store(), ['freq', 'geo'], '1')
+        size = self.cache._path('demo_pjan').stat().st_size
+        self.cache.max_bytes = size
+        self.cache.set('tps00001', make_dataset_store(), ['freq', 'geo'], '1')
+        self.assertFalse(self.cache.contains('demo_pjan'))
+        self.assertTrue(self.cache.contains('tps00001'))
+
+
+class CodeListCacheTest(unittest.TestCase):
+    """Test the code lists shared by the datasets."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = CodeListCache(
+            directory=Path(self.directory.name), max_entries=2
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get(self):
+        eurostat = Agency.EUROSTAT
+        self.assertIsNone(self.cache.get(eurostat, 'geo', Language.ENGLISH))
+        self.cache.set(eurostat, 'geo', Language.ENGLISH, [('RO', 'Romania')])
+        self.assertEqual(
+            self.cache.get(eurostat, 'GEO', Language.ENGLISH),
+            [('RO', 'Romania')]
+        )
+        self.assertIsNone(self.cache.get(eurostat, 'geo', Language.FRENCH))
+        # Read from the disk by another instance.
+        cache = CodeListCache(directory=Path(self.directory.name))
+        self.assertEqual(
+            cache.get(eurostat, 'geo', Language.ENGLISH), [('RO', 'Romania')]
+        )
+
+    def test_agencies(self):
+        """The agencies may use different values for a dimension."""
+        self.cache.set(
+            Agency.EUROSTAT, 'indic', Language.ENGLISH, [('A', 'Area')]
+        )
+        self.assertIsNone(
+            self.cache.get(Agency.COMEXT, 'indic', Language.ENGLISH)
+        )
+        cache = CodeListCache(directory=Path(self.directory.name))
+        self.assertIsNone(cache.get(Agency.COMEXT, 'indic', Language.ENGLISH))
+
+    def test_ttl(self):
+        self.cache.ttl = timedelta(0)
+        self.cache.set(
+            Agency.EUROSTAT, 'geo', Language.ENGLISH, [('RO', 'Romania')]
+        )
+        self.assertIsNone(
+            self.cache.get(Agency.EUROSTAT, 'geo', Language.ENGLISH)
+        )
+
+    def test_eviction(self):
+        for dimension in ('geo', 'unit', 'sex'):
+            self.cache.set(
+                Agency.EUROSTAT, dimension, Language.ENGLISH, [('T', 'Total')]
+            )
+        directory = self.cache._path(
+            Agency.EUROSTAT, 'geo', Language.ENGLISH
+        ).parent
+        self.assertEqual(len(list(directory.iterdir())), 2)
+
+    def test_dataset_labels(self):
+        database = make_database(size=10)
+        database.code_list_cache = self.cache
+        self.cache.set(Agency.EUROSTAT, 'geo', Language.ENGLISH, [
+            ('BG', 'Bulgaria'), ('DE', 'Germany'), ('RO', 'Romania')
+        ])
+        dataset = Dataset(db=database, code='eurostat_1')
+        dataset._store = TidyStore.from_wide(make_dataset_df())
+        dataset._set_param_info(('geo', Language.ENGLISH))
+        self.assertEqual(
+            dataset.get_param_labels('geo', Language.ENGLISH),
+            [('BG', 'Bulgaria'), ('RO', 'Romania')]
+        )
+
+    def test_dataset_labels_missing(self):
+        """The values missing from the cached code list are kept."""
+        database = make_database(size=10)
+        database.code_list_cache = self.cache
+        self.cache.set(
+            Agency.EUROSTAT, 'geo', Language.ENGLISH, [('RO', 'Romania')]
+        )
+        dataset = Dataset(db=database, code='eurostat_1')
+        dataset._store = TidyStore.from_wide(make_dataset_df())
+        dataset._set_param_info(('geo', Language.ENGLISH))
+        self.assertEqual(
+            dataset.get_param_labels('geo', Language.ENGLISH),
+            [('RO', 'Romania'), ('BG', 'BG')]
+        )
+
+
+class DatasetLabelsTest(unittest.TestCase):
+    """Test the background loading of the parameter labels."""
+
+    def setUp(self):
+        self.database = make_database(size=10)
+        self.calls = []
+        self.release = threading.Event()
+
+        def get_code_list(code, param, lang):
+            self.calls.append((param, lang))
+            if lang is Language.ENGLISH:
+                self.release.wait(5)
+            return [('RO', f'Romania ({lang.value})')]
+
+        self.database.get_code_list = get_code_list
+        self.dataset = Dataset(
+            db=self.database, code='eurostat_1', lang=Language.FRENCH
+        )
+        self.dataset._store = TidyStore.from_wide(make_dataset_df())
+        # Enough English labels to keep all the workers busy.
+        self.dataset._params.extend(['freq', 'unit', 'sex', 'geo'])
+
+    def tearDown(self):
+        self.release.set()
+        self.dataset.close()
+
+    def test_selected_language_first(self):
+        self.dataset._prefetch_labels()
+        self.assertEqual(
+            self.dataset.get_param_labels('geo', Language.FRENCH),
+            [('RO', 'Romania (fr)'), ('BG', 'BG')]
+        )
+        queued = [lang for _, lang in self.dataset._label_futures]
+        self.assertEqual(queued[:4], [Language.FRENCH] * 4)
+
+    def test_wait_single_dimension(self):
+        """A queued dimension is loaded right away when it is needed."""
+        self.dataset._prefetch_labels()
+        labels = self.dataset.get_param_labels('geo', Language.GERMAN)
+        self.release.set()
+        self.assertEqual(labels, [('RO', 'Romania (de)'), ('BG', 'BG')])
+        self.assertEqual(self.calls.count(('geo', Language.GERMAN)), 1)
+
+
+class DatasetPrefetchTest(unittest.TestCase):
+    """Test the speculative loading of the datasets."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.database = make_database(size=10)
+        self.database.dataset_cache = DatasetCache(
+            directory=Path(self.directory.name)
+        )
+        self.labels = []
+        self.downloads = []
+
+        def get_code_list(code, param, lang):
+            self.labels.append((param, lang))
+            return [('RO', 'Romania')]
+
+        self.database.get_code_list = get_code_list
+        self.get_pars = mock.patch.object(
+            data.eurostat, 'get_pars', return_value=['freq', 'geo']
+        ).start()
+        self.download = mock.patch.object(
+            data, 'download_dataset', side_effect=self.download_dataset
+        ).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        self.directory.cleanup()
+
+    def download_dataset(self, url, **kwargs):
+        self.downloads.append(kwargs)
+        return make_dataset_df()
+
+    def test_prefetch(self):
+        dataset = Dataset(
+            db=self.database, code='eurostat_1', lang=Language.FRENCH
+        )
+        dataset.prefetch()
+        self.assertEqual(
+            self.labels,
+            [('freq', Language.FRENCH), ('geo', Language.FRENCH)]
+        )
+        limits = self.downloads[0]
+        self.assertEqual(
+            limits['max_bytes'], GLOBAL_SETTINGS.prefetch_max_bytes
+        )
+        self.assertEqual(
+            limits['bytes_per_second'],
+            GLOBAL_SETTINGS.prefetch_bytes_per_second
+        )
+        # Opening the dataset downloads nothing.
+        opened = Dataset(db=self.database, code='eurostat_1')
+        opened.initialize_df(labels=False)
+        self.assertEqual(opened.params, ['freq', 'geo'])
+        self.assertEqual(len(opened.keys), 2)
+        self.assertEqual(len(self.downloads), 1)
+        self.assertEqual(self.get_pars.call_count, 1)
+        # Already cached.
+        dataset.prefetch()
+        self.assertEqual(len(self.downloads), 1)
+
+    def test_too_large(self):
+        self.download.side_effect = DatasetTooLargeError
+        Dataset(db=self.database, code='eurostat_1').prefetch()
+        self.assertFalse(
+            self.database.dataset_cache.contains('eurostat_1')
+        )
+
+    def test_cancelled(self):
+        token = CancelToken()
+        token.cancel()
+        with self.assertRaises(JobCancelled):
+            Dataset(db=self.database, code='eurostat_1').prefetch(token)
+        self.assertEqual(self.downloads, [])
+
+
+class DatasetDownloadTest(unittest.TestCase):
+    """Test that a streamed dataset is stored chunk by chunk."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.database = make_database(size=10)
+        self.database.dataset_cache = DatasetCache(
+            directory=Path(self.directory.name)
+        )
+        df = make_dataset_df()
+        self.chunks = [df.iloc[:1], df.iloc[1:].reset_index(drop=True)]
+        mock.patch.object(
+            data.eurostat, 'get_pars', return_value=['freq', 'geo']
+        ).start()
+        self.stream = mock.patch.object(
+            data, 'stream_dataset', return_value=iter(self.chunks)
+        ).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        self.directory.cleanup()
+
+    def test_initialize_df(self):
+        received = []
+        dataset = Dataset(db=self.database, code='eurostat_1')
+        with mock.patch.object(
+            TidyStore, 'to_wide', autospec=True
+        ) as to_wide:
+            dataset.initialize_df(on_chunk=received.append, labels=False)
+        # The store is cached without building the wide table.
+        to_wide.assert_not_called()
+        self.assertEqual(received, self.chunks)
+        self.assertIsInstance(
+            dataset.keys['geo'].dtype, pd.CategoricalDtype
+        )
+        expected = make_dataset_df()
+        pd.testing.assert_frame_equal(
+            dataset.df.astype(expected.dtypes), expected
+        )
+        entry = self.database.dataset_cache.get(
+            'eurostat_1', self.database.get_last_update('eurostat_1')
+        )
+        assert entry is not None
+        pd.testing.assert_frame_equal(
+            entry.data.to_wide().astype(expected.dtypes), expected
+        )
+
+
+    def test_not_streamable(self):
+        self.stream.side_effect = NotStreamableError('HTTP 404')
+        with mock.patch.object(
+            data.eurostat, 'get_data_df', return_value=make_dataset_df()
+        ) as get_data_df:
+            dataset = Dataset(db=self.database, code='eurostat_1')
+            dataset.initialize_df(labels=False)
+        get_data_df.assert_called_once()
+        expected = make_dataset_df()
+        pd.testing.assert_frame_equal(
+            dataset.df.astype(expected.dtypes), expected
+        )
+
+
+class DataQueryTest(unittest.TestCase):
+    """Test the translation of the filters for the server."""
+
+    def test_get_periods(self):
+        self.assertEqual(get_periods('2021', '2023'), ['2021', '2022', '2023'])
+        self.assertEqual(
+            get_periods('2021-Q3', '2022-Q2'),
+            ['2021-Q3', '2021-Q4', '2022-Q1', '2022-Q2']
+        )
+        self.assertEqual(
+            get_periods('2021-S2', '2022-S1'), ['2021-S2', '2022-S1']
+        )
+        self.assertEqual(
+            get_periods('2021-11', '2022-02'),
+            ['2021-11', '2021-12', '2022-01', '2022-02']
+        )
+        self.assertEqual(
+            get_periods('2024-02-28', '2024-03-01'),
+            ['2024-02-28', '2024-02-29', '2024-03-01']
+        )
+        self.assertIsNone(get_periods('2021-W01', '2021-W10'))
+
+    def test_query(self):
+        query = DataQuery(
+            filters=(('unit', ('NR', 'PC')), ('geo', ('RO',))),
+            start_period='2020',
+            end_period='2022'
+        )
+        self.assertEqual(
+            query.get_key(['freq', 'unit', 'sex', 'geo']), '.NR+PC..RO'
+        )
+        self.assertEqual(query.get_filter_pars(), {
+            'unit': ['NR', 'PC'],
+            'geo': ['RO'],
+            'startPeriod': '2020',
+            'endPeriod': '2022',
+        })
+
+    def test_get_time_range(self):
+        database = make_database(size=10)
+        self.assertEqual(
+            database.get_time_range('grow_2'), ('2010', '2023')
+        )
+        self.assertEqual(database.get_agency('grow_2'), Agency.GROW)
+        self.assertIsNone(database.get_time_range('unknown'))
+
+
+class CompactFrameTest(unittest.TestCase):
+    """Test the compact representation of the datasets."""
+
+    def make_frame(self, rows: int) -> pd.DataFrame:
+        rng = np.random.default_rng(0)
+        return pd.DataFrame({
+            'freq': ['A'] * rows,
+            'geo': rng.choice(['RO', 'BG', 'DE', None], size=rows),
+            # Counts are stored exactly as float32.
+            '2022': rng.integers(0, 1_000_000, size=rows).astype(float),
+            '2023': rng.random(rows),
+        })
+
+    def test_compact(self):
+        df = self.make_frame(rows=1_000)
+        compact = compact_frame(df, ['freq', 'geo'])
+        self.assertIsInstance(compact['geo'].dtype, pd.CategoricalDtype)
+        self.assertEqual(compact['2022'].dtype, np.float32)
+        # Would lose precision.
+        self.assertEqual(compact['2023'].dtype, np.float64)
+        pd.testing.assert_frame_equal(compact.astype(df.dtypes), df)
+
+    def test_missing_period(self):
+        """A period without observations stays a value column."""
+        df = self.make_frame(rows=10)
+        df['2024'] = pd.Series([None] * 10, dtype=object)
+        compact = compact_frame(df, ['freq', 'geo'])
+        self.assertEqual(compact['2024'].dtype, np.float32)
+        self.assertTrue(compact['2024'].isna().all())
+
+    def test_memory_usage(self):
+        df = self.make_frame(rows=200_000)
+        before = int(df.memory_usage(deep=True).sum())
+        compact = compact_frame(df, ['freq', 'geo'])
+        after = int(compact.memory_usage(deep=True).sum())
+        self.assertEqual(get_uncompacted_size(compact), before)
+        self.assertLess(after * 2, before)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+# coding=utf-8
+"""Tests for the jobs started by the main dialog."""
+
+__author__ = 'cuvuliucalexandrei@gmail.com'
+__date__ = '2024-05-01'
+__copyright__ = 'Copyright 2024, Cuvuliuc Alex-Andrei'
+
+from pathlib import Path
+import itertools
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from qgis.PyQt import QtCore
+from qgis.core import (
+    QgsFeedback,
+    QgsProject,
+    QgsVectorLayer
+)
+
+from utilities import get_qgis_app
+QGIS_APP = get_qgis_app()
+
+from src.cache import (  # noqa: E402
+    CodeListCache,
+    DatasetCache
+)
+from src.data import Dataset  # noqa: E402
+from src.enums import (  # noqa: E402
+    Agency,
+    Language,
+    LayerStorage
+)
+from src.converter import (  # noqa: E402
+    QgsConverter,
+    get_layers_dir,
+    remove_unused_layer_files
+)
+from src.eurostat_downloader import Dialog  # noqa: E402
+from src.jobs import JobCancelled  # noqa: E402
+from src.settings import GLOBAL_SETTINGS  # noqa: E402
+from src.tasks import SCHEDULER  # noqa: E402
+
+from test_data import (  # noqa: E402
+    make_database,
+    make_dataset_df,
+    make_dataset_store
+)
+
+
+def process_events_until(condition, timeout: float = 30) -> bool:
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        QtCore.QCoreApplication.processEvents()
+        time.sleep(0.001)
+    return True
+
+
+class DatasetJobsTest(unittest.TestCase):
+    """Open many datasets rapidly. The datasets and their labels are
+    read from the caches, so nothing is downloaded."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        directory = Path(self.directory.name)
+        database = make_database(size=50)
+        database.dataset_cache = DatasetCache(directory)
+        database.code_list_cache = CodeListCache(directory)
+        for code in database.get_codes():
+            database.dataset_cache.set(
+                code,
+                make_dataset_store(),
+                ['freq', 'geo'],
+                database.get_last_update(code)
+            )
+        for agency, lang in itertools.product(Agency, Language):
+            database.code_list_cache.set(
+                agency, 'freq', lang, [('A', 'Annual')]
+            )
+            database.code_list_cache.set(
+                agency, 'geo', lang, [('RO', 'Romania'), ('BG', 'Bulgaria')]
+            )
+        self.dialog = Dialog()
+        self.dialog.database = database
+        self.dialog.filter_toc()
+
+    def tearDown(self):
+        self.dialog.abandon_dataset_job()
+        process_events_until(lambda: not SCHEDULER.jobs)
+        self.directory.cleanup()
+
+    def select(self, row: int) -> str:
+        view = self.dialog.ui.listDatabase
+        view.setCurrentIndex(self.dialog.toc_model.index(row))
+        self.dialog.set_dataset_table()
+        return self.dialog.toc_model.get_code(row)
+
+    def test_open_many_datasets(self):
+        rows = self.dialog.toc_model.rowCount()
+        self.assertGreater(rows, 100)
+        code = None
+        for row in range(200):
+            code = self.select(row % rows)
+            if row % 7 == 0:
+                QtCore.QCoreApplication.processEvents()
+        self.assertTrue(
+            process_events_until(lambda: self.dialog.dataset_job is None)
+        )
+        dataset = self.dialog.dataset
+        self.assertIsNotNone(dataset)
+        self.assertEqual(dataset.code, code)
+        self.assertIs(self.dialog.filterer.dataset, dataset)
+        model = self.dialog.ui.tableDataset.model()
+        self.assertIs(model, self.dialog.model.pandas)
+        self.assertEqual(model.rowCount(), 2)
+        self.assertTrue(self.dialog.ui.buttonReset.isEnabled())
+
+    def test_cancel(self):
+        self.select(0)
+        self.dialog.dataset_job.cancel()
+        self.assertTrue(
+            process_events_until(lambda: self.dialog.dataset_job is None)
+        )
+        # The dataset could have been loaded before the cancellation.
+        if self.dialog.dataset is not None:
+            self.assertIsNotNone(self.dialog.filterer)
+        self.assertTrue(self.dialog.ui.buttonReset.isEnabled())
+
+    def test_layer_changed_while_loading(self):
+        self.select(0)
+        self.assertTrue(
+            process_events_until(lambda: self.dialog.dataset_job is None)
+        )
+        layer = QgsVectorLayer(
+            'Point?crs=EPSG:4326&field=code:string', 'countries', 'memory'
+        )
+        project = QgsProject.instance()
+        self.select(1)
+        # Adding a layer changes the current layer of the dialog.
+        project.addMapLayer(layer)
+        self.addCleanup(project.removeMapLayer, layer.id())
+        self.dialog.ui.qgsComboLayer.setLayer(layer)
+        self.dialog.set_layer_join_field_default()
+        self.assertIsNone(self.dialog.infer_join_field_idx_from_layer(layer))
+
+    def test_add_partial_dataset(self):
+        code = self.select(0)
+        self.assertTrue(
+            process_events_until(lambda: self.dialog.dataset_job is None)
+        )
+        project = QgsProject.instance()
+        with (
+            mock.patch.object(
+                Dataset,
+                'is_partial',
+                new_callable=mock.PropertyMock,
+                return_value=True
+            ),
+            mock.patch.object(
+                Dataset, 'download', return_value=make_dataset_df()
+            ) as download
+        ):
+            self.assertTrue(self.dialog.model.needs_slice)
+            self.dialog.exporter.add_table()
+            self.assertTrue(
+                process_events_until(
+                    lambda: project.mapLayersByName(code)
+                )
+            )
+            self.assertFalse(self.dialog.model.needs_slice)
+        download.assert_called_once()
+        layer = project.mapLayersByName(code)[0]
+        self.assertEqual(layer.featureCount(), 2)
+        project.removeMapLayer(layer)
+
+
+class ConverterTest(unittest.TestCase):
+
+    def test_cancelled(self):
+        df = make_dataset_df()
+        fields = QgsConverter.get_fields(df)
+        layer = QgsVectorLayer('none', 'cancelled', 'memory')
+        layer.dataProvider().addAttributes(fields.toList())
+        layer.updateFields()
+        feedback = QgsFeedback()
+        feedback.cancel()
+        with self.assertRaises(JobCancelled):
+            QgsConverter.write_features(
+                df, layer.dataProvider(), layer.fields(), feedback
+            )
+        self.assertEqual(layer.featureCount(), 0)
+
+    def test_remove_unused_layer_files(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache_dir = GLOBAL_SETTINGS.cache_dir
+        GLOBAL_SETTINGS.cache_dir = Path(directory.name)
+        self.addCleanup(setattr, GLOBAL_SETTINGS, 'cache_dir', cache_dir)
+        project = QgsProject.instance()
+        layers = [
+            QgsConverter.from_dataframe(
+                make_dataset_df(), name, storage=LayerStorage.GEOPACKAGE
+            )
+            for name in ('used', 'unused')
+        ]
+        project.addMapLayer(layers[0])
+        self.addCleanup(project.removeMapLayer, layers[0].id())
+        del layers[1]
+        self.assertEqual(remove_unused_layer_files(), 1)
+        self.assertEqual(len(list(get_layers_dir().iterdir())), 1)
+        self.assertEqual(layers[0].featureCount(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,220 @@
+# coding=utf-8
+"""Tests for the cancellation of the background jobs."""
+
+__author__ = 'cuvuliucalexandrei@gmail.com'
+__date__ = '2024-05-01'
+__copyright__ = 'Copyright 2024, Cuvuliuc Alex-Andrei'
+
+import gzip
+import threading
+import time
+import unittest
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer
+)
+
+from src.enums import JobPriority
+from src.jobs import (
+    CancelToken,
+    JobCancelled,
+    WorkerPool
+)
+from src.stream import download_dataset
+
+
+def make_tsv(rows: int) -> bytes:
+    lines = ['freq,geo\\TIME_PERIOD\t2022 \t2023 ']
+    lines.extend(f'A,G{row}\t1.5 \t2.5 p' for row in range(rows))
+    return gzip.compress('\n'.join(lines).encode() + b'\n')
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Sends the first part of the body, then stalls."""
+    # Needed for keep-alive connections.
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = self.server.body
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body[:len(body) // 2])
+        self.wfile.flush()
+        self.server.release.wait(10)
+        try:
+            self.wfile.write(body[len(body) // 2:])
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class SlowServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, body: bytes):
+        super().__init__(('127.0.0.1', 0), SlowHandler)
+        self.body = body
+        self.release = threading.Event()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/data'
+
+
+class CancelTokenTest(unittest.TestCase):
+    """Test the token shared with the jobs."""
+
+    def test_cancel(self):
+        token = CancelToken()
+        calls = []
+        token.raise_if_cancelled()
+        with token.on_cancel(lambda: calls.append('inside')):
+            token.cancel()
+            token.cancel()
+        self.assertEqual(calls, ['inside'])
+        self.assertTrue(token.cancelled)
+        self.assertRaises(JobCancelled, token.raise_if_cancelled)
+
+    def test_callback_removed(self):
+        token = CancelToken()
+        calls = []
+        with token.on_cancel(lambda: calls.append('inside')):
+            pass
+        token.cancel()
+        self.assertEqual(calls, [])
+
+    def test_already_cancelled(self):
+        token = CancelToken()
+        token.cancel()
+        calls = []
+        with self.assertRaises(JobCancelled):
+            with token.on_cancel(lambda: calls.append('inside')):
+                pass
+        self.assertEqual(calls, ['inside'])
+
+    def test_failing_callback(self):
+        token = CancelToken()
+        calls = []
+
+        def fail():
+            raise OSError('already closed')
+
+        with token.on_cancel(fail):
+            with token.on_cancel(lambda: calls.append('inside')):
+                with self.assertLogs('src.jobs', 'ERROR'):
+                    token.cancel()
+        self.assertEqual(calls, ['inside'])
+        self.assertTrue(token.cancelled)
+
+
+class CancelDownloadTest(unittest.TestCase):
+    """Test that a download is aborted in the middle of a read."""
+
+    def setUp(self):
+        self.server = SlowServer(make_tsv(rows=50_000))
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_cancel_stalled_download(self):
+        token = CancelToken()
+        # The rest of the body never arrives.
+        threading.Timer(0.5, token.cancel).start()
+        with self.assertRaises(JobCancelled):
+            download_dataset(self.server.url, token=token)
+        self.assertFalse(self.server.release.is_set())
+
+    def test_download(self):
+        self.server.release.set()
+        df = download_dataset(self.server.url, token=CancelToken())
+        self.assertEqual(len(df), 50_000)
+
+
+class WorkerPoolTest(unittest.TestCase):
+    """Test the scheduling of the jobs on the shared threads."""
+
+    def setUp(self):
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+
+    def test_priorities(self):
+        pool = WorkerPool(max_workers=1)
+        started = []
+        pool.submit(self.release.wait, 5)
+        futures = [
+            pool.submit(started.append, name, priority=priority)
+            for name, priority in [
+                ('prefetch', JobPriority.BACKGROUND),
+                ('first', JobPriority.FOREGROUND),
+                ('second', JobPriority.FOREGROUND),
+            ]
+        ]
+        self.release.set()
+        for future in futures:
+            future.result(5)
+        self.assertEqual(started, ['first', 'second', 'prefetch'])
+        pool.shutdown()
+
+    def test_max_workers(self):
+        pool = WorkerPool(max_workers=3)
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def work():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+        futures = [pool.submit(work) for _ in range(30)]
+        for future in futures:
+            future.result(5)
+        self.assertEqual(peak[0], 3)
+        pool.shutdown()
+
+    def test_nested_jobs(self):
+        """A job waiting for a queued job runs it instead of blocking
+        the only thread of the pool."""
+        pool = WorkerPool(max_workers=1)
+
+        def outer():
+            return pool.result(pool.submit(lambda: 'inner')) + ' done'
+
+        self.assertEqual(pool.submit(outer).result(5), 'inner done')
+        pool.shutdown()
+
+    def test_shutdown(self):
+        pool = WorkerPool(max_workers=1)
+        started = threading.Event()
+
+        def work():
+            started.set()
+            return self.release.wait(5)
+
+        running = pool.submit(work)
+        self.assertTrue(started.wait(5))
+        queued = pool.submit(lambda: None)
+        pool.shutdown()
+        self.assertTrue(queued.cancelled())
+        self.release.set()
+        self.assertTrue(running.result(5))
+        # The pool can be used again.
+        self.assertEqual(pool.submit(lambda: 1).result(5), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
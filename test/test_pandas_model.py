@@ -0,0 +1,78 @@
+# coding=utf-8
+"""Tests for the table model used to show the datasets."""
+
+__author__ = 'cuvuliucalexandrei@gmail.com'
+__date__ = '2024-05-01'
+__copyright__ = 'Copyright 2024, Cuvuliuc Alex-Andrei'
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from qgis.PyQt import QtCore
+
+from utilities import get_qgis_app
+QGIS_APP = get_qgis_app()
+
+from src.eurostat_downloader import PandasModel  # noqa: E402
+
+
+def make_dataframe(rows: int, date_columns: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    data = {
+        'freq': ['A'] * rows,
+        'unit': rng.choice(['NR', 'PC'], size=rows),
+        'geo': rng.choice(['RO', 'BG', 'DE', 'FR'], size=rows),
+    }
+    for year in range(2024 - date_columns, 2024):
+        values = rng.random(rows) * 1000
+        values[rng.random(rows) < 0.1] = np.nan
+        data[str(year)] = values
+    return pd.DataFrame(data)
+
+
+class PandasModelTest(unittest.TestCase):
+    """Test the block rendering of the table model."""
+
+    def test_data(self):
+        df = make_dataframe(rows=1_000, date_columns=5)
+        model = PandasModel(df)
+        self.assertEqual(model.rowCount(), 1_000)
+        self.assertEqual(model.columnCount(), 8)
+        for row, col in ((0, 0), (300, 2), (999, 7), (512, 4)):
+            self.assertEqual(
+                model.data(model.index(row, col)), str(df.iloc[row, col])
+            )
+        self.assertEqual(
+            model.headerData(
+                3,
+                QtCore.Qt.Orientation.Horizontal,
+                QtCore.Qt.ItemDataRole.DisplayRole
+            ),
+            df.columns[3]
+        )
+
+    def test_block_eviction(self):
+        model = PandasModel(make_dataframe(rows=10_000, date_columns=1))
+        for row in range(0, 10_000, model.BLOCK_SIZE):
+            for col in range(model.columnCount()):
+                model.data(model.index(row, col))
+        self.assertLessEqual(len(model._blocks), model.MAX_BLOCKS)
+
+    def test_append_rows(self):
+        df = make_dataframe(rows=1_000, date_columns=2)
+        model = PandasModel(df.iloc[:300])
+        # Render the last block before it is complete.
+        model.data(model.index(299, 3))
+        model.append_rows(df.iloc[300:700])
+        model.append_rows(df.iloc[700:])
+        self.assertEqual(model.rowCount(), 1_000)
+        for row, col in ((299, 3), (300, 3), (511, 1), (700, 4), (999, 0)):
+            self.assertEqual(
+                model.data(model.index(row, col)), str(df.iloc[row, col])
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+# coding=utf-8
+"""Tests for the Processing algorithms."""
+
+__author__ = 'cuvuliucalexandrei@gmail.com'
+__date__ = '2024-05-01'
+__copyright__ = 'Copyright 2024, Cuvuliuc Alex-Andrei'
+
+from pathlib import Path
+import tempfile
+import unittest
+
+from utilities import get_qgis_app
+QGIS_APP = get_qgis_app()
+
+from qgis.core import (  # noqa: E402
+    QgsApplication,
+    QgsFeature,
+    QgsGeometry,
+    QgsPointXY,
+    QgsProcessingContext,
+    QgsProcessingFeedback,
+    QgsVectorLayer
+)
+
+from src.cache import DatasetCache  # noqa: E402
+from src.processing import EurostatProvider  # noqa: E402
+
+from test_data import (  # noqa: E402
+    make_database,
+    make_dataset_store
+)
+
+
+def make_layer() -> QgsVectorLayer:
+    layer = QgsVectorLayer(
+        'Point?crs=EPSG:4326&field=code:string', 'countries', 'memory'
+    )
+    features = []
+    for x, code in enumerate(['RO', 'BG', 'DE']):
+        feature = QgsFeature(layer.fields())
+        feature.setGeometry(QgsGeometry.fromPointXY(QgsPointXY(x, 0)))
+        feature.setAttributes([code])
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+class ProcessingTest(unittest.TestCase):
+    """Run the algorithms on datasets which are read from the cache."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        database = make_database(size=10)
+        database.dataset_cache = DatasetCache(Path(self.directory.name))
+        self.code = database.get_codes().iloc[0]
+        database.dataset_cache.set(
+            self.code,
+            make_dataset_store(),
+            ['freq', 'geo'],
+            database.get_last_update(self.code)
+        )
+        self.provider = EurostatProvider(database=database)
+        self.registry = QgsApplication.processingRegistry()
+        self.registry.addProvider(self.provider)
+        self.context = QgsProcessingContext()
+        self.feedback = QgsProcessingFeedback()
+
+    def tearDown(self):
+        self.registry.removeProvider(self.provider)
+        self.directory.cleanup()
+
+    def run_algorithm(self, name: str, parameters: dict) -> QgsVectorLayer:
+        algorithm = self.registry.createAlgorithmById(f'eurostat:{name}')
+        results, ok = algorithm.run(
+            parameters | {'OUTPUT': 'memory:'}, self.context, self.feedback
+        )
+        self.assertTrue(ok)
+        return self.context.takeResultLayer(results['OUTPUT'])
+
+    def test_fetch(self):
+        layer = self.run_algorithm(
+            'fetchdataset',
+            {'DATASET': self.code, 'FILTERS': 'geo=RO', 'SINCE': '2023'}
+        )
+        self.assertEqual(
+            [field.name() for field in layer.fields()],
+            ['freq', 'geo', '2023']
+        )
+        self.assertEqual(
+            [feature.attributes() for feature in layer.getFeatures()],
+            [['A', 'RO', 2.5]]
+        )
+
+    def test_join(self):
+        layer = self.run_algorithm(
+            'joindataset',
+            {
+                'INPUT': make_layer(),
+                'FIELD': 'code',
+                'DATASET': self.code,
+                'DATASET_FIELD': 'geo',
+                'PREFIX': 'eu_'
+            }
+        )
+        self.assertEqual(
+            [field.name() for field in layer.fields()],
+            ['code', 'eu_freq', 'eu_2022', 'eu_2023']
+        )
+        features = list(layer.getFeatures())
+        self.assertEqual(features[0].attributes(), ['RO', 'A', 1.5, 2.5])
+        self.assertEqual(features[2]['eu_freq'], None)
+        self.assertTrue(features[2].hasGeometry())
+
+    def test_unknown_dimension(self):
+        algorithm = self.registry.createAlgorithmById('eurostat:fetchdataset')
+        _, ok = algorithm.run(
+            {'DATASET': self.code, 'FILTERS': 'unit=NR', 'OUTPUT': 'memory:'},
+            self.context,
+            self.feedback
+        )
+        self.assertFalse(ok)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+# coding=utf-8
+"""Tests for the table of contents search index."""
+
+__author__ = 'cuvuliucalexandrei@gmail.com'
+__date__ = '2024-05-01'
+__copyright__ = 'Copyright 2024, Cuvuliuc Alex-Andrei'
+
+import pickle
+import unittest
+
+import pandas as pd
+
+from src.search import TocIndex
+
+
+CODES = pd.Series([
+    'cens_hnctz',
+    'demo_pjan',
+    'nama_10_gdp',
+    'demo_r_pjangrp3',
+])
+TITLES = pd.Series([
+    'Population by sex, age and citizenship',
+    'Population on 1 January by age and sex',
+    'GDP and main components',
+    'Population on 1 January by age group, sex and NUTS 3 region',
+])
+
+
+class TocIndexTest(unittest.TestCase):
+    """Test the inverted index over codes and titles."""
+
+    def setUp(self):
+        self.index = TocIndex.build(CODES, TITLES)
+
+    def search(self, query, within=None):
+        return CODES.iloc[self.index.search(query, within=within)].tolist()
+
+    def test_prefix(self):
+        self.assertEqual(self.search('popul'), [
+            'cens_hnctz', 'demo_pjan', 'demo_r_pjangrp3'
+        ])
+
+    def test_and_query(self):
+        self.assertEqual(
+            self.search('population nuts'), ['demo_r_pjangrp3']
+        )
+
+    def test_code(self):
+        self.assertEqual(self.search('CENS_HN'), ['cens_hnctz'])
+        self.assertEqual(self.search('nama_10_gdp'), ['nama_10_gdp'])
+
+    def test_ranking(self):
+        # The code match is ranked before the title match.
+        self.assertEqual(self.search('gdp')[0], 'nama_10_gdp')
+        self.assertEqual(self.search('demo')[:2], [
+            'demo_pjan', 'demo_r_pjangrp3'
+        ])
+
+    def test_no_match(self):
+        self.assertEqual(self.search('unemployment'), [])
+
+    def test_within(self):
+        self.assertEqual(self.search('population', within=[1, 2]), [
+            'demo_pjan'
+        ])
+
+    def test_within_previous_results(self):
+        """Narrowing down a previous search gives the same ranking as
+        a new search, whatever was typed before."""
+        index = TocIndex.build(
+            pd.concat([CODES] * 3, ignore_index=True),
+            pd.concat([TITLES] * 3, ignore_index=True)
+        )
+        for prefix, query in [
+            ('p', 'population'),
+            ('demo', 'demo pop'),
+            ('s', 'sex age'),
+            ('', 'gdp'),
+        ]:
+            previous = index.search(prefix)
+            self.assertEqual(
+                index.search(query, within=previous).tolist(),
+                index.search(query).tolist()
+            )
+            self.assertEqual(
+                index.search(query, within=previous[::-1]).tolist(),
+                index.search(query).tolist()
+            )
+
+    def test_pickle(self):
+        index = pickle.loads(pickle.dumps(self.index))
+        self.assertEqual(index.signature, self.index.signature)
+        self.assertEqual(
+            index.search('sex').tolist(), self.index.search('sex').tolist()
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+# coding=utf-8
+"""Tests for the long representation of the datasets."""
+
+__author__ = 'cuvuliucalexandrei@gmail.com'
+__date__ = '2024-05-01'
+__copyright__ = 'Copyright 2024, Cuvuliuc Alex-Andrei'
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.store import TidyStore
+
+
+def make_wide(rows: int, periods: int, missing: float) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    data = {
+        'freq': ['A'] * rows,
+        'geo': [f'G{row}' for row in range(rows)],
+    }
+    for year in range(2024 - periods, 2024):
+        values = (rng.random(rows) * 1000).astype(np.float32)
+        values[rng.random(rows) < missing] = np.nan
+        data[str(year)] = values
+    return pd.DataFrame(data)
+
+
+class TidyStoreTest(unittest.TestCase):
+    """Test the conversion between the long and the wide tables."""
+
+    def test_round_trip(self):
+        df = make_wide(rows=200, periods=6, missing=0.3)
+        store = TidyStore.from_wide(df)
+        self.assertEqual(len(store), 200)
+        self.assertEqual(store.dims, ['freq', 'geo'])
+        self.assertEqual(store.values.dtype, np.float32)
+        self.assertEqual(len(store.values), df.iloc[:, 2:].count().sum())
+        pd.testing.assert_frame_equal(store.to_wide(), df)
+
+    def test_slices(self):
+        df = make_wide(rows=100, periods=6, missing=0.3)
+        store = TidyStore.from_wide(df)
+        rows = (df['geo'].str[1:].astype(int) % 3 == 0).to_numpy()
+        periods = store.time_slice('2020', '2022')
+        self.assertEqual(periods, slice(2, 5))
+        pd.testing.assert_frame_equal(
+            store.to_wide(rows=rows, periods=periods, dims=['geo']),
+            df.loc[rows, ['geo', '2020', '2021', '2022']]
+        )
+        # No periods at all.
+        self.assertEqual(
+            store.to_wide(periods=slice(0, 0)).columns.to_list(),
+            ['freq', 'geo']
+        )
+
+    def test_unsorted_periods(self):
+        df = make_wide(rows=10, periods=3, missing=0)
+        df = df[['freq', 'geo', '2023', '2021', '2022']]
+        store = TidyStore.from_wide(df)
+        self.assertEqual(store.periods.to_list(), ['2021', '2022', '2023'])
+        pd.testing.assert_frame_equal(
+            store.to_wide(),
+            df[['freq', 'geo', '2021', '2022', '2023']]
+        )
+
+    def test_missing_period(self):
+        """A leading period without observations is not a dimension."""
+        df = make_wide(rows=10, periods=2, missing=0)
+        df.insert(2, '2021', pd.Series([None] * 10, dtype=object))
+        store = TidyStore.from_wide(df, n_dims=2)
+        self.assertEqual(store.dims, ['freq', 'geo'])
+        self.assertEqual(store.periods.to_list(), ['2021', '2022', '2023'])
+        self.assertEqual(store.bounds.tolist(), [0, 0, 10, 20])
+
+    def test_concat(self):
+        df = make_wide(rows=30, periods=3, missing=0.3)
+        df['geo'] = df['geo'].astype('category')
+        chunks = [df.iloc[:10], df.iloc[10:25], df.iloc[25:]]
+        store = TidyStore.concat([
+            TidyStore.from_wide(chunk.reset_index(drop=True), n_dims=2)
+            for chunk in chunks
+        ])
+        self.assertIsInstance(store.keys['geo'].dtype, pd.CategoricalDtype)
+        pd.testing.assert_frame_equal(
+            store.to_wide().astype({'geo': str}), df.astype({'geo': str})
+        )
+
+    def test_sparse_memory(self):
+        df = make_wide(rows=10_000, periods=40, missing=0.8)
+        store = TidyStore.from_wide(df)
+        wide = int(df.memory_usage(deep=True).sum())
+        long = store.memory_usage()
+        self.assertLess(long, wide)
+
+    def test_pivot_range(self):
+        df = make_wide(rows=1_000, periods=40, missing=0.2)
+        store = TidyStore.from_wide(df)
+        wide = store.to_wide(periods=store.time_slice('2014', '2023'))
+        self.assertEqual(wide.shape, (1_000, 12))
+        pd.testing.assert_frame_equal(
+            wide, df[['freq', 'geo'] + [str(y) for y in range(2014, 2024)]]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
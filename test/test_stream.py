@@ -0,0 +1,184 @@
+# coding=utf-8
+"""Tests for the streamed parsing of the dataset TSV files."""
+
+__author__ = 'cuvuliucalexandrei@gmail.com'
+__date__ = '2024-05-01'
+__copyright__ = 'Copyright 2024, Cuvuliuc Alex-Andrei'
+
+import gzip
+import io
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import requests
+
+from src.enums import Agency
+from src.jobs import (
+    CancelToken,
+    JobCancelled
+)
+from src import stream
+from src.stream import (
+    DatasetTooLargeError,
+    NotStreamableError,
+    download_dataset,
+    get_data_url,
+    iter_chunks,
+    iter_limited,
+    parse_header
+)
+
+
+TSV = (
+    'freq,unit,geo\\TIME_PERIOD\t2021 \t2022 \r\n'
+    'A,NR,BG\t1.5 \t: \r\n'
+    'A,NR,RO\t2 p\t3.25 e\r\n'
+    'A,PC,RO\t:c \t4 \r\n'
+)
+
+
+def split(data: bytes, size: int) -> list[bytes]:
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def make_tsv(rows: int) -> bytes:
+    lines = ['freq,unit,geo\\TIME_PERIOD\t2020 \t2021 \t2022 ']
+    lines.extend(
+        f'A,NR,G{i}\t{i}.5 \t: \t{i} p' for i in range(rows)
+    )
+    return gzip.compress(('\r\n'.join(lines) + '\r\n').encode())
+
+
+class StreamTest(unittest.TestCase):
+    """Test the incremental parsing of compressed TSV files."""
+
+    def test_parse_header(self):
+        self.assertEqual(
+            parse_header(TSV.splitlines()[0].encode()),
+            ['freq', 'unit', 'geo', '2021', '2022']
+        )
+
+    def test_chunks(self):
+        pieces = split(gzip.compress(TSV.encode()), 7)
+        chunks = list(iter_chunks(pieces, first_chunk_size=1))
+        self.assertGreater(len(chunks), 1)
+        df = pd.concat(chunks, ignore_index=True)
+        self.assertEqual(
+            df.columns.tolist(), ['freq', 'unit', 'geo', '2021', '2022']
+        )
+        self.assertEqual(df['geo'].tolist(), ['BG', 'RO', 'RO'])
+        np.testing.assert_array_equal(
+            df['2021'].to_numpy(), [1.5, 2., np.nan]
+        )
+        np.testing.assert_array_equal(
+            df['2022'].to_numpy(), [np.nan, 3.25, 4.]
+        )
+
+    def test_no_rows(self):
+        header = TSV.splitlines()[0]
+        for tsv in (header, header + '\r\n'):
+            chunks = list(iter_chunks([gzip.compress(tsv.encode())]))
+            self.assertEqual(len(chunks), 1)
+            self.assertTrue(chunks[0].empty)
+            self.assertEqual(len(chunks[0].columns), 5)
+
+    def test_http_error(self):
+        for status in (404, 500):
+            response = requests.Response()
+            response.status_code = status
+            response.raw = io.BytesIO(b'<error/>')
+            with (
+                self.subTest(status=status),
+                mock.patch.object(
+                    stream.SESSION_MANAGER, 'get', return_value=response
+                )
+            ):
+                with self.assertRaises(NotStreamableError):
+                    download_dataset('https://example.com/data')
+
+    def test_get_data_url(self):
+        self.assertTrue(
+            get_data_url(Agency.EUROSTAT, 'demo_pjan').endswith(
+                '/data/demo_pjan?format=TSV&compressed=true'
+            )
+        )
+        self.assertTrue(
+            get_data_url(
+                Agency.COMEXT, 'ds_1', key='A.NR+PC..RO', start_period='2020'
+            ).endswith(
+                '/data/ds_1/A.NR+PC..RO?startPeriod=2020&'
+                'format=TSV&compressed=true'
+            )
+        )
+
+    def test_first_chunk(self):
+        """The first rows are parsed before the whole file is read."""
+        rows = 200_000
+        pieces = split(make_tsv(rows), 64 * 1024)
+        read = []
+
+        def iter_pieces():
+            for piece in pieces:
+                read.append(piece)
+                yield piece
+
+        chunks = iter_chunks(iter_pieces())
+        first = next(chunks)
+        self.assertLess(len(read), len(pieces))
+        total = len(first) + sum(len(chunk) for chunk in chunks)
+        self.assertEqual(total, rows)
+        self.assertEqual(len(read), len(pieces))
+
+
+class RecordingToken(CancelToken):
+    """Records the waits instead of sleeping."""
+
+    def __init__(self):
+        super().__init__()
+        self.delays: list[float] = []
+
+    def wait(self, timeout: float) -> bool:
+        self.delays.append(timeout)
+        return self.cancelled
+
+
+class LimitTest(unittest.TestCase):
+    """Test the limits of the speculative downloads."""
+
+    def test_max_bytes(self):
+        pieces = split(make_tsv(1_000), 1024)
+        size = sum(map(len, pieces))
+        self.assertEqual(
+            b''.join(iter_limited(pieces, CancelToken(), max_bytes=size)),
+            b''.join(pieces)
+        )
+        with self.assertRaises(DatasetTooLargeError):
+            list(iter_limited(pieces, CancelToken(), max_bytes=size - 1))
+
+    def test_bytes_per_second(self):
+        token = RecordingToken()
+        pieces = [bytes(1000)] * 5
+        self.assertEqual(
+            list(iter_limited(pieces, token, bytes_per_second=1000)), pieces
+        )
+        # Each piece takes a second, less the time already spent.
+        self.assertEqual(len(token.delays), 5)
+        for received, delay in enumerate(token.delays, start=1):
+            self.assertLessEqual(delay, received)
+            self.assertGreater(delay, received - 1)
+
+    def test_cancel_while_waiting(self):
+        token = RecordingToken()
+        pieces = iter_limited(
+            [bytes(1000)] * 2, token, bytes_per_second=100
+        )
+        token.cancel()
+        with self.assertRaises(JobCancelled):
+            next(pieces)
+        self.assertEqual(len(token.delays), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()